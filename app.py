@@ -2,17 +2,56 @@
 
 # File: app.py
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required,current_user
-from flask import Flask, render_template, redirect, url_for, request, session, flash
+from flask import Blueprint, Flask, render_template, redirect, url_for, request, session, flash, jsonify, Response, stream_with_context, has_request_context, send_file, g, before_render_template, template_rendered
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime,timezone
-import uuid
+from sqlalchemy import tuple_, event, inspect, text, or_, update, insert, bindparam
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from datetime import datetime,timezone,timedelta
+from collections import defaultdict
+import calendar
+import base64
+import hashlib
+import hmac
+import ipaddress
+from functools import wraps
+import json
+import socket
+import threading
+import time
+import traceback
 from flask_migrate import Migrate
+from cache import DiskFragmentStore, FragmentCache, LocalFragmentStore, NullFragmentStore, TTLCache
+from markupsafe import Markup
+from audit import AuditWriter
+from storage import BlobStore
+from events import LocalBroker
+from database import archive_database_uri, database_uri, engine_options, apply_sqlite_pragmas
+from sequences import SequenceAllocator
+from archive import pack as pack_archive, unpack as unpack_archive
+from sla import DeadlineScheduler
+from assignment import WorkloadBalancer, plan_rebalance
+from duplicates import DuplicateIndex, signature as minhash_signature
+from jobs import JobPool, retry_delay
+from metrics import COUNT_BUCKETS, Counter, Gauge, Histogram, Registry
+from export import EXPORT_FORMATS, stream_rows
+import search
+import click
 
 
 app = Flask(__name__)
 app.secret_key = 'secretkey'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///dashboard.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = database_uri()
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['SQLALCHEMY_BINDS'] = {
+    'archive': {'url': archive_database_uri(), **engine_options(archive_database_uri())},
+}
 db = SQLAlchemy(app)
+with app.app_context():
+    for engine in db.engines.values():
+        event.listen(engine, 'connect', apply_sqlite_pragmas)
 # After initializing db
 migrate = Migrate(app, db)
 
@@ -21,31 +60,55 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'  # your login route name
 
 import os
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 
-# Ensure the uploads/ directory exists
-UPLOAD_FOLDER = os.path.join(os.getcwd(), 'uploads')
+# Ensure the uploads/ directory exists. With web processes or job workers on
+# several hosts it must be storage they all share: attachments are spooled
+# here by the request and stored by whichever worker claims the job.
+UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or os.path.join(os.getcwd(), 'uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_BYTES', 512 * 1024 * 1024))
+# Let nginx/Apache stream attachment bytes instead of a worker when deployed behind one
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+# Reverse proxies in front of the app. Their X-Forwarded-For and -Proto headers
+# are believed this many hops deep, so request.remote_addr is the real client.
+TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES, x_proto=TRUSTED_PROXIES)
+
+blob_store = BlobStore(os.path.join(UPLOAD_FOLDER, 'blobs'))
 
 
 # ------------------ MODELS ------------------
 
 # Your models here
 
+class TicketSequence(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    next_value = db.Column(db.BigInteger, nullable=False)
+
+
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False)
     content = db.Column(db.Text, nullable=False)
     author = db.Column(db.String(100))
     timestamp = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=db.literal_column('version + 1'))
 
     ticket = db.relationship("Ticket", back_populates="comments")
 
+    __table_args__ = (
+        db.Index('ix_comment_ticket_timestamp', 'ticket_id', 'timestamp'),
+    )
+
 class Ticket(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    ticket_no = db.Column(db.String(50), unique=True, default=lambda: str(uuid.uuid4())[:8])
+    ticket_no = db.Column(db.String(50), unique=True, default=lambda: next_ticket_number())
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     comments = db.relationship("Comment", back_populates="ticket", cascade="all, delete-orphan")
@@ -56,6 +119,61 @@ class Ticket(db.Model):
     requested_by = db.Column(db.String(50))
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     attachment = db.Column(db.String(200))  # store the uploaded filename
+    idempotency_key = db.Column(db.String(200))  # client-supplied by machine ingestion, for dedup
+    # Maintained by apply_comment_counts() so the detail header never has to COUNT(*) the thread
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    closed_at = db.Column(db.DateTime)  # set by stamp_closed_at(); drives archiving
+    # Next SLA escalation (None while the clock is stopped) and how many have fired; see the SLA section
+    sla_due_at = db.Column(db.DateTime)
+    sla_level = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # MinHash of title and description for duplicate suggestions; see the DUPLICATES section
+    minhash = db.Column(db.LargeBinary)
+    # Bumped by every UPDATE, ORM or bulk; the API derives ETags from it
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=db.literal_column('version + 1'))
+    attachments = db.relationship('Attachment', back_populates='ticket', cascade='all, delete-orphan',
+                                  order_by='Attachment.id')
+
+    # Shaped around list_tickets(): every filter combination ends in the
+    # (created_at, id) keyset so pages come straight off the index.
+    __table_args__ = (
+        db.Index('ix_ticket_status_created', 'status', 'created_at', 'id'),
+        db.Index('ix_ticket_assignee_created', 'assigned_to', 'created_at', 'id'),
+        db.Index('ix_ticket_requester_created', 'requested_by', 'created_at', 'id'),
+        db.Index('ix_ticket_open_created', 'created_at', 'id',
+                 sqlite_where=db.text("status != 'Closed'"),
+                 postgresql_where=db.text("status != 'Closed'")),
+        db.Index('ix_ticket_open_assignee_created', 'assigned_to', 'created_at', 'id',
+                 sqlite_where=db.text("status != 'Closed'"),
+                 postgresql_where=db.text("status != 'Closed'")),
+        db.Index('ix_ticket_idempotency_key', 'idempotency_key', unique=True),
+        db.Index('ix_ticket_closed', 'closed_at', 'id',
+                 sqlite_where=db.text("status = 'Closed'"),
+                 postgresql_where=db.text("status = 'Closed'")),
+        db.Index('ix_ticket_sla_due', 'sla_due_at',
+                 sqlite_where=db.text('sla_due_at IS NOT NULL'),
+                 postgresql_where=db.text('sla_due_at IS NOT NULL')),
+    )
+
+
+class AttachmentBlob(db.Model):
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class Attachment(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    ticket_id = db.Column(db.Integer, db.ForeignKey('ticket.id'), nullable=False, index=True)
+    blob_sha256 = db.Column(db.String(64), db.ForeignKey('attachment_blob.sha256'), nullable=False)
+    filename = db.Column(db.String(200), nullable=False)
+    content_type = db.Column(db.String(100))
+    size = db.Column(db.BigInteger, nullable=False)
+    uploaded_by = db.Column(db.String(80))
+    uploaded_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+
+    ticket = db.relationship('Ticket', back_populates='attachments')
 
 
 class User(db.Model,UserMixin):
@@ -79,8 +197,16 @@ class Task(db.Model):
 
     created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'))  # 👈 Add this line
     created_by = db.relationship('User', backref='created_tasks') 
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1',
+                        onupdate=db.literal_column('version + 1'))
 
     ticket = db.relationship('Ticket', backref='tasks')
+
+    __table_args__ = (
+        db.Index('ix_task_created_by_created', 'created_by_id', 'created_at'),
+        db.Index('ix_task_ticket', 'ticket_id'),
+        db.Index('ix_task_created', 'created_at', 'id'),
+    )
     
 
 class TicketChangeLog(db.Model):
@@ -90,10 +216,1949 @@ class TicketChangeLog(db.Model):
     change_description = db.Column(db.Text)
     changed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        db.Index('ix_ticket_change_log_ticket_changed', 'ticket_id', 'changed_at'),
+    )
+
+
+# Dashboard rollups. Keys use '' / 0 instead of NULL so every cell has a
+# concrete primary key to upsert against.
+class TicketStats(db.Model):
+    status = db.Column(db.String(50), primary_key=True)
+    severity = db.Column(db.String(10), primary_key=True)
+    assigned_to = db.Column(db.Integer, primary_key=True)
+    ticket_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at_total = db.Column(db.Float, nullable=False, default=0)  # sum of epoch seconds, for mean age
+
+
+class TaskHoursDaily(db.Model):
+    user_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    hours = db.Column(db.Float, nullable=False, default=0)
+    task_count = db.Column(db.Integer, nullable=False, default=0)
+
+# Cold storage in the 'archive' bind: searchable columns plus the whole ticket
+# (tasks, comments, change log, attachment metadata) as one compressed document
+class ArchivedTicket(db.Model):
+    __bind_key__ = 'archive'
+    ticket_no = db.Column(db.String(50), primary_key=True)
+    title = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(50))
+    requested_by = db.Column(db.String(50))
+    assigned_to = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime)
+    closed_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_archived_ticket_closed', 'closed_at'),
+        db.Index('ix_archived_ticket_assignee', 'assigned_to', 'closed_at'),
+    )
+
+
+# Durable background work, claimed and run by the job workers; see the JOBS section
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # a key of JOB_HANDLERS
+    payload = db.Column(db.Text, nullable=False)  # JSON handed to the handler
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done or failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False)
+    run_at = db.Column(db.DateTime, nullable=False)  # not before; each failed attempt pushes it back
+    locked_by = db.Column(db.String(100))  # worker running it: host:pid:thread
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    idempotency_key = db.Column(db.String(200))  # a second job with the same key is not queued
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_job_due', 'run_at', 'id',
+                 sqlite_where=db.text("status = 'queued'"),
+                 postgresql_where=db.text("status = 'queued'")),
+        db.Index('ix_job_running', 'locked_at',
+                 sqlite_where=db.text("status = 'running'"),
+                 postgresql_where=db.text("status = 'running'")),
+        db.Index('ix_job_finished', 'finished_at',
+                 sqlite_where=db.text("status = 'done'"),
+                 postgresql_where=db.text("status = 'done'")),
+        db.Index('ix_job_status_kind', 'status', 'kind'),
+        db.Index('ix_job_idempotency_key', 'idempotency_key', unique=True),
+    )
+
+# ------------------ TICKET NUMBERS ------------------
+
+TICKET_NUMBER_BLOCK = int(os.environ.get('TICKET_NUMBER_BLOCK', 50))
+ticket_numbers = SequenceAllocator(lambda: db.engine, 'ticket', block_size=TICKET_NUMBER_BLOCK)
+
+
+def format_ticket_number(number):
+    # The hyphen keeps these apart from the older random SRXXXXXX codes
+    return f"SR-{number:07d}"
+
+
+def next_ticket_number():
+    return format_ticket_number(ticket_numbers.next())
+
+
+@event.listens_for(db.session, 'before_flush')
+def assign_ticket_numbers(session, flush_context, instances):
+    # Number every new ticket in this flush with one reservation, before the
+    # flush starts writing (the reservation uses its own short transaction).
+    pending = sorted((obj for obj in session.new if isinstance(obj, Ticket) and not obj.ticket_no),
+                     key=lambda obj: inspect(obj).insert_order)
+    if pending:
+        for ticket, number in zip(pending, ticket_numbers.allocate(len(pending))):
+            ticket.ticket_no = format_ticket_number(number)
+
+
+@event.listens_for(Comment.__table__, 'after_create')
+def create_search_index(target, connection, **kw):
+    # comment is created after ticket, so both FTS tables can be wired up here
+    if connection.dialect.name == 'sqlite':
+        search.install(connection)
+
+
+@app.cli.command('search-reindex')
+def search_reindex():
+    """Create the full-text search index if missing and rebuild it from all tickets and comments."""
+    with db.engine.begin() as connection:
+        search.install(connection)
+        search.rebuild(connection)
+    click.echo("Search index rebuilt.")
+
+# ------------------ DASHBOARD STATS ------------------
+
+def epoch_seconds(value):
+    if value is None:
+        value = datetime.now(timezone.utc)
+    return calendar.timegm(value.utctimetuple())
+
+
+def hours_value(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def ticket_stats_key(status, severity, assigned_to):
+    return (status or '', severity or '', int(assigned_to or 0))
+
+
+def task_hours_key(user_id, created_at):
+    return (int(user_id or 0), (created_at or datetime.now(timezone.utc)).date())
+
+
+def old_value(state, attr):
+    """Value of ``attr`` before the pending change, or the current one if it is unchanged."""
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(state.obj(), attr)
+
+
+def collect_stats_deltas(session):
+    tickets, tasks = defaultdict(lambda: [0, 0.0]), defaultdict(lambda: [0, 0.0])
+
+    def add(bucket, key, count, amount):
+        bucket[key][0] += count
+        bucket[key][1] += amount
+
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            add(tickets, ticket_stats_key(obj.status, obj.severity, obj.assigned_to), 1, epoch_seconds(obj.created_at))
+        elif isinstance(obj, Task):
+            add(tasks, task_hours_key(obj.created_by_id, obj.created_at), 1, hours_value(obj.time_spent))
+
+    for obj in session.deleted:
+        state = inspect(obj)
+        if isinstance(obj, Ticket):
+            key = ticket_stats_key(*(old_value(state, attr) for attr in ('status', 'severity', 'assigned_to')))
+            add(tickets, key, -1, -epoch_seconds(old_value(state, 'created_at')))
+        elif isinstance(obj, Task):
+            key = task_hours_key(old_value(state, 'created_by_id'), old_value(state, 'created_at'))
+            add(tasks, key, -1, -hours_value(old_value(state, 'time_spent')))
+
+    for obj in session.dirty:
+        state = inspect(obj)
+        if isinstance(obj, Ticket):
+            attrs = ('status', 'severity', 'assigned_to', 'created_at')
+            if not any(state.attrs[attr].history.has_changes() for attr in attrs):
+                continue
+            add(tickets, ticket_stats_key(*(old_value(state, attr) for attr in attrs[:3])),
+                -1, -epoch_seconds(old_value(state, 'created_at')))
+            add(tickets, ticket_stats_key(obj.status, obj.severity, obj.assigned_to), 1, epoch_seconds(obj.created_at))
+        elif isinstance(obj, Task):
+            attrs = ('created_by_id', 'created_at', 'time_spent')
+            if not any(state.attrs[attr].history.has_changes() for attr in attrs):
+                continue
+            add(tasks, task_hours_key(old_value(state, 'created_by_id'), old_value(state, 'created_at')),
+                -1, -hours_value(old_value(state, 'time_spent')))
+            add(tasks, task_hours_key(obj.created_by_id, obj.created_at), 1, hours_value(obj.time_spent))
+
+    return tickets, tasks
+
+
+def upsert_increment(connection, model, keys, increments, values=None):
+    """INSERT the row, or add ``increments`` to the existing one, in a single statement.
+
+    ``values`` are only used when the row is first inserted.
+    """
+    insert = postgresql_insert if connection.dialect.name == 'postgresql' else sqlite_insert
+    table = model.__table__
+    statement = insert(table).values(**keys, **increments, **(values or {}))
+    statement = statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: table.c[column] + statement.excluded[column] for column in increments}
+    )
+    connection.execute(statement)
+
+
+def write_stats_deltas(connection, tickets, tasks):
+    # Every writer, ORM or Core, passes its deltas through here; the balancer's loads follow them
+    queue_workload_changes(db.session, tickets, tasks)
+    for (status, severity, assigned_to), (count, total) in tickets.items():
+        if count or total:
+            upsert_increment(connection, TicketStats,
+                             {'status': status, 'severity': severity, 'assigned_to': assigned_to},
+                             {'ticket_count': count, 'created_at_total': total})
+    for (user_id, day), (count, hours) in tasks.items():
+        if count or hours:
+            upsert_increment(connection, TaskHoursDaily,
+                             {'user_id': user_id, 'day': day},
+                             {'task_count': count, 'hours': hours})
+
+
+@event.listens_for(db.session, 'after_flush')
+def apply_stats_deltas(session, flush_context):
+    # Runs inside the flush transaction, so rollups commit or roll back with the rows they count
+    tickets, tasks = collect_stats_deltas(session)
+    if tickets or tasks:
+        write_stats_deltas(session.connection(), tickets, tasks)
+
+
+def rebuild_dashboard_stats(connection):
+    """Recompute both rollup tables from scratch with two GROUP BY scans."""
+    connection.execute(TicketStats.__table__.delete())
+    connection.execute(TaskHoursDaily.__table__.delete())
+
+    status = db.func.coalesce(Ticket.status, '')
+    severity = db.func.coalesce(Ticket.severity, '')
+    assigned_to = db.func.coalesce(Ticket.assigned_to, 0)
+    connection.execute(TicketStats.__table__.insert().from_select(
+        ['status', 'severity', 'assigned_to', 'ticket_count', 'created_at_total'],
+        db.select(status, severity, assigned_to, db.func.count(),
+                  db.func.sum(db.extract('epoch', Ticket.created_at)))
+        .group_by(status, severity, assigned_to)
+    ))
+
+    user_id = db.func.coalesce(Task.created_by_id, 0)
+    day = db.func.date(Task.created_at)
+    connection.execute(TaskHoursDaily.__table__.insert().from_select(
+        ['user_id', 'day', 'hours', 'task_count'],
+        db.select(user_id, day, db.func.coalesce(db.func.sum(Task.time_spent), 0), db.func.count())
+        .group_by(user_id, day)
+    ))
+
+
+@app.cli.command('stats-rebuild')
+def stats_rebuild():
+    """Recompute the dashboard rollup tables from the ticket and task tables."""
+    with db.engine.begin() as connection:
+        rebuild_dashboard_stats(connection)
+    click.echo("Dashboard statistics rebuilt.")
+
+
+DASHBOARD_HOURS_DAYS = 7
+
+
+def dashboard_stats():
+    """Dashboard figures read only from the rollup tables (plus one index seek for the oldest open ticket)."""
+    cells = TicketStats.query.filter(TicketStats.ticket_count > 0).all()
+    names = {user.id: user.full_name or user.username for user in user_directory.all()}
+    now = epoch_seconds(None)
+
+    by_status, by_severity, by_assignee = defaultdict(int), defaultdict(int), defaultdict(int)
+    open_count, open_created_total = 0, 0.0
+    for cell in cells:
+        by_status[cell.status or 'Unknown'] += cell.ticket_count
+        by_severity[cell.severity or 'Unset'] += cell.ticket_count
+        if cell.status != 'Closed':
+            by_assignee[names.get(cell.assigned_to, 'Not Assigned')] += cell.ticket_count
+            open_count += cell.ticket_count
+            open_created_total += cell.created_at_total
+
+    oldest_open = db.session.query(Ticket.created_at).filter(Ticket.status != 'Closed') \
+        .order_by(Ticket.created_at.asc(), Ticket.id.asc()).limit(1).scalar()
+
+    since = (datetime.now(timezone.utc) - timedelta(days=DASHBOARD_HOURS_DAYS - 1)).date()
+    hours = TaskHoursDaily.query.filter(TaskHoursDaily.day >= since) \
+        .order_by(TaskHoursDaily.day, TaskHoursDaily.user_id).all()
+    days = [since + timedelta(days=offset) for offset in range(DASHBOARD_HOURS_DAYS)]
+    hours_by_user = defaultdict(lambda: dict.fromkeys(days, 0.0))
+    for row in hours:
+        hours_by_user[names.get(row.user_id, 'Unknown')][row.day] += row.hours
+
+    return {
+        'by_status': dict(by_status),
+        'by_severity': dict(by_severity),
+        'by_assignee': sorted(by_assignee.items(), key=lambda item: -item[1]),
+        'open_count': open_count,
+        'open_mean_age_days': (now - open_created_total / open_count) / 86400 if open_count else 0,
+        'oldest_open_age_days': (now - epoch_seconds(oldest_open)) / 86400 if oldest_open else 0,
+        'days': days,
+        'hours_by_user': {user: [per_day[day] for day in days] for user, per_day in sorted(hours_by_user.items())},
+    }
+
+# ------------------ AUDIT LOG ------------------
+
+AUDITED_TICKET_FIELDS = ('title', 'status', 'severity', 'assigned_to', 'description')
+
+
+def write_change_log(entries):
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(TicketChangeLog.__table__.insert(), entries)
+
+
+audit_writer = AuditWriter(write_change_log)
+
+
+def current_actor():
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.username
+    return 'system'
+
+
+def describe_change(field, old, new):
+    if field == 'description':
+        return "description updated"
+    return f"{field}: {old if old not in (None, '') else '(none)'} -> {new if new not in (None, '') else '(none)'}"
+
+
+@event.listens_for(db.session, 'before_flush')
+def capture_audit_actor(session, flush_context, instances):
+    # Resolved here, where a user lookup may still query; after_flush may not
+    if 'audit_actor' not in session.info and any(isinstance(obj, Ticket) for obj in session.new | session.dirty):
+        session.info['audit_actor'] = current_actor()
+
+
+@event.listens_for(db.session, 'after_flush')
+def capture_ticket_changes(session, flush_context):
+    actor = session.info.get('audit_actor', 'system')
+    changed_at = datetime.now(timezone.utc)
+    entries = []
+
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            entries.append({'ticket_id': obj.id, 'changed_by': actor, 'changed_at': changed_at,
+                            'change_description': f"ticket created with status {obj.status or 'New'}"})
+
+    for obj in session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        state = inspect(obj)
+        for field in AUDITED_TICKET_FIELDS:
+            history = state.attrs[field].history
+            if not history.has_changes():
+                continue
+            old = history.deleted[0] if history.deleted else None
+            new = getattr(obj, field)
+            if str(old if old is not None else '') == str(new if new is not None else ''):
+                continue
+            entries.append({'ticket_id': obj.id, 'changed_by': actor, 'changed_at': changed_at,
+                            'change_description': describe_change(field, old, new)})
+
+    if entries:
+        session.info.setdefault('audit_entries', []).extend(entries)
+
+
+@event.listens_for(db.session, 'after_commit')
+def enqueue_ticket_changes(session):
+    session.info.pop('audit_actor', None)
+    entries = session.info.pop('audit_entries', None)
+    if entries:
+        audit_writer.submit(entries)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_ticket_changes(session):
+    session.info.pop('audit_actor', None)
+    session.info.pop('audit_entries', None)
+
+# ------------------ LIVE UPDATES ------------------
+
+broker = LocalBroker()
+
+
+def ticket_event(kind, ticket_id, ticket_no, status, assigned_to, **extra):
+    return dict(type=kind, ticket_id=ticket_id, ticket_no=ticket_no, status=status,
+                assigned_to=int(assigned_to) if assigned_to else None, **extra)
+
+
+def queue_live_events(session, events):
+    if events:
+        session.info.setdefault('live_events', []).extend(events)
+
+
+@event.listens_for(db.session, 'after_flush')
+def capture_live_events(session, flush_context):
+    events = []
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            events.append(ticket_event('ticket.created', obj.id, obj.ticket_no, obj.status, obj.assigned_to))
+        elif isinstance(obj, Comment):
+            ticket = session.get(Ticket, obj.ticket_id)
+            events.append(ticket_event('comment.added', obj.ticket_id, ticket.ticket_no, ticket.status,
+                                       ticket.assigned_to, comment_id=obj.id, author=obj.author))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        state = inspect(obj)
+        status, assignee = state.attrs.status.history, state.attrs.assigned_to.history
+        if status.has_changes() and status.deleted and status.deleted[0] != obj.status:
+            events.append(ticket_event('ticket.status_changed', obj.id, obj.ticket_no, obj.status,
+                                       obj.assigned_to, previous_status=status.deleted[0]))
+        if assignee.has_changes() and assignee.deleted and assignee.deleted[0] != obj.assigned_to:
+            previous = assignee.deleted[0]
+            events.append(ticket_event('ticket.reassigned', obj.id, obj.ticket_no, obj.status, obj.assigned_to,
+                                       previous_assigned_to=int(previous) if previous else None))
+    queue_live_events(session, events)
+
+
+@event.listens_for(db.session, 'after_commit')
+def publish_live_events(session):
+    events = session.info.pop('live_events', None)
+    if events:
+        broker.publish(events)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_live_events(session):
+    session.info.pop('live_events', None)
+
+# ------------------ COMMENTS ------------------
+
+COMMENT_PAGE_SIZE = int(os.environ.get('COMMENT_PAGE_SIZE', 25))
+
+
+@event.listens_for(db.session, 'after_flush')
+def apply_comment_counts(session, flush_context):
+    # Keeps Ticket.comment_count in the same transaction as the comments it counts
+    deltas = defaultdict(int)
+    for obj in session.new:
+        if isinstance(obj, Comment):
+            deltas[obj.ticket_id] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Comment):
+            deltas[old_value(inspect(obj), 'ticket_id')] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, Comment) and inspect(obj).attrs.ticket_id.history.has_changes():
+            deltas[old_value(inspect(obj), 'ticket_id')] -= 1
+            deltas[obj.ticket_id] += 1
+
+    connection = session.connection()
+    for ticket_id, delta in deltas.items():
+        if not delta:
+            continue
+        connection.execute(update(Ticket).where(Ticket.id == ticket_id)
+                           .values(comment_count=Ticket.comment_count + delta))
+        ticket = session.identity_map.get(inspect(Ticket).identity_key_from_primary_key((ticket_id,)))
+        if ticket is not None and ticket not in session.deleted:
+            session.expire(ticket, ['comment_count', 'version'])
+
+
+def comment_page(ticket_id, cursor=None, page_size=COMMENT_PAGE_SIZE):
+    """One page of a ticket's comments, newest first, seeking along ix_comment_ticket_timestamp."""
+    return keyset_page(Comment.query.filter(Comment.ticket_id == ticket_id), Comment.timestamp, Comment.id,
+                       cursor=cursor, page_size=page_size, sort='newest')
+
+# ------------------ ATTACHMENTS ------------------
+
+def queue_attachment(ticket_id, file):
+    """Spool an uploaded file and queue a job to store it on the ticket, so the request skips the hashing."""
+    spool = blob_store.spool(file.stream)
+    db.session.info.setdefault('spooled_uploads', []).append(spool)
+    enqueue_job('attachments.store', {
+        'ticket_id': ticket_id,
+        'spool': spool,
+        'filename': secure_filename(file.filename) or 'attachment',
+        'content_type': file.mimetype or 'application/octet-stream',
+        'uploaded_by': current_actor(),
+        'host': socket.gethostname(),
+    }, idempotency_key=f'attachment:{spool}')
+
+
+def store_spooled_attachment(payload):
+    """Job: move a spooled upload into the blob store and attach it to its ticket."""
+    ticket = db.session.get(Ticket, payload['ticket_id'])
+    db.session.info.setdefault('stored_uploads', []).append(payload['spool'])
+    if ticket is None:
+        return  # deleted before the job ran
+    path = blob_store.spool_path(payload['spool'])
+    if not os.path.exists(path):
+        # Fails the attempt, and retries, rather than losing the upload: the share may be catching up
+        raise FileNotFoundError(f"Upload spooled on {payload.get('host', 'another host')} is not in "
+                                f"{blob_store.spool_dir}; UPLOAD_FOLDER must be shared by every worker host")
+    sha256, size = blob_store.save_file(path)
+    ticket.attachments.append(Attachment(
+        blob_sha256=sha256,
+        filename=payload['filename'],
+        content_type=payload['content_type'],
+        size=size,
+        uploaded_by=payload['uploaded_by']
+    ))
+
+
+@event.listens_for(db.session, 'after_commit')
+def remove_stored_uploads(session):
+    # The queued job owns a committed upload's spool file; a stored one is in the blob store now
+    session.info.pop('spooled_uploads', None)
+    for spool in session.info.pop('stored_uploads', ()):
+        blob_store.discard_spool(spool)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_spooled_uploads(session):
+    # No job was queued for these; stored_uploads stay spooled for the job's retry
+    session.info.pop('stored_uploads', None)
+    for spool in session.info.pop('spooled_uploads', ()):
+        blob_store.discard_spool(spool)
+
+
+@event.listens_for(db.session, 'after_flush')
+def count_blob_references(session, flush_context):
+    connection = None
+    for obj in session.new | session.deleted:
+        if not isinstance(obj, Attachment):
+            continue
+        connection = connection or session.connection()
+        delta = 1 if obj in session.new else -1
+        upsert_increment(connection, AttachmentBlob, {'sha256': obj.blob_sha256},
+                         {'ref_count': delta}, values={'size': obj.size})
+
+
+@app.cli.command('attachments-gc')
+def attachments_gc():
+    """Delete stored blobs that no attachment references any more."""
+    orphans = AttachmentBlob.query.filter(AttachmentBlob.ref_count <= 0).all()
+    for blob in orphans:
+        db.session.delete(blob)
+    db.session.commit()
+    for blob in orphans:
+        blob_store.delete(blob.sha256)
+    click.echo(f"Removed {len(orphans)} unreferenced blobs.")
+
+# ------------------ BULK OPERATIONS ------------------
+
+TICKET_STATUSES = ('New', 'On Hold', 'In Progress', 'Closed')
+BULK_FIELDS = ('status', 'assigned_to')
+BULK_BATCH_SIZE = 1000
+
+
+class BulkRequestError(ValueError):
+    pass
+
+
+def parse_bulk_changes(changes):
+    if not isinstance(changes, dict) or not changes:
+        raise BulkRequestError("'set' must name at least one of: status, assigned_to.")
+    unknown = set(changes) - set(BULK_FIELDS)
+    if unknown:
+        raise BulkRequestError(f"Cannot bulk-update: {', '.join(sorted(unknown))}.")
+    if 'status' in changes and changes['status'] not in TICKET_STATUSES:
+        raise BulkRequestError(f"Unknown status '{changes['status']}'.")
+    if 'assigned_to' in changes and changes['assigned_to'] is not None:
+        if isinstance(changes['assigned_to'], bool) or user_directory.get(int(changes['assigned_to'])) is None:
+            raise BulkRequestError(f"Unknown user {changes['assigned_to']}.")
+        changes = dict(changes, assigned_to=int(changes['assigned_to']))
+    return changes
+
+
+def parse_bulk_ids(ids):
+    """Explicit ticket ids as a sorted list without repeats."""
+    if not isinstance(ids, list) or not all(isinstance(ticket_id, int) and not isinstance(ticket_id, bool)
+                                            for ticket_id in ids):
+        raise BulkRequestError("'ids' must be a list of ticket ids.")
+    return sorted(set(ids))
+
+
+def bulk_ticket_filter(spec):
+    """Build the WHERE clause for a bulk filter such as {"status": "open", "assigned_to": 5}."""
+    if not isinstance(spec, dict):
+        raise BulkRequestError("'filter' must be an object.")
+    conditions = []
+    status = spec.get('status', 'all')
+    if not isinstance(status, str):
+        raise BulkRequestError("'filter.status' must be a string.")
+    if status == 'open':
+        conditions.append(Ticket.status != 'Closed')
+    elif status == 'closed':
+        conditions.append(Ticket.status == 'Closed')
+    elif status != 'all':
+        conditions.append(Ticket.status == status)
+    if 'assigned_to' in spec:
+        assignee = spec['assigned_to']
+        if isinstance(assignee, bool):
+            raise BulkRequestError("'filter.assigned_to' must be a user id or null.")
+        conditions.append(Ticket.assigned_to.is_(None) if assignee is None else Ticket.assigned_to == int(assignee))
+    if 'requested_by' in spec:
+        if not isinstance(spec['requested_by'], str):
+            raise BulkRequestError("'filter.requested_by' must be a string.")
+        conditions.append(Ticket.requested_by == spec['requested_by'])
+    if 'created_before' in spec:
+        conditions.append(Ticket.created_at < datetime.fromisoformat(spec['created_before']))
+    if 'created_after' in spec:
+        conditions.append(Ticket.created_at >= datetime.fromisoformat(spec['created_after']))
+    if not conditions:
+        raise BulkRequestError("Refusing to update every ticket; give a filter or explicit ids.")
+    return conditions
+
+
+def ticket_id_batches(ids=None, conditions=None, batch_size=BULK_BATCH_SIZE):
+    if ids is not None:
+        ids = sorted({int(ticket_id) for ticket_id in ids})
+        for start in range(0, len(ids), batch_size):
+            yield ids[start:start + batch_size]
+        return
+
+    # Keyset over the primary key so each batch is an index range, however far in we are
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            db.select(Ticket.id).where(Ticket.id > last_id, *conditions).order_by(Ticket.id).limit(batch_size)
+        ).scalars().all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1]
+
+
+def apply_bulk_batch(ids, changes, actor):
+    """Update one batch with a single UPDATE plus one executemany into the change log."""
+    rows = db.session.execute(
+        db.select(Ticket.id, Ticket.ticket_no, Ticket.status, Ticket.severity, Ticket.assigned_to, Ticket.created_at)
+        .where(Ticket.id.in_(ids))
+    ).all()
+    targets = [row for row in rows if any(getattr(row, field) != value for field, value in changes.items())]
+    if not targets:
+        return 0
+
+    target_ids = [row.id for row in targets]
+    values = dict(changes)
+    if 'status' in changes:
+        values['closed_at'] = closed_at_value(changes['status'])
+    db.session.execute(update(Ticket).where(Ticket.id.in_(target_ids)).values(**values),
+                       execution_options={'synchronize_session': False})
+    if 'status' in changes:
+        apply_sla_status_change(targets, changes['status'])
+        apply_duplicate_status_change(targets, changes['status'])
+
+    changed_at = datetime.now(timezone.utc)
+    entries = [
+        {'ticket_id': row.id, 'changed_by': actor, 'changed_at': changed_at,
+         'change_description': describe_change(field, getattr(row, field), value) + ' (bulk)'}
+        for row in targets
+        for field, value in changes.items()
+        if getattr(row, field) != value
+    ]
+    db.session.execute(insert(TicketChangeLog), entries)
+
+    # Core UPDATEs skip the ORM flush hooks, so move the rollup counts here
+    tickets = defaultdict(lambda: [0, 0.0])
+    for row in targets:
+        new = dict(row._mapping, **changes)
+        created = epoch_seconds(row.created_at)
+        old_key = ticket_stats_key(row.status, row.severity, row.assigned_to)
+        new_key = ticket_stats_key(new['status'], new['severity'], new['assigned_to'])
+        tickets[old_key][0] -= 1
+        tickets[old_key][1] -= created
+        tickets[new_key][0] += 1
+        tickets[new_key][1] += created
+    write_stats_deltas(db.session.connection(), tickets, {})
+
+    events = []
+    for row in targets:
+        if 'status' in changes and row.status != changes['status']:
+            events.append(ticket_event('ticket.status_changed', row.id, row.ticket_no, changes['status'],
+                                       changes.get('assigned_to', row.assigned_to), previous_status=row.status))
+        if 'assigned_to' in changes and row.assigned_to != changes['assigned_to']:
+            events.append(ticket_event('ticket.reassigned', row.id, row.ticket_no, changes.get('status', row.status),
+                                       changes['assigned_to'], previous_assigned_to=row.assigned_to))
+    queue_live_events(db.session, events)
+
+    if 'status' in changes:
+        db.session.info['open_tickets_changed'] = True
+    mark_fragments_changed(db.session, 'tickets')
+    return len(targets)
+
+
+def bulk_update_tickets(changes, ids=None, conditions=None, actor='system', batch_size=BULK_BATCH_SIZE):
+    """Apply ``changes`` to the selected tickets in committed batches, yielding progress after each."""
+    started = time.monotonic()
+    matched = updated = 0
+    for number, batch in enumerate(ticket_id_batches(ids, conditions, batch_size), start=1):
+        try:
+            updated += apply_bulk_batch(batch, changes, actor)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        matched += len(batch)
+        yield {'batch': number, 'matched': matched, 'updated': updated,
+               'seconds': round(time.monotonic() - started, 3)}
+
+# ------------------ ARCHIVE ------------------
+
+# Closed tickets older than this move, with everything hanging off them, to the archive database
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 180))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 200))
+ARCHIVE_SEARCH_LIMIT = 50
+# Children are deleted before the ticket rows they reference
+ARCHIVED_CHILDREN = (('tasks', Task), ('comments', Comment), ('change_log', TicketChangeLog),
+                     ('attachments', Attachment))
+
+
+@event.listens_for(db.session, 'before_flush')
+def stamp_closed_at(session, flush_context, instances):
+    for obj in session.new | session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        if obj not in session.new and not inspect(obj).attrs.status.history.has_changes():
+            continue
+        if obj.status != 'Closed':
+            obj.closed_at = None
+        elif obj.closed_at is None:
+            obj.closed_at = datetime.now(timezone.utc)
+
+
+def closed_at_value(status):
+    """closed_at to SET next to a Core status change; tickets already closed keep their close time."""
+    if status != 'Closed':
+        return None
+    now = datetime.now(timezone.utc)
+    return db.func.coalesce(db.case((Ticket.status == 'Closed', Ticket.closed_at)), now)
+
+
+def table_rows(model, condition):
+    return [dict(row._mapping) for row in db.session.execute(db.select(model.__table__).where(condition))]
+
+
+def write_archive(records):
+    """Upsert archive rows, so re-running a batch whose live delete failed is harmless."""
+    engine = db.engines['archive']
+    insert = postgresql_insert if engine.dialect.name == 'postgresql' else sqlite_insert
+    table = ArchivedTicket.__table__
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=['ticket_no'],
+        set_={column.name: statement.excluded[column.name] for column in table.columns if column.name != 'ticket_no'}
+    )
+    with engine.begin() as connection:
+        connection.execute(statement, records)
+
+
+def archive_batch(cutoff, batch_size):
+    """Copy one batch of long-closed tickets into the archive, then delete them here. Returns the count."""
+    ids = db.session.execute(
+        db.select(Ticket.id).where(Ticket.status == 'Closed', Ticket.closed_at < cutoff)
+        .order_by(Ticket.closed_at, Ticket.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+
+    tickets = table_rows(Ticket, Ticket.id.in_(ids))
+    for ticket in tickets:
+        ticket.pop('minhash')  # derived from the text; a restore recomputes it
+    children = {name: defaultdict(list) for name, _ in ARCHIVED_CHILDREN}
+    for name, model in ARCHIVED_CHILDREN:
+        for row in table_rows(model, model.ticket_id.in_(ids)):
+            children[name][row['ticket_id']].append(row)
+
+    archived_at = datetime.now(timezone.utc)
+    write_archive([
+        dict(ticket_no=ticket['ticket_no'], title=ticket['title'], status=ticket['status'],
+             requested_by=ticket['requested_by'], assigned_to=ticket['assigned_to'],
+             created_at=ticket['created_at'], closed_at=ticket['closed_at'], archived_at=archived_at,
+             payload=pack_archive(dict(ticket=ticket, **{name: rows[ticket['id']] for name, rows in children.items()})))
+        for ticket in tickets
+    ])
+
+    # Attachment rows go, but their blobs keep the reference so a restore can point at them again.
+    # Core deletes skip the flush hooks; RETURNING gives the rows actually removed for the rollups.
+    connection = db.session.connection()
+    task_deltas, ticket_deltas = defaultdict(lambda: [0, 0.0]), defaultdict(lambda: [0, 0.0])
+    for name, model in ARCHIVED_CHILDREN:
+        statement = model.__table__.delete().where(model.ticket_id.in_(ids))
+        if model is Task:
+            for row in connection.execute(statement.returning(Task.created_by_id, Task.created_at, Task.time_spent)):
+                delta = task_deltas[task_hours_key(row.created_by_id, row.created_at)]
+                delta[0] -= 1
+                delta[1] -= hours_value(row.time_spent)
+        else:
+            connection.execute(statement)
+    deleted = connection.execute(
+        Ticket.__table__.delete().where(Ticket.id.in_(ids))
+        .returning(Ticket.status, Ticket.severity, Ticket.assigned_to, Ticket.created_at)
+    ).all()
+    for row in deleted:
+        delta = ticket_deltas[ticket_stats_key(row.status, row.severity, row.assigned_to)]
+        delta[0] -= 1
+        delta[1] -= epoch_seconds(row.created_at)
+    write_stats_deltas(connection, ticket_deltas, task_deltas)
+    mark_fragments_changed(db.session, 'tickets', 'tasks')
+    return len(deleted)
+
+
+def archive_closed_tickets(older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, max_batches=None):
+    """Archive tickets closed more than ``older_than_days`` ago in committed batches, yielding progress."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    started = time.monotonic()
+    archived = 0
+    number = 0
+    while max_batches is None or number < max_batches:
+        try:
+            count = archive_batch(cutoff, batch_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if not count:
+            break
+        number += 1
+        archived += count
+        yield {'batch': number, 'archived': archived, 'seconds': round(time.monotonic() - started, 3)}
+
+
+def restore_archived_ticket(ticket_no, actor='system'):
+    """Move an archived ticket and its children back into the live tables. Returns the new ticket id.
+
+    Rows get fresh ids (the old ones may have been reused) and the ticket a fresh
+    closed_at, so the next archive run does not take it straight back.
+    """
+    archived = db.session.get(ArchivedTicket, ticket_no)
+    if archived is None:
+        return None
+    record = unpack_archive(archived.payload)
+
+    now = datetime.now(timezone.utc)
+    ticket = {key: value for key, value in record['ticket'].items() if key != 'id'}
+    ticket['closed_at'] = now if ticket['status'] == 'Closed' else None
+    ticket['minhash'] = minhash_signature(ticket['title'], ticket['description'])
+    connection = db.session.connection()
+    ticket_id = connection.execute(Ticket.__table__.insert().returning(Ticket.id), [ticket]).scalar_one()
+    for name, model in ARCHIVED_CHILDREN:
+        rows = [dict({key: value for key, value in row.items() if key != 'id'}, ticket_id=ticket_id)
+                for row in record[name]]
+        if rows:
+            connection.execute(model.__table__.insert(), rows)
+    connection.execute(TicketChangeLog.__table__.insert(), [{
+        'ticket_id': ticket_id, 'changed_by': actor, 'changed_at': now,
+        'change_description': 'restored from archive',
+    }])
+
+    task_deltas = defaultdict(lambda: [0, 0.0])
+    for task in record['tasks']:
+        delta = task_deltas[task_hours_key(task['created_by_id'], task['created_at'])]
+        delta[0] += 1
+        delta[1] += hours_value(task['time_spent'])
+    ticket_deltas = {ticket_stats_key(ticket['status'], ticket['severity'], ticket['assigned_to']):
+                     [1, epoch_seconds(ticket['created_at'])]}
+    write_stats_deltas(connection, ticket_deltas, task_deltas)
+    mark_fragments_changed(db.session, 'tickets', 'tasks')
+    if ticket['status'] != 'Closed':
+        db.session.info['open_tickets_changed'] = True
+        queue_duplicate_changes(db.session, [(ticket_id, ticket['minhash'])])
+    db.session.commit()
+
+    # Only drop the archive copy once the live rows are committed
+    with db.engines['archive'].begin() as archive:
+        archive.execute(ArchivedTicket.__table__.delete().where(ArchivedTicket.ticket_no == ticket_no))
+    return ticket_id
+
+
+@app.cli.command('tickets-archive')
+@click.option('--older-than-days', default=ARCHIVE_AFTER_DAYS, show_default=True)
+@click.option('--batch-size', default=ARCHIVE_BATCH_SIZE, show_default=True)
+@click.option('--max-batches', type=int, help="stop after this many batches (default: until done)")
+def tickets_archive(older_than_days, batch_size, max_batches):
+    """Move long-closed tickets, with their tasks, comments, history and attachments, to the archive."""
+    db.create_all(bind_key='archive')
+    archived = 0
+    for progress in archive_closed_tickets(older_than_days, batch_size, max_batches):
+        archived = progress['archived']
+        click.echo(f"batch {progress['batch']}: {archived} archived ({progress['seconds']}s)")
+    click.echo(f"{archived} tickets archived.")
+
+
+@app.cli.command('tickets-restore')
+@click.argument('ticket_no')
+def tickets_restore(ticket_no):
+    """Bring an archived ticket back into the live tables."""
+    ticket_id = restore_archived_ticket(ticket_no)
+    if ticket_id is None:
+        raise click.ClickException(f"{ticket_no} is not in the archive.")
+    click.echo(f"{ticket_no} restored as ticket {ticket_id}.")
+
+# ------------------ SLA ------------------
+
+# Hours a running ticket may wait before it escalates, by severity (None: no severity set)
+SLA_TARGET_HOURS = {
+    'High': float(os.environ.get('SLA_HOURS_HIGH', 4)),
+    'Medium': float(os.environ.get('SLA_HOURS_MEDIUM', 24)),
+    'Low': float(os.environ.get('SLA_HOURS_LOW', 72)),
+    None: float(os.environ.get('SLA_HOURS_DEFAULT', 72)),
+}
+# The SLA clock runs in these statuses; On Hold stops it and coming back starts a fresh one
+SLA_STATUSES = ('New', 'In Progress')
+# What each successive breach does; after the last step the ticket stops escalating
+SLA_ESCALATION_STEPS = tuple(os.environ.get('SLA_ESCALATION_STEPS', 'bump_severity,bump_severity,reassign').split(','))
+SLA_ESCALATION_USER = os.environ.get('SLA_ESCALATION_USER')  # 'reassign' target; unset: the least-loaded user
+SLA_SCHEDULER_ENABLED = os.environ.get('SLA_SCHEDULER', '1').lower() not in ('0', 'false', 'no')
+SLA_ACTOR = 'sla'
+
+
+def sla_now():
+    return datetime.fromtimestamp(sla_scheduler.clock(), timezone.utc)
+
+
+def sla_deadline(severity, start):
+    # Whole seconds, so the stored value and the scheduler's float deadline compare exactly
+    hours = SLA_TARGET_HOURS.get(severity, SLA_TARGET_HOURS[None])
+    return (start + timedelta(hours=hours)).replace(microsecond=0)
+
+
+def sla_epoch(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def queue_sla_changes(session, changes):
+    if changes:
+        session.info.setdefault('sla_changes', []).extend(changes)
+
+
+@event.listens_for(db.session, 'before_flush')
+def schedule_sla_deadlines(session, flush_context, instances):
+    for obj in session.new | session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        if obj in session.new:
+            if obj.sla_due_at is None and (obj.status or 'New') in SLA_STATUSES:
+                obj.sla_due_at = sla_deadline(obj.severity, obj.created_at or sla_now())
+            continue
+        state = inspect(obj)
+        if state.attrs.sla_due_at.history.has_changes():
+            continue  # set explicitly, by escalate_tickets()
+        if state.attrs.status.history.has_changes():
+            if obj.status not in SLA_STATUSES:
+                obj.sla_due_at = None
+                obj.sla_level = 0
+            elif old_value(state, 'status') not in SLA_STATUSES:
+                obj.sla_due_at = sla_deadline(obj.severity, sla_now())
+                obj.sla_level = 0
+        elif state.attrs.severity.history.has_changes() and obj.sla_due_at is not None:
+            # Keep the time already waited: move the deadline by the difference in targets
+            previous = SLA_TARGET_HOURS.get(old_value(state, 'severity'), SLA_TARGET_HOURS[None])
+            obj.sla_due_at = sla_deadline(obj.severity, obj.sla_due_at - timedelta(hours=previous))
+
+
+@event.listens_for(db.session, 'after_flush')
+def capture_sla_changes(session, flush_context):
+    changes = [(obj.id, sla_epoch(obj.sla_due_at)) for obj in session.new | session.dirty
+               if isinstance(obj, Ticket)
+               and (obj in session.new or inspect(obj).attrs.sla_due_at.history.has_changes())]
+    changes.extend((obj.id, None) for obj in session.deleted if isinstance(obj, Ticket))
+    queue_sla_changes(session, changes)
+
+
+@event.listens_for(db.session, 'after_commit')
+def update_sla_scheduler(session):
+    changes = session.info.pop('sla_changes', None)
+    if changes and sla_scheduler.started:
+        sla_scheduler.schedule_many(changes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_sla_changes(session):
+    session.info.pop('sla_changes', None)
+
+
+def apply_sla_status_change(rows, status):
+    """Core counterpart of schedule_sla_deadlines() for ``rows`` a bulk UPDATE moved to ``status``."""
+    running = status in SLA_STATUSES
+    now = sla_now()
+    params = [{'b_id': row.id, 'b_due': sla_deadline(row.severity, now) if running else None}
+              for row in rows if (row.status in SLA_STATUSES) != running]
+    if not params:
+        return
+    table = Ticket.__table__
+    db.session.execute(
+        table.update().where(table.c.id == bindparam('b_id')).values(sla_due_at=bindparam('b_due'), sla_level=0),
+        params)
+    queue_sla_changes(db.session, [(param['b_id'], sla_epoch(param['b_due'])) for param in params])
+
+
+def bump_severity(ticket):
+    current = SEVERITIES.index(ticket.severity) if ticket.severity in SEVERITIES else 0
+    if current == len(SEVERITIES) - 1:
+        return f"severity already {ticket.severity}"
+    ticket.severity = SEVERITIES[current + 1]
+    return f"severity raised to {ticket.severity}"
+
+
+def reassign_ticket(ticket):
+    if SLA_ESCALATION_USER:
+        user = next((user for user in user_directory.all() if user.username == SLA_ESCALATION_USER), None)
+    else:
+        user = user_directory.get(auto_assignee(exclude={ticket.assigned_to}))
+    if user is None:
+        return "nobody to reassign to"
+    if ticket.assigned_to == user.id:
+        return f"already assigned to {user.username}"
+    ticket.assigned_to = user.id
+    return f"reassigned to {user.username}"
+
+
+SLA_ACTIONS = {'bump_severity': bump_severity, 'reassign': reassign_ticket}
+if set(SLA_ESCALATION_STEPS) - set(SLA_ACTIONS):
+    raise RuntimeError(f"SLA_ESCALATION_STEPS may only use: {', '.join(SLA_ACTIONS)}")
+
+
+def escalate_tickets(ticket_ids, now):
+    """Scheduler callback: take the next escalation step on each ticket still past its deadline at ``now``."""
+    with app.app_context():
+        due_at = datetime.fromtimestamp(now, timezone.utc)
+        table = Ticket.__table__
+        # Claim before acting: the ticket may have moved on since it was scheduled here, and another
+        # worker's scheduler may hold the same deadline. Only one UPDATE can clear it.
+        claimed = dict(db.session.execute(
+            table.update()
+            .where(table.c.id.in_(ticket_ids), table.c.sla_due_at <= due_at, table.c.status.in_(SLA_STATUSES))
+            .values(sla_due_at=None, sla_level=table.c.sla_level + 1)
+            .returning(table.c.id, table.c.sla_level)
+        ).all())
+        moved = [ticket_id for ticket_id in ticket_ids if ticket_id not in claimed]
+        if moved:
+            queue_sla_changes(db.session, [
+                (row.id, sla_epoch(row.sla_due_at)) for row in db.session.execute(
+                    db.select(Ticket.id, Ticket.sla_due_at).where(Ticket.id.in_(moved), Ticket.sla_due_at.is_not(None)))
+            ])
+
+        db.session.info['audit_actor'] = SLA_ACTOR
+        changed_at = datetime.now(timezone.utc)
+        entries = []
+        for ticket in db.session.scalars(db.select(Ticket).where(Ticket.id.in_(claimed))):
+            level = claimed[ticket.id]
+            step = SLA_ESCALATION_STEPS[min(level, len(SLA_ESCALATION_STEPS)) - 1]
+            outcome = SLA_ACTIONS[step](ticket)
+            if level < len(SLA_ESCALATION_STEPS):
+                ticket.sla_due_at = sla_deadline(ticket.severity, due_at)
+            entries.append({'ticket_id': ticket.id, 'changed_by': SLA_ACTOR, 'changed_at': changed_at,
+                            'change_description': f"SLA breached (escalation {level}): {outcome}"})
+            sla_escalations.inc(step)
+        db.session.info.setdefault('audit_entries', []).extend(entries)
+        db.session.commit()
+
+
+def load_sla_deadlines():
+    with app.app_context():
+        return [(row.id, sla_epoch(row.sla_due_at)) for row in db.session.execute(
+            db.select(Ticket.id, Ticket.sla_due_at).where(Ticket.sla_due_at.is_not(None)))]
+
+
+# One per process; deadlines set by other processes reach it when it next starts
+sla_scheduler = DeadlineScheduler(escalate_tickets, seed=load_sla_deadlines)
+
+
+@app.before_request
+def start_sla_scheduler():
+    if SLA_SCHEDULER_ENABLED:
+        sla_scheduler.start()
+
+
+def recompute_sla_deadlines(batch_size=BULK_BATCH_SIZE):
+    """Reset deadlines of running tickets that have not escalated from created_at, yielding progress per batch."""
+    started = time.monotonic()
+    table = Ticket.__table__
+    last_id = updated = number = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Ticket.id, Ticket.severity, Ticket.created_at)
+            .where(Ticket.id > last_id, Ticket.status.in_(SLA_STATUSES), Ticket.sla_level == 0)
+            .order_by(Ticket.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        params = [{'b_id': row.id, 'b_due': sla_deadline(row.severity, row.created_at)} for row in rows]
+        try:
+            db.session.execute(table.update().where(table.c.id == bindparam('b_id'))
+                               .values(sla_due_at=bindparam('b_due')), params)
+            queue_sla_changes(db.session, [(param['b_id'], sla_epoch(param['b_due'])) for param in params])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        number += 1
+        updated += len(rows)
+        last_id = rows[-1].id
+        yield {'batch': number, 'updated': updated, 'seconds': round(time.monotonic() - started, 3)}
+
+
+@app.cli.command('sla-recompute')
+@click.option('--batch-size', default=BULK_BATCH_SIZE, show_default=True)
+def sla_recompute(batch_size):
+    """Set SLA deadlines on running, unescalated tickets from created_at and the current targets."""
+    updated = 0
+    for progress in recompute_sla_deadlines(batch_size):
+        updated = progress['updated']
+        click.echo(f"batch {progress['batch']}: {updated} updated ({progress['seconds']}s)")
+    click.echo(f"{updated} deadlines set; restart the web workers to load them.")
+
+# ------------------ ASSIGNMENT ------------------
+
+AUTO_ASSIGN = 'auto'  # form and ingest value asking for the least-loaded user
+# Roles that auto-assignment and rebalancing hand tickets to
+ASSIGN_ROLES = tuple(os.environ.get('ASSIGN_ROLES', 'user').split(','))
+# Hours logged over the last ASSIGN_HOURS_DAYS days weigh as one open ticket per ASSIGN_HOURS_PER_TICKET
+ASSIGN_HOURS_PER_TICKET = float(os.environ.get('ASSIGN_HOURS_PER_TICKET', 4))
+ASSIGN_HOURS_DAYS = int(os.environ.get('ASSIGN_HOURS_DAYS', 7))
+AUTO_ASSIGN_DEFAULT = os.environ.get('AUTO_ASSIGN', '').lower() in ('1', 'true', 'yes')
+WORKLOAD_MAX_AGE = 300  # seconds; picks up other workers' writes and ages out old hours
+# Only tickets nobody has started on move in a rebalance
+REBALANCE_STATUSES = ('New',)
+
+
+def workload_hours_since():
+    return datetime.now(timezone.utc).date() - timedelta(days=ASSIGN_HOURS_DAYS - 1)
+
+
+def load_workloads():
+    eligible = [user.id for user in user_directory.all() if user.role in ASSIGN_ROLES]
+    # Both sums come off the dashboard rollups, so this is two small GROUP BYs at any ticket count
+    open_tickets = dict(db.session.execute(
+        db.select(TicketStats.assigned_to, db.func.sum(TicketStats.ticket_count))
+        .where(TicketStats.status != 'Closed').group_by(TicketStats.assigned_to)
+    ).all())
+    hours = dict(db.session.execute(
+        db.select(TaskHoursDaily.user_id, db.func.sum(TaskHoursDaily.hours))
+        .where(TaskHoursDaily.day >= workload_hours_since()).group_by(TaskHoursDaily.user_id)
+    ).all())
+    return {user_id: (open_tickets.get(user_id) or 0, hours.get(user_id) or 0.0) for user_id in eligible}
+
+
+workload_balancer = WorkloadBalancer(load_workloads, ASSIGN_HOURS_PER_TICKET, WORKLOAD_MAX_AGE)
+
+
+def auto_assignee(exclude=()):
+    """Least-loaded eligible user for one more ticket in this session, or None if there is nobody."""
+    user_id, reservation = workload_balancer.assign(exclude)
+    if reservation is not None:
+        db.session.info.setdefault('workload_reservations', []).append(reservation)
+    return user_id
+
+
+def queue_workload_changes(session, tickets, tasks):
+    """Turn rollup deltas into per-user load deltas, applied to the balancer once the session commits."""
+    since = workload_hours_since()
+    deltas = defaultdict(lambda: [0, 0.0])
+    for (status, _, assigned_to), (count, _) in tickets.items():
+        if assigned_to and count and status != 'Closed':
+            deltas[assigned_to][0] += count
+    for (user_id, day), (_, hours) in tasks.items():
+        if user_id and hours and day >= since:
+            deltas[user_id][1] += hours
+    if deltas:
+        session.info.setdefault('workload_deltas', []).append(dict(deltas))
+
+
+@event.listens_for(db.session, 'after_commit')
+def update_workloads(session):
+    reservations = session.info.pop('workload_reservations', ())
+    totals = defaultdict(lambda: [0, 0.0])
+    for deltas in session.info.pop('workload_deltas', ()):
+        for user_id, (open_delta, hours_delta) in deltas.items():
+            totals[user_id][0] += open_delta
+            totals[user_id][1] += hours_delta
+    if totals or reservations:
+        workload_balancer.apply(totals, reservations)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def release_workload_reservations(session):
+    session.info.pop('workload_deltas', None)
+    reservations = session.info.pop('workload_reservations', None)
+    if reservations:
+        workload_balancer.release(reservations)
+
+
+def plan_ticket_rebalance(max_moves=None, include_unassigned=False):
+    """Moves (ticket_id, from_user, to_user) that even out open-ticket load across eligible users."""
+    workload_balancer.reload()
+    scores = {user_id: score for user_id, (_, _, score) in workload_balancer.loads().items()}
+    movable = defaultdict(list)
+    # Newest first: the most recently assigned tickets are the cheapest to hand over
+    rows = db.session.execute(
+        db.select(Ticket.id, Ticket.assigned_to).where(Ticket.status.in_(REBALANCE_STATUSES))
+        .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+    )
+    unassigned = []
+    for ticket_id, assigned_to in rows:
+        if assigned_to is None:
+            unassigned.append(ticket_id)
+        elif assigned_to in scores:
+            movable[assigned_to].append(ticket_id)
+    return plan_rebalance(scores, movable, unassigned if include_unassigned else (), max_moves)
+
+
+def rebalance_tickets(moves, actor='system', batch_size=BULK_BATCH_SIZE):
+    """Apply planned moves as one bulk reassignment per receiving user, yielding progress."""
+    by_receiver = defaultdict(list)
+    for ticket_id, _, receiver in moves:
+        by_receiver[receiver].append(ticket_id)
+    started = time.monotonic()
+    moved = 0
+    for number, (receiver, ids) in enumerate(sorted(by_receiver.items()), start=1):
+        updated = 0
+        for progress in bulk_update_tickets({'assigned_to': receiver}, ids=ids, actor=actor, batch_size=batch_size):
+            updated = progress['updated']
+        moved += updated
+        yield {'user': receiver, 'users': number, 'moved': moved, 'seconds': round(time.monotonic() - started, 3)}
+
+
+@app.cli.command('tickets-rebalance')
+@click.option('--max-moves', type=int, help="stop after this many reassignments")
+@click.option('--include-unassigned', is_flag=True, help="also assign unassigned New tickets")
+@click.option('--dry-run', is_flag=True, help="print the plan without changing anything")
+def tickets_rebalance(max_moves, include_unassigned, dry_run):
+    """Move New tickets from the busiest to the least-loaded users until loads are within one ticket."""
+    moves = plan_ticket_rebalance(max_moves, include_unassigned)
+    if dry_run:
+        for ticket_id, donor, receiver in moves:
+            click.echo(f"ticket {ticket_id}: {donor or '-'} -> {receiver}")
+        click.echo(f"{len(moves)} moves planned.")
+        return
+    moved = 0
+    for progress in rebalance_tickets(moves):
+        moved = progress['moved']
+        click.echo(f"user {progress['user']}: {moved} moved ({progress['seconds']}s)")
+    click.echo(f"{moved} tickets reassigned.")
+
+# ------------------ DUPLICATES ------------------
+
+# Suggestions need at least this estimated similarity (0-1) of title and description words
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', 0.3))
+DUPLICATE_LIMIT = 5
+# Only open tickets created this recently are indexed; the duplicates that matter belong to current incidents
+DUPLICATE_WINDOW_DAYS = int(os.environ.get('DUPLICATE_WINDOW_DAYS', 30))
+DUPLICATE_REFRESH = 30  # seconds; picks up tickets created by other worker processes
+
+
+def load_duplicate_signatures(after_id):
+    since = datetime.now(timezone.utc) - timedelta(days=DUPLICATE_WINDOW_DAYS)
+    return db.session.execute(
+        db.select(Ticket.id, Ticket.minhash)
+        .where(Ticket.id > after_id, Ticket.status != 'Closed', Ticket.created_at >= since,
+               Ticket.minhash.is_not(None))
+        .order_by(Ticket.id)
+    ).all()
+
+
+# One per process, loaded on the first lookup and kept current by the commit hooks below
+duplicate_index = DuplicateIndex(load_duplicate_signatures, DUPLICATE_REFRESH)
+
+
+def queue_duplicate_changes(session, changes):
+    if changes:
+        session.info.setdefault('duplicate_changes', []).extend(changes)
+
+
+@event.listens_for(db.session, 'before_flush')
+def sign_ticket_text(session, flush_context, instances):
+    for obj in session.new | session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        state = inspect(obj)
+        if obj in session.new or state.attrs.title.history.has_changes() \
+                or state.attrs.description.history.has_changes():
+            obj.minhash = minhash_signature(obj.title, obj.description)
+
+
+@event.listens_for(db.session, 'after_flush')
+def capture_duplicate_changes(session, flush_context):
+    changes = []
+    for obj in session.new | session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        state = inspect(obj)
+        if obj in session.new or state.attrs.minhash.history.has_changes() \
+                or state.attrs.status.history.has_changes():
+            changes.append((obj.id, obj.minhash if obj.status != 'Closed' else None))
+    changes.extend((obj.id, None) for obj in session.deleted if isinstance(obj, Ticket))
+    queue_duplicate_changes(session, changes)
+
+
+@event.listens_for(db.session, 'after_commit')
+def update_duplicate_index(session):
+    changes = session.info.pop('duplicate_changes', None)
+    if changes:
+        duplicate_index.add_many(changes)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_duplicate_changes(session):
+    session.info.pop('duplicate_changes', None)
+
+
+def apply_duplicate_status_change(rows, status):
+    """Core counterpart of capture_duplicate_changes() for ``rows`` a bulk UPDATE moved to ``status``."""
+    if status == 'Closed':
+        queue_duplicate_changes(db.session, [(row.id, None) for row in rows if row.status != 'Closed'])
+        return
+    reopened = [row.id for row in rows if row.status == 'Closed']
+    if reopened:
+        queue_duplicate_changes(db.session, db.session.execute(
+            db.select(Ticket.id, Ticket.minhash).where(Ticket.id.in_(reopened))).all())
+
+
+def similar_open_tickets(title, description, limit=DUPLICATE_LIMIT, exclude=()):
+    """(id, ticket_no, title, status, similarity) for open tickets that read like the given text, best first."""
+    sig = minhash_signature(title, description)
+    if sig is None:
+        return []
+    # Ask for spares: a match may have been closed by another process since it was indexed
+    scores = dict(duplicate_index.query(sig, DUPLICATE_THRESHOLD, limit * 2, exclude))
+    if not scores:
+        return []
+    rows = db.session.execute(
+        db.select(Ticket.id, Ticket.ticket_no, Ticket.title, Ticket.status)
+        .where(Ticket.id.in_(scores), Ticket.status != 'Closed')
+    ).all()
+    rows.sort(key=lambda row: (-scores[row.id], -row.id))
+    return [(*row, scores[row.id]) for row in rows[:limit]]
+
+
+def sign_tickets(batch_size=BULK_BATCH_SIZE):
+    """Compute missing MinHash signatures, yielding progress per committed batch."""
+    started = time.monotonic()
+    table = Ticket.__table__
+    last_id = updated = number = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Ticket.id, Ticket.title, Ticket.description, Ticket.status)
+            .where(Ticket.id > last_id, Ticket.minhash.is_(None)).order_by(Ticket.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        params = [{'b_id': row.id, 'b_minhash': minhash_signature(row.title, row.description)} for row in rows]
+        try:
+            db.session.execute(table.update().where(table.c.id == bindparam('b_id'))
+                               .values(minhash=bindparam('b_minhash')), params)
+            queue_duplicate_changes(db.session, [(param['b_id'], param['b_minhash'])
+                                                 for row, param in zip(rows, params) if row.status != 'Closed'])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        number += 1
+        updated += len(rows)
+        last_id = rows[-1].id
+        yield {'batch': number, 'updated': updated, 'seconds': round(time.monotonic() - started, 3)}
+
+
+@app.cli.command('duplicates-reindex')
+@click.option('--batch-size', default=BULK_BATCH_SIZE, show_default=True)
+def duplicates_reindex(batch_size):
+    """Compute the duplicate-detection signature of every ticket that has none."""
+    updated = 0
+    for progress in sign_tickets(batch_size):
+        updated = progress['updated']
+        click.echo(f"batch {progress['batch']}: {updated} signed ({progress['seconds']}s)")
+    click.echo(f"{updated} tickets signed.")
+
+# ------------------ JOBS ------------------
+
+# Worker threads per web process; 0 leaves the queue to `flask jobs-work` processes
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', 2))  # how soon other processes' jobs are seen
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE = 10  # seconds before the first retry; doubles with each attempt
+JOB_RETRY_CAP = 3600
+JOB_LEASE_SECONDS = 600  # a job running longer than this is presumed lost with its worker and run again
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', 7))  # finished jobs kept for the admin view
+JOB_FAILURE_LIMIT = 50
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+JOB_HANDLERS = {'attachments.store': store_spooled_attachment}
+
+
+def enqueue_job(kind, payload, idempotency_key=None, delay=0, max_attempts=JOB_MAX_ATTEMPTS):
+    """Queue a job in the session's transaction, so it exists only if the caller's writes commit.
+
+    Nothing is queued when a job with the same ``idempotency_key`` already
+    exists, whatever its status. Returns True when the job was queued.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    now = datetime.now(timezone.utc)
+    connection = db.session.connection()
+    insert = postgresql_insert if connection.dialect.name == 'postgresql' else sqlite_insert
+    statement = insert(Job.__table__).values(
+        kind=kind, payload=json.dumps(payload), status='queued', attempts=0, max_attempts=max_attempts,
+        run_at=now + timedelta(seconds=delay), idempotency_key=idempotency_key, created_at=now,
+    ).on_conflict_do_nothing(index_elements=['idempotency_key'])
+    queued = connection.execute(statement).rowcount == 1
+    if queued:
+        db.session.info['jobs_queued'] = True
+    return queued
+
+
+@event.listens_for(db.session, 'after_commit')
+def wake_job_workers(session):
+    if session.info.pop('jobs_queued', None):
+        job_pool.notify()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_queued_jobs(session):
+    session.info.pop('jobs_queued', None)
+
+
+def job_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def requeue_stale_jobs():
+    """Put jobs whose worker has held them past the lease back in the queue. Returns the count.
+
+    A job that has used all its attempts is marked failed instead, so a job
+    that keeps killing its worker stops being retried.
+    """
+    now = datetime.now(timezone.utc)
+    stale = db.and_(Job.status == 'running', Job.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS))
+    failed = db.session.execute(
+        update(Job).where(stale, Job.attempts >= Job.max_attempts)
+        .values(status='failed', locked_by=None, locked_at=None, finished_at=now,
+                last_error='lease expired on the last attempt'),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    requeued = db.session.execute(
+        update(Job).where(stale)
+        .values(status='queued', locked_by=None, locked_at=None, last_error='lease expired'),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+    if failed:
+        app.logger.warning("%d jobs failed after their lease expired on the last attempt", failed)
+    return requeued
+
+
+_job_lease_check = {'at': 0.0}
+
+
+def claim_job():
+    """Mark the next due job running for this worker and return it, or None when nothing is due."""
+    with app.app_context():
+        if time.monotonic() - _job_lease_check['at'] >= JOB_LEASE_SECONDS / 10:
+            _job_lease_check['at'] = time.monotonic()
+            requeue_stale_jobs()
+        for _ in range(5):
+            now = datetime.now(timezone.utc)
+            # Look first, so an idle poll is one indexed read and never takes the write lock
+            job_id = db.session.scalar(
+                db.select(Job.id).where(Job.status == 'queued', Job.run_at <= now)
+                .order_by(Job.run_at, Job.id).limit(1))
+            if job_id is None:
+                db.session.rollback()
+                return None
+            # The status check makes the claim atomic: of two workers, only one gets the row
+            job = db.session.execute(
+                update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', locked_by=job_worker_name(), locked_at=now, attempts=Job.attempts + 1)
+                .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts, Job.locked_by),
+                execution_options={'synchronize_session': False}
+            ).first()
+            db.session.commit()
+            if job is not None:
+                return job
+        return None
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome: done, queued again after a backoff, or failed."""
+    started = time.monotonic()
+    mine = db.and_(Job.id == job.id, Job.locked_by == job.locked_by)
+    with app.app_context():
+        try:
+            handler = JOB_HANDLERS.get(job.kind)
+            if handler is None:
+                raise LookupError(f"No handler for job kind {job.kind!r}")
+            handler(json.loads(job.payload))
+            # Marked done in the handler's own transaction: its writes and the job's status commit together
+            finished = db.session.execute(
+                update(Job).where(mine).values(status='done', finished_at=datetime.now(timezone.utc),
+                                               locked_by=None, locked_at=None),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            if not finished:
+                # The lease ran out and another worker took the job over; its run counts
+                db.session.rollback()
+                outcome = 'lost'
+            else:
+                db.session.commit()
+                outcome = 'done'
+        except Exception:
+            db.session.rollback()
+            failed = job.attempts >= job.max_attempts
+            now = datetime.now(timezone.utc)
+            app.logger.warning("Job %s (%s) attempt %d of %d failed", job.id, job.kind, job.attempts,
+                               job.max_attempts, exc_info=True)
+            db.session.execute(
+                update(Job).where(mine).values(
+                    status='failed' if failed else 'queued', locked_by=None, locked_at=None,
+                    run_at=now + timedelta(seconds=retry_delay(job.attempts, JOB_RETRY_BASE, JOB_RETRY_CAP)),
+                    finished_at=now if failed else None, last_error=traceback.format_exc(limit=5)[-4000:]),
+                execution_options={'synchronize_session': False})
+            db.session.commit()
+            outcome = 'failed' if failed else 'retried'
+    job_runs.inc(job.kind, outcome)
+    job_duration.observe(time.monotonic() - started, job.kind)
+    return outcome
+
+
+job_pool = JobPool(claim_job, run_job, JOB_WORKERS, JOB_POLL_SECONDS)
+
+
+@app.before_request
+def start_job_workers():
+    job_pool.start()
+
+
+def retry_job(job_id):
+    """Queue a failed job again with a fresh set of attempts. Returns False if it had not failed."""
+    retried = db.session.execute(
+        update(Job).where(Job.id == job_id, Job.status == 'failed')
+        .values(status='queued', attempts=0, run_at=datetime.now(timezone.utc), finished_at=None),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    if retried:
+        db.session.info['jobs_queued'] = True
+    db.session.commit()
+    return bool(retried)
+
+
+def job_queue_summary():
+    """Counts per kind and status, the oldest due job's wait and the latest failures, for the admin view."""
+    counts = defaultdict(lambda: dict.fromkeys(JOB_STATUSES, 0))
+    for kind, status, count in db.session.execute(
+            db.select(Job.kind, Job.status, db.func.count()).group_by(Job.kind, Job.status)):
+        counts[kind][status] = count
+    now = datetime.now(timezone.utc)
+    oldest = db.session.scalar(
+        db.select(db.func.min(Job.run_at)).where(Job.status == 'queued', Job.run_at <= now))
+    failures = db.session.execute(
+        db.select(Job.id, Job.kind, Job.status, Job.attempts, Job.max_attempts, Job.run_at, Job.last_error)
+        .where(Job.last_error.is_not(None), Job.status.in_(('queued', 'failed')))
+        .order_by(Job.id.desc()).limit(JOB_FAILURE_LIMIT)
+    ).all()
+    lag = (now - oldest.replace(tzinfo=timezone.utc)).total_seconds() if oldest else 0
+    return {'counts': dict(sorted(counts.items())), 'lag_seconds': round(lag, 1), 'failures': failures}
+
+
+def purge_jobs(older_than_days=JOB_RETENTION_DAYS, batch_size=BULK_BATCH_SIZE):
+    """Delete jobs that finished successfully before the cutoff, yielding progress per batch."""
+    started = time.monotonic()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    deleted = number = 0
+    while True:
+        ids = db.session.execute(
+            db.select(Job.id).where(Job.status == 'done', Job.finished_at < cutoff).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return
+        try:
+            db.session.execute(Job.__table__.delete().where(Job.id.in_(ids)))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        number += 1
+        deleted += len(ids)
+        yield {'batch': number, 'deleted': deleted, 'seconds': round(time.monotonic() - started, 3)}
+
+
+@app.cli.command('jobs-work')
+@click.option('--workers', default=max(JOB_WORKERS, 1), show_default=True)
+@click.option('--once', is_flag=True, help="run the jobs due now and exit")
+def jobs_work(workers, once):
+    """Run queued background jobs in this process until interrupted."""
+    if once:
+        click.echo(f"{job_pool.run_pending()} jobs run.")
+        return
+    pool = JobPool(claim_job, run_job, workers, JOB_POLL_SECONDS)
+    pool.start()
+    click.echo(f"{workers} workers running; Ctrl-C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        click.echo("Stopping after the jobs in progress...")
+        pool.stop()
+
+
+@app.cli.command('jobs-purge')
+@click.option('--older-than-days', default=JOB_RETENTION_DAYS, show_default=True)
+@click.option('--batch-size', default=BULK_BATCH_SIZE, show_default=True)
+def jobs_purge(older_than_days, batch_size):
+    """Delete jobs that finished successfully more than --older-than-days ago."""
+    deleted = 0
+    for progress in purge_jobs(older_than_days, batch_size):
+        deleted = progress['deleted']
+        click.echo(f"batch {progress['batch']}: {deleted} deleted ({progress['seconds']}s)")
+    click.echo(f"{deleted} finished jobs removed.")
+
+# ------------------ CACHES ------------------
+
+OPEN_TICKET_CACHE_TTL = 300  # seconds; bounds staleness across worker processes
+OPEN_TICKET_SEARCH_LIMIT = 20
+open_ticket_cache = TTLCache(maxsize=256, ttl=OPEN_TICKET_CACHE_TTL)
+
+
+def open_ticket_choices():
+    """Compact (id, ticket_no, title) rows for every open ticket, newest first."""
+    def load():
+        rows = db.session.query(Ticket.id, Ticket.ticket_no, Ticket.title) \
+            .filter(Ticket.status != 'Closed') \
+            .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        return [tuple(row) for row in rows]
+    return open_ticket_cache.get_or_set('all', load)
+
+
+def search_open_tickets(term, limit=OPEN_TICKET_SEARCH_LIMIT):
+    """Type-ahead over the cached open-ticket projection, matching ticket number or title."""
+    term = term.strip().lower()
+
+    def lookup():
+        matches = []
+        for choice in open_ticket_choices():
+            if term in (choice[1] or '').lower() or term in choice[2].lower():
+                matches.append(choice)
+                if len(matches) == limit:
+                    break
+        return matches
+    return open_ticket_cache.get_or_set(('search', term, limit), lookup)
+
+
+@event.listens_for(db.session, 'before_flush')
+def track_open_ticket_changes(session, flush_context, instances):
+    for obj in session.new | session.dirty | session.deleted:
+        if not isinstance(obj, Ticket):
+            continue
+        state = inspect(obj)
+        if state.pending or obj in session.deleted or \
+                state.attrs.status.history.has_changes() or state.attrs.title.history.has_changes():
+            session.info['open_tickets_changed'] = True
+            return
+
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_open_tickets(session):
+    if session.info.pop('open_tickets_changed', False):
+        open_ticket_cache.clear()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_open_ticket_changes(session):
+    session.info.pop('open_tickets_changed', None)
+
+
+class DirectoryUser(UserMixin):
+    """Read-only view of a user row, safe to share between requests."""
+
+    def __init__(self, id, username, full_name, role):
+        self.id = id
+        self.username = username
+        self.full_name = full_name
+        self.role = role
+
+    def __repr__(self):
+        return f'<DirectoryUser {self.username}>'
+
+
+USER_DIRECTORY_MAX_AGE = 300  # seconds; picks up changes made by other worker processes
+
+
+class UserDirectory:
+    """Process-wide snapshot of (id, username, full_name, role) for every user.
+
+    Backs the login loader and every user dropdown. The snapshot is rebuilt
+    lazily after a commit touches a User row, so normal page views do not
+    query the user table at all. ``version`` increases on every rebuild.
+    """
+
+    def __init__(self, max_age=USER_DIRECTORY_MAX_AGE):
+        self.max_age = max_age
+        self.version = 0
+        self._users = None
+        self._by_id = {}
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def _snapshot(self):
+        users = self._users
+        if users is not None and time.monotonic() - self._loaded_at < self.max_age:
+            return users
+        with self._lock:
+            if self._users is None or time.monotonic() - self._loaded_at >= self.max_age:
+                rows = db.session.query(User.id, User.username, User.full_name, User.role).order_by(User.id)
+                users = [DirectoryUser(*row) for row in rows]
+                self._by_id = {user.id: user for user in users}
+                self._users = users
+                self._loaded_at = time.monotonic()
+                self.version += 1
+            return self._users
+
+    def all(self):
+        return list(self._snapshot())
+
+    def get(self, user_id):
+        self._snapshot()
+        return self._by_id.get(user_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._users = None
+
+
+user_directory = UserDirectory()
+
+
+@event.listens_for(db.session, 'before_flush')
+def track_user_changes(session, flush_context, instances):
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, User):
+            session.info['users_changed'] = True
+            return
+
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_user_directory(session):
+    if session.info.pop('users_changed', False):
+        user_directory.invalidate()
+        workload_balancer.invalidate()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_user_changes(session):
+    session.info.pop('users_changed', None)
+
+
+# Rendered fragments of the dashboard, ticket and task pages. Every key
+# carries the versions of the regions it shows; a commit touching one of
+# these models bumps its region. The default disk store shares fragments and
+# versions between every process on the host through FRAGMENT_CACHE_DIR (use
+# /dev/shm for memory speed). FRAGMENT_CACHE=memory is only correct with a
+# single process: another worker's commits never reach its version counters.
+FRAGMENT_REGIONS = {Ticket: 'tickets', Task: 'tasks', User: 'users'}
+FRAGMENT_CACHE_TTL = int(os.environ.get('FRAGMENT_CACHE_TTL', 300))
+FRAGMENT_CACHE = os.environ.get('FRAGMENT_CACHE') or 'disk'
+
+if FRAGMENT_CACHE == 'disk':
+    fragment_store = DiskFragmentStore(
+        os.environ.get('FRAGMENT_CACHE_DIR', os.path.join(os.getcwd(), 'fragment_cache')), ttl=FRAGMENT_CACHE_TTL)
+elif FRAGMENT_CACHE == 'memory':
+    fragment_store = LocalFragmentStore(maxsize=int(os.environ.get('FRAGMENT_CACHE_SIZE', 512)),
+                                        ttl=FRAGMENT_CACHE_TTL)
+elif FRAGMENT_CACHE == 'off':
+    fragment_store = NullFragmentStore()
+else:
+    raise RuntimeError(f"FRAGMENT_CACHE must be disk, memory or off, not {FRAGMENT_CACHE!r}")
+fragment_cache = FragmentCache(fragment_store)
+
+
+def cached_fragment(name, regions, render, **params):
+    """Return ``render()``'s HTML for this role and ``params``, rendering only on a miss."""
+    params['role'] = current_user.role
+    return Markup(fragment_cache.get_or_render(name, regions, params, render))
+
+
+def mark_fragments_changed(session, *regions):
+    session.info.setdefault('fragment_regions', set()).update(regions)
+
+
+@event.listens_for(db.session, 'before_flush')
+def track_fragment_changes(session, flush_context, instances):
+    regions = {FRAGMENT_REGIONS[type(obj)] for obj in session.new | session.dirty | session.deleted
+               if type(obj) in FRAGMENT_REGIONS}
+    if regions:
+        mark_fragments_changed(session, *regions)
+
+
+@event.listens_for(db.session, 'after_commit')
+def bump_fragment_versions(session):
+    regions = session.info.pop('fragment_regions', None)
+    if regions:
+        fragment_cache.bump(regions)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_fragment_changes(session):
+    session.info.pop('fragment_regions', None)
+
+# ------------------ INSTRUMENTATION ------------------
+
+# Log requests slower than this many milliseconds along with their SQL; unset disables the log
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 0)) or None
+# The same statement executed this many times in one request is reported as an N+1 pattern
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))
+# /metrics answers scrapers that send "Authorization: Bearer $METRICS_TOKEN" or
+# connect from one of these addresses or networks; by default only localhost
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+METRICS_ALLOWED_IPS = [ipaddress.ip_network(value.strip(), strict=False)
+                       for value in os.environ.get('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if value.strip()]
+
+metrics = Registry()
+request_count = metrics.register(Counter(
+    'http_requests_total', 'HTTP requests handled.', ('endpoint', 'method', 'status')))
+request_duration = metrics.register(Histogram(
+    'http_request_duration_seconds', 'Wall time spent handling a request.', ('endpoint',)))
+template_duration = metrics.register(Histogram(
+    'http_template_render_seconds', 'Time spent rendering templates per request.', ('endpoint',)))
+request_queries = metrics.register(Histogram(
+    'http_request_sql_queries', 'SQL statements executed per request.', ('endpoint',), buckets=COUNT_BUCKETS))
+request_query_duration = metrics.register(Histogram(
+    'http_request_sql_duration_seconds', 'Time spent in SQL per request.', ('endpoint',)))
+query_duration = metrics.register(Histogram(
+    'sql_query_duration_seconds', 'Duration of individual SQL statements.'))
+n_plus_one_count = metrics.register(Counter(
+    'sql_n_plus_one_total', 'Requests that repeated one statement at least N_PLUS_ONE_THRESHOLD times.',
+    ('endpoint',)))
+metrics.register(Gauge('live_event_subscribers', 'Open /events streams.', lambda: len(broker)))
+metrics.register(Gauge('audit_queue_depth', 'Audit entries waiting to be written.', lambda: len(audit_writer)))
+metrics.register(Gauge('open_ticket_cache_entries', 'Entries in the open-ticket cache.',
+                       lambda: len(open_ticket_cache)))
+sla_escalations = metrics.register(Counter(
+    'sla_escalations_total', 'SLA escalation steps taken on overdue tickets.', ('step',)))
+metrics.register(Gauge('sla_pending_deadlines', 'Open tickets with an SLA deadline scheduled in this process.',
+                       lambda: len(sla_scheduler)))
+job_runs = metrics.register(Counter(
+    'jobs_total', 'Background job attempts by outcome: done, retried, failed or lost.', ('kind', 'outcome')))
+job_duration = metrics.register(Histogram(
+    'job_duration_seconds', 'Wall time of one background job attempt.', ('kind',)))
+
+
+def request_endpoint():
+    return request.url_rule.endpoint if request.url_rule else 'unmatched'
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.sql_statements = defaultdict(lambda: [0, 0.0])
+    g.template_time = 0.0
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_started'].pop()
+    query_duration.observe(elapsed)
+    if has_request_context() and 'sql_statements' in g:
+        g.sql_count += 1
+        g.sql_time += elapsed
+        stats = g.sql_statements[statement]
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+with app.app_context():
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    g.setdefault('template_started', []).append(time.perf_counter())
+
+
+@template_rendered.connect_via(app)
+def stop_template_timer(sender, template, context, **extra):
+    started = g.get('template_started')
+    if started:
+        elapsed = time.perf_counter() - started.pop()
+        # Only the outermost render counts; includes and macros are part of it
+        if not started:
+            g.template_time += elapsed
+
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_started' not in g:
+        return response
+    elapsed = time.perf_counter() - g.request_started
+    endpoint = request_endpoint()
+    request_count.inc(endpoint, request.method, response.status_code)
+    request_duration.observe(elapsed, endpoint)
+    template_duration.observe(g.template_time, endpoint)
+    request_queries.observe(g.sql_count, endpoint)
+    request_query_duration.observe(g.sql_time, endpoint)
+    response.headers['Server-Timing'] = (f'app;dur={elapsed * 1000:.1f}, db;dur={g.sql_time * 1000:.1f}, '
+                                         f'tpl;dur={g.template_time * 1000:.1f}')
+
+    repeated = [(statement, count) for statement, (count, _) in g.sql_statements.items()
+                if count >= N_PLUS_ONE_THRESHOLD]
+    if repeated:
+        n_plus_one_count.inc(endpoint)
+        for statement, count in repeated:
+            app.logger.warning("Possible N+1 on %s %s: %d executions of %s",
+                               request.method, request.path, count, ' '.join(statement.split()))
+
+    if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+        slowest = sorted(g.sql_statements.items(), key=lambda item: item[1][1], reverse=True)[:5]
+        app.logger.warning(
+            "Slow request %s %s: %.0f ms total, %.0f ms in %d queries, %.0f ms rendering\n%s",
+            request.method, request.path, elapsed * 1000, g.sql_time * 1000, g.sql_count,
+            g.template_time * 1000,
+            '\n'.join(f'  {total * 1000:.1f} ms x{count}: {" ".join(statement.split())}'
+                      for statement, (count, total) in slowest))
+    return response
+
+
+def metrics_allowed():
+    if METRICS_TOKEN is not None:
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            return True
+    if not TRUSTED_PROXIES and ('X-Forwarded-For' in request.headers or 'Forwarded' in request.headers):
+        # Relayed by a proxy nobody declared: remote_addr is the proxy, often localhost, not the client
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        return False
+    return any(address in network for network in METRICS_ALLOWED_IPS)
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    if not metrics_allowed():
+        return Response('Forbidden\n', status=403, mimetype='text/plain')
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # ------------------ ROUTES ------------------
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_directory.get(int(user_id))
 
 @app.route('/create_user', methods=['GET', 'POST'])
 def create_user():
@@ -125,7 +2190,7 @@ def list_users():
         flash("Access denied.", "danger")
         return redirect(url_for('home'))
 
-    users = User.query.all()
+    users = user_directory.all()
     return render_template('user.html', users=users)
 
 
@@ -133,10 +2198,19 @@ DEFAULT_ADMIN_USERNAME = "admin"
 @app.route('/')
 @login_required
 def home():
-    users = []
+    stats_html = users_html = None
     if current_user.role == 'admin':
-        users = User.query.all()
-    return render_template('dashboard.html', users=users,default_admin=DEFAULT_ADMIN_USERNAME)
+        # Ages and the hours chart move with the clock too; the cache TTL bounds that drift
+        stats_html = cached_fragment(
+            'dashboard_stats', ('tickets', 'tasks', 'users'),
+            lambda: render_template('dashboard_stats.html', stats=dashboard_stats()),
+            day=datetime.now(timezone.utc).date().isoformat())
+        users_html = cached_fragment(
+            'user_admin', ('users',),
+            lambda: render_template('user_admin.html', users=user_directory.all()),
+            viewer=current_user.username)
+    return render_template('dashboard.html', stats_html=stats_html, users_html=users_html,
+                           default_admin=DEFAULT_ADMIN_USERNAME)
 
 
 from flask_login import login_user
@@ -188,33 +2262,113 @@ from flask_login import current_user
 
 from flask_login import login_required, current_user
 
+def filter_visible_tasks(query, selected_user_id=None):
+    """Admins see every task (optionally one user's); everyone else sees only their own."""
+    if current_user.role == 'admin':
+        if selected_user_id:
+            query = query.filter(Task.created_by_id == selected_user_id)
+        return query
+
+    # Normal user: only see their own tasks
+    return query.filter(Task.created_by_id == current_user.id)
+
+
+TASK_SUMMARY_GROUPS = ('ticket', 'user', 'tool')
+TASK_SUMMARY_DAYS = 30
+TASK_SUMMARY_MAX_ROWS = 500
+
+
+def task_list_query(selected_user_id=None):
+    """One row per visible task with its ticket and author already joined in."""
+    return filter_visible_tasks(Task.query, selected_user_id) \
+        .outerjoin(Ticket, Task.ticket_id == Ticket.id) \
+        .outerjoin(User, Task.created_by_id == User.id) \
+        .with_entities(Task.id, Task.description, Task.time_spent, Task.tool_used, Task.created_at,
+                       Ticket.ticket_no, Ticket.title.label('ticket_title'), User.username.label('created_by'))
+
+
 @app.route('/tasks/')
 @app.route('/tasks', methods=['GET', 'POST'])
 @login_required
 def tasks():
-    selected_user_id = request.args.get('user_id')
+    selected_user_id = request.args.get('user_id', type=int)
+    sort = request.args.get('sort', default='newest')
+    if sort not in TICKET_SORTS:
+        sort = 'newest'
+    page_size = request.args.get('page_size', default=TICKET_PAGE_SIZE, type=int)
+    page_size = max(1, min(page_size, TICKET_MAX_PAGE_SIZE))
+    cursor = request.args.get('after')
+
+    def render_table():
+        tasks, next_cursor = keyset_page(
+            task_list_query(selected_user_id), Task.created_at, Task.id,
+            cursor=cursor, page_size=page_size, sort=sort
+        )
+        return render_template('task_table.html', tasks=tasks, selected_user_id=selected_user_id,
+                               sort=sort, page_size=page_size, cursor=cursor, next_cursor=next_cursor)
 
-    if current_user.role == 'admin':
-        users = User.query.all()
+    table_html = cached_fragment(
+        'task_table', ('tasks', 'tickets', 'users'), render_table,
+        viewer=None if current_user.role == 'admin' else current_user.id,
+        user_id=selected_user_id, sort=sort, page_size=page_size, after=cursor
+    )
+    users = user_directory.all() if current_user.role == 'admin' else None
 
-        if selected_user_id:
-            tasks = Task.query.filter_by(created_by_id=selected_user_id).all()
-        else:
-            tasks = Task.query.all()
+    return render_template('tasks.html', table_html=table_html, users=users, selected_user_id=selected_user_id,
+                           sort=sort, page_size=page_size)
 
-        return render_template('tasks.html', tasks=tasks, users=users, selected_user_id=selected_user_id)
-    
+
+def parse_day(value, default):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d') if value else default
+    except ValueError:
+        return default
+
+
+@app.route('/tasks/summary')
+@login_required
+def task_summary():
+    """Task count, total and average time spent per ticket, user or tool over a date range.
+
+    Grouping and arithmetic happen in one GROUP BY query; only the top groups
+    by total time come back to Python.
+    """
+    selected_user_id = request.args.get('user_id', type=int)
+    group = request.args.get('group', default='ticket')
+    if group not in TASK_SUMMARY_GROUPS:
+        group = 'ticket'
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    end = parse_day(request.args.get('end'), today)
+    start = parse_day(request.args.get('start'), end - timedelta(days=TASK_SUMMARY_DAYS - 1))
+    limit = max(1, min(request.args.get('limit', default=50, type=int), TASK_SUMMARY_MAX_ROWS))
+
+    in_range = filter_visible_tasks(Task.query, selected_user_id) \
+        .filter(Task.created_at >= start, Task.created_at < end + timedelta(days=1))
+    measures = (db.func.count(Task.id).label('task_count'),
+                db.func.coalesce(db.func.sum(Task.time_spent), 0).label('total_time'),
+                db.func.avg(Task.time_spent).label('average_time'))
+
+    if group == 'ticket':
+        columns = (Ticket.id, Ticket.ticket_no, Ticket.title)
+        query = in_range.join(Ticket, Task.ticket_id == Ticket.id)
+    elif group == 'user':
+        columns = (User.id, User.username, User.full_name)
+        query = in_range.outerjoin(User, Task.created_by_id == User.id)
     else:
-        # Normal user: only see their own tasks
-        tasks = Task.query.filter_by(created_by_id=current_user.id).all()
-        return render_template('tasks.html', tasks=tasks, users=None)
+        columns = (db.func.coalesce(Task.tool_used, '').label('tool_used'),)
+        query = in_range
+    rows = query.with_entities(*columns, *measures).group_by(*columns) \
+        .order_by(db.desc('total_time'), *columns).limit(limit).all()
+    totals = in_range.with_entities(*measures).one()
+
+    users = user_directory.all() if current_user.role == 'admin' else None
+    return render_template('task_summary.html', rows=rows, totals=totals, group=group, users=users,
+                           selected_user_id=selected_user_id, start=start, end=end, limit=limit)
 
 # Add login_required to ensure only logged-in users can access this
 @app.route('/tasks/create', methods=['GET', 'POST'])
 @login_required
 def create_task():
-    open_tickets = Ticket.query.filter(Ticket.status != 'Closed').all()
-
     if request.method == 'POST':
         description = request.form['description']
         ticket_id = request.form['ticket_id']
@@ -230,7 +2384,7 @@ def create_task():
 
         except ValueError:
             flash("Please enter a valid number for time spent.", "danger")
-            return render_template('create_task.html', tickets=open_tickets)
+            return render_template('create_task.html')
         #  Include created_by_id from current_user.id
         task = Task(
             description=description,
@@ -244,13 +2398,12 @@ def create_task():
         db.session.commit()
         return redirect(url_for('tasks'))
 
-    return render_template('create_task.html', tickets=open_tickets)
+    return render_template('create_task.html')
 
 @app.route('/tasks/<int:task_id>', methods=['GET', 'POST'])
 @login_required
 def view_task(task_id):
     task = Task.query.get_or_404(task_id)
-    tickets = Ticket.query.filter(Ticket.status != 'Closed').all()
 
     if request.method == 'POST':
         task.description = request.form['description']
@@ -261,14 +2414,33 @@ def view_task(task_id):
         flash("Task updated successfully", "success")
         return redirect(url_for('tasks'))
 
-    return render_template('view_task.html', task=task, tickets=tickets)
+    return render_template('view_task.html', task=task)
+
+@app.route('/tickets/open')
+@login_required
+def open_tickets_lookup():
+    term = request.args.get('q', default='')
+    limit = min(request.args.get('limit', default=OPEN_TICKET_SEARCH_LIMIT, type=int), 100)
+    matches = search_open_tickets(term, limit=max(limit, 1))
+    return jsonify([
+        {'id': ticket_id, 'ticket_no': ticket_no, 'title': title}
+        for ticket_id, ticket_no, title in matches
+    ])
 
-import random
-import string
 
-def generate_ticket_number():
-    random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    return f"SR{random_part}"
+@app.route('/tickets/duplicates')
+@login_required
+def duplicate_suggestions():
+    """Open tickets that read like a draft's ?title=&description=, for the new-ticket form."""
+    limit = min(request.args.get('limit', default=DUPLICATE_LIMIT, type=int), 20)
+    matches = similar_open_tickets(request.args.get('title', default=''),
+                                   request.args.get('description', default=''), limit=max(limit, 1))
+    return jsonify([
+        {'id': ticket_id, 'ticket_no': ticket_no, 'title': title, 'status': status,
+         'similarity': round(score, 2), 'url': url_for('ticket_detail', ticket_id=ticket_id)}
+        for ticket_id, ticket_no, title, status, score in matches
+    ])
+
 
 
 
@@ -277,18 +2449,54 @@ from flask import redirect, url_for, flash
 
 
 
-@app.route('/tickets')
-def list_tickets():
-    if not current_user.is_authenticated:
-        flash('Please log in to view tickets.', 'danger')
-        return redirect(url_for('login'))
+TICKET_PAGE_SIZE = 50
+TICKET_MAX_PAGE_SIZE = 200
+TICKET_SORTS = ('newest', 'oldest')
 
-    selected_user_id = request.args.get('user', type=int)
-    selected_status = request.args.get('status', default='open')
-   
 
-    query = Ticket.query
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(query, created_col, id_col, cursor=None, page_size=TICKET_PAGE_SIZE, sort='newest'):
+    """Return one page of ``query`` ordered on (created_at, id) plus the cursor for the next page.
+
+    Seeking past the last row of the previous page keeps every page an index
+    range scan, so the cost does not grow with how deep the user has paged.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    key = tuple_(created_col, id_col)
+
+    if sort == 'oldest':
+        if position:
+            query = query.filter(key > position)
+        query = query.order_by(created_col.asc(), id_col.asc())
+    else:
+        if position:
+            query = query.filter(key < position)
+        query = query.order_by(created_col.desc(), id_col.desc())
+
+    rows = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+    return rows, next_cursor
+
 
+def filter_visible_tickets(query, selected_user_id=None, selected_status='open'):
+    """Apply the role-based visibility and status filters shared by every ticket listing."""
     # Role-based ticket visibility
     if current_user.role == 'admin':
         if selected_user_id:
@@ -305,43 +2513,249 @@ def list_tickets():
     elif selected_status == 'closed':
         query = query.filter(Ticket.status == 'Closed')
     # else 'all' – no additional filter
+    return query
+
+
+@app.route('/tickets')
+def list_tickets():
+    if not current_user.is_authenticated:
+        flash('Please log in to view tickets.', 'danger')
+        return redirect(url_for('login'))
+
+    selected_user_id = request.args.get('user', type=int)
+    selected_status = request.args.get('status', default='open')
+    sort = request.args.get('sort', default='newest')
+    if sort not in TICKET_SORTS:
+        sort = 'newest'
+    page_size = request.args.get('page_size', default=TICKET_PAGE_SIZE, type=int)
+    page_size = max(1, min(page_size, TICKET_MAX_PAGE_SIZE))
+    cursor = request.args.get('after')
+
+    def render_table():
+        # Load the assignee in the same round trip instead of one SELECT per row
+        query = Ticket.query.options(joinedload(Ticket.assigned_user))
+        query = filter_visible_tickets(query, selected_user_id, selected_status)
+
+        tickets, next_cursor = keyset_page(
+            query, Ticket.created_at, Ticket.id,
+            cursor=cursor, page_size=page_size, sort=sort
+        )
+        return render_template(
+            'ticket_table.html',
+            tickets=tickets,
+            selected_user_id=selected_user_id,
+            selected_status=selected_status,
+            sort=sort,
+            page_size=page_size,
+            cursor=cursor,
+            next_cursor=next_cursor
+        )
 
-    tickets = query.all()
-    users = User.query.all() if current_user.role == 'admin' else []
+    table_html = cached_fragment(
+        'ticket_table', ('tickets', 'users'), render_table,
+        viewer=None if current_user.role == 'admin' else current_user.id,
+        user=selected_user_id, status=selected_status, sort=sort, page_size=page_size, after=cursor
+    )
+    users = user_directory.all() if current_user.role == 'admin' else []
 
     return render_template(
         'tickets.html',
-        tickets=tickets,
+        table_html=table_html,
         users=users,
         selected_user_id=selected_user_id,
         current_user_role=current_user.role,
-        selected_status=selected_status
+        selected_status=selected_status,
+        sort=sort,
+        page_size=page_size
+    )
+
+
+SEARCH_PAGE_SIZE = 20
+
+
+@app.route('/tickets/search')
+@login_required
+def search_tickets():
+    term = request.args.get('q', default='').strip()
+    selected_user_id = request.args.get('user', type=int)
+    selected_status = request.args.get('status', default='all')
+    page = max(request.args.get('page', default=1, type=int), 1)
+
+    tickets, has_more = [], False
+    match = search.match_expression(term)
+    if match:
+        query = Ticket.query.options(joinedload(Ticket.assigned_user))
+        if db.engine.dialect.name == 'sqlite':
+            hits = text(search.SEARCH_HITS_SQL).bindparams(match=match) \
+                .columns(ticket_id=db.Integer, score=db.Float).subquery('hits')
+            query = query.join(hits, hits.c.ticket_id == Ticket.id) \
+                .order_by(hits.c.score, Ticket.id.desc())
+        else:
+            # No FTS5 outside SQLite; fall back to a plain substring match
+            pattern = f'%{term}%'
+            query = query.filter(or_(Ticket.title.ilike(pattern), Ticket.description.ilike(pattern))) \
+                .order_by(Ticket.created_at.desc(), Ticket.id.desc())
+        query = filter_visible_tickets(query, selected_user_id, selected_status)
+
+        rows = query.offset((page - 1) * SEARCH_PAGE_SIZE).limit(SEARCH_PAGE_SIZE + 1).all()
+        has_more = len(rows) > SEARCH_PAGE_SIZE
+        tickets = rows[:SEARCH_PAGE_SIZE]
+
+    return render_template(
+        'ticket_search.html',
+        tickets=tickets,
+        term=term,
+        selected_user_id=selected_user_id,
+        selected_status=selected_status,
+        page=page,
+        has_more=has_more
     )
 
 
+def filter_visible_archive(query):
+    """The same role rule as filter_visible_tickets(), on the archive's copies of the columns."""
+    if current_user.role == 'admin':
+        return query
+    return query.filter((ArchivedTicket.requested_by == str(current_user.id)) |
+                        (ArchivedTicket.assigned_to == current_user.id))
+
+
+@app.route('/tickets/archive')
+@login_required
+def archived_tickets():
+    term = request.args.get('q', default='').strip()
+    tickets = []
+    if term:
+        query = filter_visible_archive(ArchivedTicket.query).filter(or_(
+            ArchivedTicket.ticket_no.startswith(term.upper(), autoescape=True),
+            ArchivedTicket.title.contains(term, autoescape=True),
+        ))
+        tickets = query.with_entities(ArchivedTicket.ticket_no, ArchivedTicket.title, ArchivedTicket.status,
+                                      ArchivedTicket.assigned_to, ArchivedTicket.closed_at,
+                                      ArchivedTicket.archived_at) \
+            .order_by(ArchivedTicket.closed_at.desc()).limit(ARCHIVE_SEARCH_LIMIT).all()
+    users = {user.id: user for user in user_directory.all()}
+    return render_template('ticket_archive.html', term=term, tickets=tickets, users=users,
+                           limit=ARCHIVE_SEARCH_LIMIT)
+
+
+@app.route('/tickets/archive/<ticket_no>')
+@login_required
+def archived_ticket(ticket_no):
+    archived = filter_visible_archive(ArchivedTicket.query).filter(ArchivedTicket.ticket_no == ticket_no) \
+        .first_or_404()
+    record = unpack_archive(archived.payload)
+    record['comments'].sort(key=lambda comment: comment['timestamp'] or datetime.min, reverse=True)
+    users = {user.id: user for user in user_directory.all()}
+    return render_template('archived_ticket.html', archived=archived, record=record, users=users)
+
+
+@app.route('/tickets/archive/<ticket_no>/restore', methods=['POST'])
+@login_required
+def restore_ticket(ticket_no):
+    if current_user.role != 'admin':
+        flash("Unauthorized access.", "danger")
+        return redirect(url_for('archived_tickets'))
+    ticket_id = restore_archived_ticket(ticket_no, actor=current_user.username)
+    if ticket_id is None:
+        flash(f"{ticket_no} is not in the archive.", "warning")
+        return redirect(url_for('archived_tickets'))
+    flash(f"{ticket_no} restored.", "success")
+    return redirect(url_for('ticket_detail', ticket_id=ticket_id))
+
+
+EXPORT_FETCH_SIZE = 1000
+
+
+def export_response(name, columns, query):
+    fmt = request.args.get('format', default='csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"Unsupported format '{fmt}'."}), 400
+
+    rows = query.yield_per(EXPORT_FETCH_SIZE)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+    return Response(
+        stream_with_context(stream_rows(columns, rows, fmt)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename={name}-{stamp}.{fmt}'}
+    )
+
+
+TICKET_EXPORT_COLUMNS = ('id', 'ticket_no', 'title', 'description', 'status', 'severity',
+                         'assigned_to', 'assigned_username', 'requested_by', 'created_at')
+
+
+@app.route('/tickets/export')
+@login_required
+def export_tickets():
+    selected_user_id = request.args.get('user', type=int)
+    selected_status = request.args.get('status', default='open')
+
+    query = filter_visible_tickets(Ticket.query, selected_user_id, selected_status) \
+        .outerjoin(User, Ticket.assigned_to == User.id) \
+        .with_entities(Ticket.id, Ticket.ticket_no, Ticket.title, Ticket.description, Ticket.status,
+                       Ticket.severity, Ticket.assigned_to, User.username, Ticket.requested_by,
+                       Ticket.created_at) \
+        .order_by(Ticket.id)
+    return export_response('tickets', TICKET_EXPORT_COLUMNS, query)
+
+
+COMMENT_EXPORT_COLUMNS = ('id', 'ticket_id', 'ticket_no', 'author', 'content', 'timestamp')
+
+
+@app.route('/tickets/comments/export')
+@login_required
+def export_comments():
+    selected_user_id = request.args.get('user', type=int)
+    selected_status = request.args.get('status', default='all')
+
+    visible = filter_visible_tickets(Ticket.query, selected_user_id, selected_status) \
+        .with_entities(Ticket.id)
+    query = db.session.query(Comment.id, Comment.ticket_id, Ticket.ticket_no, Comment.author,
+                             Comment.content, Comment.timestamp) \
+        .join(Ticket, Comment.ticket_id == Ticket.id) \
+        .filter(Comment.ticket_id.in_(visible)) \
+        .order_by(Comment.id)
+    return export_response('comments', COMMENT_EXPORT_COLUMNS, query)
+
+
+TASK_EXPORT_COLUMNS = ('id', 'ticket_id', 'ticket_no', 'description', 'time_spent', 'tool_used',
+                       'created_by_id', 'created_by', 'created_at')
+
+
+@app.route('/tasks/export')
+@login_required
+def export_tasks():
+    selected_user_id = request.args.get('user_id')
+
+    query = filter_visible_tasks(Task.query, selected_user_id) \
+        .outerjoin(Ticket, Task.ticket_id == Ticket.id) \
+        .outerjoin(User, Task.created_by_id == User.id) \
+        .with_entities(Task.id, Task.ticket_id, Ticket.ticket_no, Task.description, Task.time_spent,
+                       Task.tool_used, Task.created_by_id, User.username, Task.created_at) \
+        .order_by(Task.id)
+    return export_response('tasks', TASK_EXPORT_COLUMNS, query)
+
+
 import os
 from flask import request, redirect, render_template, url_for, flash
 from werkzeug.utils import secure_filename
 
 @app.route('/create_ticket', methods=['GET', 'POST'])
 def create_ticket():
-    users = User.query.all()
+    users = user_directory.all()
     if request.method == 'POST':
         title = request.form['title']
         description = request.form['description']
         status = request.form.get('status', 'New')
         severity = request.form.get('severity')
         assigned_to = request.form.get('assigned_to')
-        assigned_to = int(assigned_to) if assigned_to else None 
+        if assigned_to == AUTO_ASSIGN:
+            assigned_to = auto_assignee()
+        else:
+            assigned_to = int(assigned_to) if assigned_to else None
         requested_by = current_user.username # or however you're tracking login
         created_at = datetime.now(timezone.utc) 
-        ticket_no = request.form['ticket_no'] 
-
-        file = request.files['attachment']
-        filename = None
-        if file and file.filename != '':
-            filename = secure_filename(file.filename)
-            file.save(os.path.join('uploads', filename))  # Ensure uploads/ folder exists
 
         ticket = Ticket(
             title=title,
@@ -350,18 +2764,18 @@ def create_ticket():
             severity=severity,
             assigned_to=assigned_to,
             requested_by=requested_by,
-            created_at=created_at,
-            ticket_no=ticket_no,
-            attachment=filename
+            created_at=created_at
         )
-
         db.session.add(ticket)
+        files = [file for file in request.files.getlist('attachment') if file and file.filename != '']
+        if files:
+            db.session.flush()  # the jobs need the ticket id
+            for file in files:
+                queue_attachment(ticket.id, file)
         db.session.commit()
         return redirect(url_for('list_tickets'))
     
-    users = User.query.all()
-    ticket_no = generate_ticket_number() 
-    return render_template('create_ticket.html', users=users,ticket_no=ticket_no)
+    return render_template('create_ticket.html', users=users, auto_assign=AUTO_ASSIGN_DEFAULT)
 
 
 @app.route('/update_ticket/<int:id>', methods=['POST'])
@@ -372,26 +2786,268 @@ def update_ticket(id):
     db.session.commit()
     return redirect('/tickets')
 
+@app.route('/tickets/bulk', methods=['POST'])
+@login_required
+def bulk_update():
+    """Mass status change / reassignment.
+
+    Body: {"ids": [...]} or {"filter": {...}}, plus {"set": {"status": ..., "assigned_to": ...}}.
+    Streams one NDJSON progress line per committed batch.
+    """
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized access.'}), 403
+
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Body must be a JSON object.'}), 400
+    # Everything is checked here: once the stream starts, an error can only truncate it
+    try:
+        changes = parse_bulk_changes(payload.get('set'))
+        ids = payload.get('ids')
+        if ids is not None:
+            ids = parse_bulk_ids(ids)
+            conditions = None
+        else:
+            conditions = bulk_ticket_filter(payload.get('filter') or {})
+        batch_size = payload.get('batch_size', BULK_BATCH_SIZE)
+        if isinstance(batch_size, bool) or not isinstance(batch_size, (int, str)) or not str(batch_size).isdigit():
+            raise BulkRequestError("'batch_size' must be a positive whole number.")
+        batch_size = max(1, min(int(batch_size), 5000))
+    except (BulkRequestError, TypeError, ValueError) as exc:
+        return jsonify({'error': str(exc)}), 400
+    progress = bulk_update_tickets(changes, ids=ids, conditions=conditions,
+                                   actor=current_user.username, batch_size=batch_size)
+
+    def generate():
+        last = {'batch': 0, 'matched': 0, 'updated': 0, 'seconds': 0}
+        for last in progress:
+            yield json.dumps(last) + '\n'
+        yield json.dumps(dict(last, done=True)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/tickets/rebalance', methods=['POST'])
+@login_required
+def rebalance():
+    """Even out open-ticket load by moving New tickets from the busiest to the least-loaded users.
+
+    Body: {"max_moves": N, "include_unassigned": bool, "dry_run": bool}. A dry run
+    returns the plan; otherwise one NDJSON progress line per receiving user.
+    """
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Unauthorized access.'}), 403
+
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Body must be a JSON object.'}), 400
+    max_moves = payload.get('max_moves')
+    if max_moves is not None:
+        if isinstance(max_moves, bool) or not isinstance(max_moves, (int, str)) or not str(max_moves).isdigit():
+            return jsonify({'error': "'max_moves' must be a whole number of at least 0."}), 400
+        max_moves = int(max_moves)
+    moves = plan_ticket_rebalance(max_moves, bool(payload.get('include_unassigned')))
+    if payload.get('dry_run'):
+        return jsonify({'moves': [{'ticket_id': ticket_id, 'from': donor, 'to': receiver}
+                                  for ticket_id, donor, receiver in moves]})
+    progress = rebalance_tickets(moves, actor=current_user.username)
+
+    def generate():
+        last = {'users': 0, 'moved': 0, 'seconds': 0}
+        for last in progress:
+            yield json.dumps(last) + '\n'
+        yield json.dumps(dict(last, done=True)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/jobs')
+@login_required
+def job_queue():
+    """Queue depth per job kind and the latest failures, for admins."""
+    if current_user.role != 'admin':
+        flash("Access denied.", "danger")
+        return redirect(url_for('home'))
+    return render_template('jobs.html', summary=job_queue_summary(), statuses=JOB_STATUSES,
+                           workers=JOB_WORKERS if job_pool.started else 0)
+
+
+@app.route('/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+def retry_failed_job(job_id):
+    if current_user.role != 'admin':
+        flash("Unauthorized access.", "danger")
+        return redirect(url_for('home'))
+    if retry_job(job_id):
+        flash(f"Job {job_id} queued again.", "success")
+    else:
+        flash(f"Job {job_id} has not failed.", "warning")
+    return redirect(url_for('job_queue'))
+
+
+@app.cli.command('tickets-bulk-update')
+@click.option('--where-status', default='all', help="open, closed, all or an exact status")
+@click.option('--where-assigned-to', type=int, help="only tickets assigned to this user id")
+@click.option('--set-status', type=click.Choice(TICKET_STATUSES))
+@click.option('--set-assigned-to', help="user id, or 'none' to unassign")
+@click.option('--batch-size', default=BULK_BATCH_SIZE, show_default=True)
+def tickets_bulk_update(where_status, where_assigned_to, set_status, set_assigned_to, batch_size):
+    """Change status or assignee for every ticket matching the filter."""
+    changes = {}
+    if set_status:
+        changes['status'] = set_status
+    if set_assigned_to:
+        changes['assigned_to'] = None if set_assigned_to.lower() == 'none' else int(set_assigned_to)
+    spec = {'status': where_status}
+    if where_assigned_to is not None:
+        spec['assigned_to'] = where_assigned_to
+    try:
+        changes = parse_bulk_changes(changes)
+        conditions = bulk_ticket_filter(spec)
+    except BulkRequestError as exc:
+        raise click.UsageError(str(exc))
+
+    for progress in bulk_update_tickets(changes, conditions=conditions, batch_size=batch_size):
+        click.echo(f"batch {progress['batch']}: {progress['updated']}/{progress['matched']} updated "
+                   f"({progress['seconds']}s)")
+
 @app.route('/ticket/<int:ticket_id>', methods=['GET', 'POST'])
 def ticket_detail(ticket_id):
     ticket = Ticket.query.get_or_404(ticket_id)
-    users = User.query.all()
+    users = user_directory.all()
 
     if request.method == 'POST':
         ticket.status = request.form['status']
         ticket.description = request.form['description']
         assigned_user_id = request.form.get('assigned_to')
-        ticket.assigned_to = assigned_user_id
+        ticket.assigned_to = int(assigned_user_id) if assigned_user_id else None
         db.session.commit()
         flash("Ticket updated successfully!", "success")
         return redirect(url_for('list_tickets'))
 
-    return render_template('ticket_detail.html', ticket=ticket, users=users)
+    return render_ticket_detail(ticket, users)
+
+
+def render_ticket_detail(ticket, users):
+    comments, next_cursor = comment_page(ticket.id, request.args.get('comments_after'))
+    return render_template('ticket_detail.html', ticket=ticket, users=users, comments=comments,
+                           comments_cursor=request.args.get('comments_after'), next_comments_cursor=next_cursor)
+
+
+@app.route('/ticket/<int:ticket_id>/comments')
+@login_required
+def ticket_comments(ticket_id):
+    """An older page of the thread as an HTML fragment, for the "Load older comments" button."""
+    ticket = Ticket.query.get_or_404(ticket_id)
+    comments, next_cursor = comment_page(ticket.id, request.args.get('after'))
+    return render_template('comment_page.html', ticket=ticket, comments=comments, next_cursor=next_cursor)
+
+def visible_attachment_or_404(attachment_id):
+    """The attachment, if it belongs to a ticket the current user may see in the ticket list."""
+    query = Attachment.query.join(Attachment.ticket).filter(Attachment.id == attachment_id)
+    return filter_visible_tickets(query, selected_status='all').first_or_404()
+
+
+@app.route('/ticket/<int:ticket_id>/attachments', methods=['POST'])
+@login_required
+def upload_attachments(ticket_id):
+    ticket = filter_visible_tickets(Ticket.query.filter(Ticket.id == ticket_id), selected_status='all').first_or_404()
+    files = [file for file in request.files.getlist('attachment') if file and file.filename != '']
+    for file in files:
+        queue_attachment(ticket.id, file)
+    db.session.commit()
+    if files:
+        flash(f'{len(files)} attachment(s) uploaded; they are listed here once stored.', 'success')
+    return redirect(url_for('ticket_detail', ticket_id=ticket.id))
+
+
+@app.route('/attachments/<int:attachment_id>')
+@login_required
+def download_attachment(attachment_id):
+    attachment = visible_attachment_or_404(attachment_id)
+    # Blobs never change once written, so the digest is a strong ETag and
+    # conditional=True answers If-None-Match and Range requests for us.
+    return send_file(
+        blob_store.path_for(attachment.blob_sha256),
+        mimetype=attachment.content_type,
+        as_attachment=True,
+        download_name=attachment.filename,
+        conditional=True,
+        etag=attachment.blob_sha256,
+        max_age=86400
+    )
+
+
+@app.route('/attachments/<int:attachment_id>/delete', methods=['POST'])
+@login_required
+def delete_attachment(attachment_id):
+    attachment = visible_attachment_or_404(attachment_id)
+    ticket_id = attachment.ticket_id
+    if current_user.role != 'admin' and attachment.uploaded_by != current_user.username:
+        flash('Only the uploader or an admin can remove an attachment.', 'danger')
+        return redirect(url_for('ticket_detail', ticket_id=ticket_id))
+    db.session.delete(attachment)
+    db.session.commit()
+    flash(f'Attachment {attachment.filename} removed.', 'success')
+    return redirect(url_for('ticket_detail', ticket_id=ticket_id))
+
+
+LIVE_HEARTBEAT_SECONDS = 15
+
+
+@app.route('/events')
+@login_required
+def live_events():
+    """Server-sent events for ticket and comment changes.
+
+    ``?ticket=<id>`` follows one ticket and ``?assignee=<user id>`` follows one
+    person's queue. Non-admin users only ever receive their own assignments.
+    """
+    ticket_id = request.args.get('ticket', type=int)
+    assignee_id = request.args.get('assignee', type=int)
+    if current_user.role != 'admin':
+        assignee_id = current_user.id
+    subscription = broker.subscribe(ticket_id=ticket_id, assignee_id=assignee_id)
+
+    def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                event_data = subscription.get(timeout=LIVE_HEARTBEAT_SECONDS)
+                if event_data is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"id: {event_data['id']}\nevent: {event_data['type']}\ndata: {json.dumps(event_data)}\n\n"
+        finally:
+            subscription.close()
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+HISTORY_PAGE_SIZE = 50
+
+
+@app.route('/ticket/<int:ticket_id>/history')
+@login_required
+def ticket_history(ticket_id):
+    ticket = Ticket.query.get_or_404(ticket_id)
+    cursor = request.args.get('after')
+
+    # Served by ix_ticket_change_log_ticket_changed
+    query = TicketChangeLog.query.filter(TicketChangeLog.ticket_id == ticket.id)
+    entries, next_cursor = keyset_page(
+        query, TicketChangeLog.changed_at, TicketChangeLog.id,
+        cursor=cursor, page_size=HISTORY_PAGE_SIZE
+    )
+    return render_template('ticket_history.html', ticket=ticket, entries=entries,
+                           cursor=cursor, next_cursor=next_cursor)
 
 @app.route('/edit_ticket/<int:ticket_id>', methods=['GET', 'POST'])
 def edit_ticket(ticket_id):
     ticket = Ticket.query.get_or_404(ticket_id)
-    users = User.query.all()
+    users = user_directory.all()
 
     if request.method == 'POST':
         if 'new_comment' in request.form:
@@ -417,10 +3073,393 @@ def edit_ticket(ticket_id):
 
         return redirect(url_for('ticket_detail', ticket_id=ticket.id))
 
-    return render_template('ticket_detail.html', ticket=ticket, users=users)
+    return render_ticket_detail(ticket, users)
+
+
+
+
+# ------------------ JSON API ------------------
+
+api_v1 = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+
+def api_iso(value):
+    return value.isoformat() if value else None
+
+
+TICKET_FIELDS = {
+    'id': lambda t: t.id,
+    'ticket_no': lambda t: t.ticket_no,
+    'title': lambda t: t.title,
+    'description': lambda t: t.description,
+    'status': lambda t: t.status,
+    'severity': lambda t: t.severity,
+    'assigned_to': lambda t: t.assigned_to,
+    'requested_by': lambda t: t.requested_by,
+    'created_at': lambda t: api_iso(t.created_at),
+    'comment_count': lambda t: t.comment_count,
+    'sla_due_at': lambda t: api_iso(t.sla_due_at),
+    'sla_level': lambda t: t.sla_level,
+    'version': lambda t: t.version,
+}
+TASK_FIELDS = {
+    'id': lambda t: t.id,
+    'ticket_id': lambda t: t.ticket_id,
+    'description': lambda t: t.description,
+    'time_spent': lambda t: t.time_spent,
+    'tool_used': lambda t: t.tool_used,
+    'created_by_id': lambda t: t.created_by_id,
+    'created_at': lambda t: api_iso(t.created_at),
+    'version': lambda t: t.version,
+}
+COMMENT_FIELDS = {
+    'id': lambda c: c.id,
+    'ticket_id': lambda c: c.ticket_id,
+    'author': lambda c: c.author,
+    'content': lambda c: c.content,
+    'timestamp': lambda c: api_iso(c.timestamp),
+    'version': lambda c: c.version,
+}
+USER_FIELDS = {
+    'id': lambda u: u.id,
+    'username': lambda u: u.username,
+    'full_name': lambda u: u.full_name,
+    'role': lambda u: u.role,
+}
+
 
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
 
 
+@api_v1.errorhandler(ApiError)
+def handle_api_error(error):
+    return jsonify({'error': str(error)}), error.status
+
+
+def api_login_required(view):
+    # Flask-Login would redirect to the login form; API clients want a status code
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({'error': 'Authentication required.'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def requested_fields(available):
+    """Sparse fieldsets: ?fields=id,title limits each object to those keys."""
+    fields = request.args.get('fields')
+    if not fields:
+        return list(available)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}.")
+    return names
+
+
+def serialize(obj, available, fields):
+    return {name: available[name](obj) for name in fields}
+
+
+def api_page_size():
+    size = request.args.get('page_size', default=API_PAGE_SIZE, type=int)
+    return max(1, min(size, API_MAX_PAGE_SIZE))
+
+
+def weak_etag(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def conditional_json(etag, build_payload):
+    """Answer 304 when the client already has ``etag``; otherwise build and send the payload."""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build_payload())
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def paged_response(query, created_col, available, link_endpoint, **link_args):
+    fields = requested_fields(available)
+    cursor = request.args.get('after')
+    rows, next_cursor = keyset_page(query, created_col, query.column_descriptions[0]['entity'].id,
+                                    cursor=cursor, page_size=api_page_size(),
+                                    sort=request.args.get('sort', 'newest'))
+    # The page's ids and row versions identify its content without serializing it
+    etag = weak_etag(','.join(fields), next_cursor, *(f'{row.id}:{row.version}' for row in rows))
+
+    def build():
+        payload = {'data': [serialize(row, available, fields) for row in rows], 'next_cursor': next_cursor}
+        if next_cursor:
+            payload['next'] = url_for(link_endpoint, **dict(request.args, after=next_cursor, **link_args))
+        return payload
+    return conditional_json(etag, build)
+
+
+def visible_ticket_or_404(ticket_id):
+    ticket = filter_visible_tickets(Ticket.query.filter(Ticket.id == ticket_id), selected_status='all').first()
+    if ticket is None:
+        raise ApiError('Ticket not found.', 404)
+    return ticket
+
+
+@api_v1.route('/tickets')
+@api_login_required
+def api_tickets():
+    query = filter_visible_tickets(Ticket.query, request.args.get('user', type=int),
+                                   request.args.get('status', default='open'))
+    return paged_response(query, Ticket.created_at, TICKET_FIELDS, 'api_v1.api_tickets')
+
+
+@api_v1.route('/tickets/<int:ticket_id>')
+@api_login_required
+def api_ticket(ticket_id):
+    # Check the version alone first so an unchanged ticket costs one narrow lookup
+    version = filter_visible_tickets(Ticket.query.filter(Ticket.id == ticket_id), selected_status='all') \
+        .with_entities(Ticket.version).scalar()
+    if version is None:
+        raise ApiError('Ticket not found.', 404)
+    fields = requested_fields(TICKET_FIELDS)
+    etag = weak_etag('ticket', ticket_id, version, ','.join(fields))
+    return conditional_json(etag, lambda: serialize(db.session.get(Ticket, ticket_id), TICKET_FIELDS, fields))
+
+
+@api_v1.route('/tickets/<int:ticket_id>/comments', methods=['GET', 'POST'])
+@api_login_required
+def api_ticket_comments(ticket_id):
+    ticket = visible_ticket_or_404(ticket_id)
+    if request.method == 'POST':
+        payload = request.get_json(silent=True) or {}
+        if not isinstance(payload, dict):
+            raise ApiError('Body must be a JSON object.')
+        content = payload.get('content')
+        if content is not None and not isinstance(content, str):
+            raise ApiError("'content' must be a string.")
+        content = (content or '').strip()
+        if not content:
+            raise ApiError("'content' is required.")
+        comment = Comment(content=content, ticket_id=ticket.id, author=current_user.username)
+        db.session.add(comment)
+        db.session.commit()
+        response = jsonify(serialize(comment, COMMENT_FIELDS, list(COMMENT_FIELDS)))
+        response.status_code = 201
+        return response
+
+    query = Comment.query.filter(Comment.ticket_id == ticket.id)
+    return paged_response(query, Comment.timestamp, COMMENT_FIELDS, 'api_v1.api_ticket_comments', ticket_id=ticket.id)
+
+
+@api_v1.route('/tasks')
+@api_login_required
+def api_tasks():
+    query = filter_visible_tasks(Task.query, request.args.get('user_id', type=int))
+    if request.args.get('ticket_id', type=int):
+        query = query.filter(Task.ticket_id == request.args.get('ticket_id', type=int))
+    return paged_response(query, Task.created_at, TASK_FIELDS, 'api_v1.api_tasks')
+
+
+@api_v1.route('/tasks/<int:task_id>')
+@api_login_required
+def api_task(task_id):
+    task = filter_visible_tasks(Task.query.filter(Task.id == task_id)).first()
+    if task is None:
+        raise ApiError('Task not found.', 404)
+    fields = requested_fields(TASK_FIELDS)
+    etag = weak_etag('task', task.id, task.version, ','.join(fields))
+    return conditional_json(etag, lambda: serialize(task, TASK_FIELDS, fields))
+
+
+@api_v1.route('/users')
+@api_login_required
+def api_users():
+    users = user_directory.all() if current_user.role == 'admin' else [user_directory.get(current_user.id)]
+    fields = requested_fields(USER_FIELDS)
+    data = [serialize(user, USER_FIELDS, fields) for user in users]
+    # Directory versions are per process, so hash the (small) payload instead
+    return conditional_json(weak_etag(json.dumps(data, sort_keys=True)), lambda: {'data': data})
+
+
+INGEST_CHUNK_SIZE = 500
+INGEST_MAX_ITEMS = 10000
+SEVERITIES = ('Low', 'Medium', 'High')
+
+
+def validate_ingest_item(raw):
+    """Normalise one NDJSON ticket; raise ApiError with a message for the caller on bad input."""
+    if not isinstance(raw, dict):
+        raise ApiError('Each line must be a JSON object.')
+    title = raw.get('title')
+    if title is not None and not isinstance(title, str):
+        raise ApiError("'title' must be a string.")
+    title = (title or '').strip()
+    if not title:
+        raise ApiError("'title' is required.")
+    if len(title) > 100:
+        raise ApiError("'title' is longer than 100 characters.")
+    status = raw.get('status', 'New')
+    if status not in TICKET_STATUSES:
+        raise ApiError(f"Unknown status '{status}'.")
+    severity = raw.get('severity')
+    if severity is not None and severity not in SEVERITIES:
+        raise ApiError(f"Unknown severity '{severity}'.")
+    key = raw.get('idempotency_key')
+    if key is not None and (not isinstance(key, str) or not 0 < len(key) <= 200):
+        raise ApiError("'idempotency_key' must be a string of 1-200 characters.")
+    description = raw.get('description')
+    if description is not None and not isinstance(description, str):
+        raise ApiError("'description' must be a string.")
+    requested_by = raw.get('requested_by')
+    if requested_by is not None and (not isinstance(requested_by, str) or len(requested_by) > 50):
+        raise ApiError("'requested_by' must be a string of at most 50 characters.")
+
+    assigned_to = raw.get('assigned_to')
+    if assigned_to == AUTO_ASSIGN:
+        pass  # resolved per chunk by ingest_chunk(), so picks see each other
+    elif isinstance(assigned_to, str):
+        # Alerting rules know on-call usernames, not ids
+        match = next((user for user in user_directory.all() if user.username == assigned_to), None)
+        if match is None:
+            raise ApiError(f"Unknown user '{assigned_to}'.")
+        assigned_to = match.id
+    elif assigned_to is not None and (not isinstance(assigned_to, int) or isinstance(assigned_to, bool)
+                                      or user_directory.get(assigned_to) is None):
+        raise ApiError(f"Unknown user {assigned_to}.")
+
+    return {
+        'idempotency_key': key,
+        'title': title,
+        'description': description,
+        'status': status,
+        'severity': severity,
+        'assigned_to': assigned_to,
+        'requested_by': requested_by or current_user.username,
+    }
+
+
+def ingest_chunk(items, results):
+    """Insert one chunk of validated (line, item) pairs in a single transaction.
+
+    Items whose idempotency key already exists (in the database or earlier in
+    the chunk) are reported as duplicates of that ticket instead of inserted.
+    """
+    keys = [item['idempotency_key'] for _, item in items if item['idempotency_key']]
+    existing = {}
+    if keys:
+        existing = {row.idempotency_key: row for row in db.session.execute(
+            db.select(Ticket.id, Ticket.ticket_no, Ticket.idempotency_key).where(Ticket.idempotency_key.in_(keys))
+        )}
+
+    fresh, seen = [], {}
+    for line, item in items:
+        key = item['idempotency_key']
+        if key in existing:
+            results[line] = {'line': line, 'status': 'duplicate', 'id': existing[key].id,
+                             'ticket_no': existing[key].ticket_no}
+        elif key and key in seen:
+            results[line] = {'line': line, 'status': 'duplicate', 'of_line': seen[key]}
+        else:
+            if key:
+                seen[key] = line
+            fresh.append((line, item))
+    if not fresh:
+        return
+
+    created_at = datetime.now(timezone.utc)
+    rows = []
+    for (line, item), number in zip(fresh, ticket_numbers.allocate(len(fresh))):
+        if item['assigned_to'] == AUTO_ASSIGN:
+            item = dict(item, assigned_to=auto_assignee())
+        rows.append(dict(item, ticket_no=format_ticket_number(number), created_at=created_at,
+                         closed_at=created_at if item['status'] == 'Closed' else None,
+                         sla_due_at=sla_deadline(item['severity'], created_at)
+                         if item['status'] in SLA_STATUSES else None,
+                         minhash=minhash_signature(item['title'], item['description'])))
+    db.session.execute(insert(Ticket), rows)
+
+    ids = dict(db.session.execute(
+        db.select(Ticket.ticket_no, Ticket.id).where(Ticket.ticket_no.in_([row['ticket_no'] for row in rows]))
+    ).all())
+
+    # Core inserts skip the ORM flush hooks: feed the rollups, audit log and picker cache here
+    tickets = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        key = ticket_stats_key(row['status'], row['severity'], row['assigned_to'])
+        tickets[key][0] += 1
+        tickets[key][1] += epoch_seconds(created_at)
+    write_stats_deltas(db.session.connection(), tickets, {})
+    db.session.info.setdefault('audit_entries', []).extend(
+        {'ticket_id': ids[row['ticket_no']], 'changed_by': current_user.username, 'changed_at': created_at,
+         'change_description': f"ticket created with status {row['status']} (ingest)"}
+        for row in rows
+    )
+    queue_sla_changes(db.session, [(ids[row['ticket_no']], sla_epoch(row['sla_due_at'])) for row in rows])
+    queue_duplicate_changes(db.session, [(ids[row['ticket_no']], row['minhash'])
+                                         for row in rows if row['status'] != 'Closed'])
+    db.session.info['open_tickets_changed'] = True
+    mark_fragments_changed(db.session, 'tickets')
+    queue_live_events(db.session, [
+        ticket_event('ticket.created', ids[row['ticket_no']], row['ticket_no'], row['status'], row['assigned_to'])
+        for row in rows
+    ])
+
+    for (line, item), row in zip(fresh, rows):
+        results[line] = {'line': line, 'status': 'created', 'id': ids[row['ticket_no']],
+                         'ticket_no': row['ticket_no']}
+
+
+@api_v1.route('/tickets/ingest', methods=['POST'])
+@api_login_required
+def api_ingest_tickets():
+    """Create tickets from an NDJSON body, one ticket per line, with per-line results."""
+    lines = request.get_data(as_text=True).splitlines()
+    results = {}
+    valid = []
+    for line, text_line in enumerate(lines, start=1):
+        if not text_line.strip():
+            continue
+        if len(valid) + len(results) >= INGEST_MAX_ITEMS:
+            raise ApiError(f'At most {INGEST_MAX_ITEMS} tickets per request.', 413)
+        try:
+            valid.append((line, validate_ingest_item(json.loads(text_line))))
+        except ValueError:
+            results[line] = {'line': line, 'status': 'error', 'error': 'Invalid JSON.'}
+        except ApiError as exc:
+            results[line] = {'line': line, 'status': 'error', 'error': str(exc)}
+
+    for start in range(0, len(valid), INGEST_CHUNK_SIZE):
+        chunk = valid[start:start + INGEST_CHUNK_SIZE]
+        for attempt in range(2):
+            try:
+                ingest_chunk(chunk, results)
+                db.session.commit()
+                break
+            except IntegrityError:
+                # A concurrent request inserted one of our keys first; the retry sees it as a duplicate
+                db.session.rollback()
+                for line, _ in chunk:
+                    results.pop(line, None)
+                if attempt:
+                    raise
+
+    ordered = [results[line] for line in sorted(results)]
+    summary = {status: sum(1 for item in ordered if item['status'] == status)
+               for status in ('created', 'duplicate', 'error')}
+    response = jsonify(dict(summary, results=ordered))
+    response.status_code = 207 if summary['error'] else 200
+    return response
+
+
+app.register_blueprint(api_v1)
+
 
 # ------------------ MAIN ------------------
 if __name__ == '__main__':
@@ -0,0 +1,33 @@
+# Compact records for the cold ticket archive
+#
+# An archived ticket is a single row: a few searchable columns plus one
+# zlib-compressed JSON document holding the ticket with its tasks, comments,
+# change log and attachment metadata. Rows round-trip through plain dicts;
+# the caller maps them back onto tables.
+
+import json
+import zlib
+from datetime import date, datetime
+
+COMPRESSION_LEVEL = 6
+
+
+def _encode(value):
+    if isinstance(value, (datetime, date)):
+        return {'$dt': value.isoformat()}
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode(obj):
+    if len(obj) == 1 and '$dt' in obj:
+        return datetime.fromisoformat(obj['$dt'])
+    return obj
+
+
+def pack(record):
+    """Serialize and compress one ticket record."""
+    return zlib.compress(json.dumps(record, default=_encode, separators=(',', ':')).encode(), COMPRESSION_LEVEL)
+
+
+def unpack(payload):
+    return json.loads(zlib.decompress(payload), object_hook=_decode)
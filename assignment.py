@@ -0,0 +1,175 @@
+# Load-aware ticket assignment
+#
+# WorkloadBalancer keeps every eligible user's load in a min-heap, so the
+# least-loaded user comes off the top in O(log n) however many users there
+# are. Load is open tickets plus logged hours, with ``hours_per_ticket`` hours
+# weighing as much as one open ticket. Writers report committed changes with
+# apply(). assign() counts its pick at once, so concurrent requests spread out
+# instead of all landing on the same person. The pick is settled by the
+# commit's own delta, or handed back with release() on rollback. Stale heap
+# entries are skipped lazily, as in sla.DeadlineScheduler.
+
+import heapq
+import threading
+import time
+
+
+class WorkloadBalancer:
+    """Least-loaded pick over ``load()``, which returns {user_id: (open_tickets, hours)} for eligible users.
+
+    The loads are reloaded after ``max_age`` seconds, which picks up other
+    processes' writes and lets old hours drop out of the window, and after
+    invalidate().
+    """
+
+    def __init__(self, load, hours_per_ticket=4.0, max_age=300):
+        self.load = load
+        self.hours_per_ticket = hours_per_ticket
+        self.max_age = max_age
+        self.generation = 0
+        self._loads = None
+        self._scores = {}
+        self._heap = []
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    def score(self, open_tickets, hours):
+        return open_tickets + hours / self.hours_per_ticket
+
+    def invalidate(self):
+        with self._lock:
+            self._loads = None
+
+    def reload(self):
+        with self._lock:
+            self._reload()
+
+    def assign(self, exclude=()):
+        """Pick the least-loaded user not in ``exclude`` and count one more ticket for them.
+
+        Returns (user_id, reservation), or (None, None) when nobody is eligible.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            skipped = []
+            user_id = None
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                if self._scores.get(entry[1]) != entry[0]:
+                    continue
+                if entry[1] in exclude:
+                    skipped.append(entry)
+                    continue
+                user_id = entry[1]
+                break
+            for entry in skipped:
+                heapq.heappush(self._heap, entry)
+            if user_id is None:
+                return None, None
+            self._adjust(user_id, 1, 0.0)
+            return user_id, (user_id, self.generation)
+
+    def apply(self, deltas, reservations=()):
+        """Add committed {user_id: (open delta, hours delta)}, less the reservations already counted."""
+        with self._lock:
+            if self._loads is None:
+                return
+            deltas = {user_id: list(delta) for user_id, delta in deltas.items()}
+            for user_id, generation in reservations:
+                if generation == self.generation:
+                    deltas.setdefault(user_id, [0, 0.0])[0] -= 1
+            for user_id, (open_delta, hours_delta) in deltas.items():
+                if (open_delta or hours_delta) and user_id in self._loads:
+                    self._adjust(user_id, open_delta, hours_delta)
+
+    def release(self, reservations):
+        """Hand back reservations whose tickets were never committed."""
+        self.apply({}, reservations)
+
+    def loads(self):
+        """{user_id: (open_tickets, hours, score)} for every eligible user."""
+        with self._lock:
+            self._ensure_loaded()
+            return {user_id: (open_tickets, hours, self._scores[user_id])
+                    for user_id, (open_tickets, hours) in self._loads.items()}
+
+    def __len__(self):
+        return len(self._scores)
+
+    def _ensure_loaded(self):
+        if self._loads is None or time.monotonic() - self._loaded_at >= self.max_age:
+            self._reload()
+
+    def _reload(self):
+        self._loads = {user_id: [open_tickets, hours] for user_id, (open_tickets, hours) in self.load().items()}
+        self._scores = {user_id: self.score(*load) for user_id, load in self._loads.items()}
+        # User id breaks ties, so equal loads are served in a stable order
+        self._heap = [(score, user_id) for user_id, score in self._scores.items()]
+        heapq.heapify(self._heap)
+        self._loaded_at = time.monotonic()
+        # Reservations from before a reload are already in the fresh counts, or never will be
+        self.generation += 1
+
+    def _adjust(self, user_id, open_delta, hours_delta):
+        load = self._loads[user_id]
+        load[0] += open_delta
+        load[1] += hours_delta
+        score = self.score(*load)
+        self._scores[user_id] = score
+        heapq.heappush(self._heap, (score, user_id))
+        if len(self._heap) > 2 * len(self._scores) + 1024:
+            self._heap = [(score, user_id) for user_id, score in self._scores.items()]
+            heapq.heapify(self._heap)
+
+
+def plan_rebalance(scores, movable, unassigned=(), max_moves=None):
+    """Ticket moves that even out ``scores`` ({user_id: load}), as (ticket_id, from_user, to_user).
+
+    ``unassigned`` tickets go to the least-loaded users first (from_user None).
+    Then tickets listed in ``movable`` ({user_id: [ticket_id, ...]}, most
+    expendable first) move from the busiest user to the least busy one while
+    that narrows the gap, i.e. until no donor is more than one ticket above the
+    least-loaded user. Each move shifts one open ticket.
+    """
+    current = dict(scores)
+    receivers = [(score, user_id) for user_id, score in current.items()]
+    heapq.heapify(receivers)
+    queues = {user_id: list(reversed(tickets)) for user_id, tickets in movable.items()
+              if tickets and user_id in current}
+    donors = [(-current[user_id], user_id) for user_id in queues]
+    heapq.heapify(donors)
+    moves = []
+
+    def least_loaded():
+        while current.get(receivers[0][1]) != receivers[0][0]:
+            heapq.heappop(receivers)
+        return receivers[0]
+
+    def move(ticket_id, donor, receiver):
+        moves.append((ticket_id, donor, receiver))
+        current[receiver] += 1
+        heapq.heappush(receivers, (current[receiver], receiver))
+        if donor is not None:
+            current[donor] -= 1
+            heapq.heappush(receivers, (current[donor], donor))
+            if queues[donor]:
+                heapq.heappush(donors, (-current[donor], donor))
+        if receiver in queues and queues[receiver]:
+            heapq.heappush(donors, (-current[receiver], receiver))
+
+    if not current:
+        return moves
+    for ticket_id in unassigned:
+        if max_moves is not None and len(moves) >= max_moves:
+            return moves
+        move(ticket_id, None, least_loaded()[1])
+
+    while donors and (max_moves is None or len(moves) < max_moves):
+        negative, donor = heapq.heappop(donors)
+        if current[donor] != -negative or not queues[donor]:
+            continue
+        low, receiver = least_loaded()
+        if -negative - low <= 1:
+            break
+        move(queues[donor].pop(), donor, receiver)
+    return moves
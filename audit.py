@@ -0,0 +1,80 @@
+# Background writer for the ticket change log
+#
+# Requests hand their change entries to a bounded in-process queue and
+# return; a daemon thread drains the queue and writes entries in batches.
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Batches entries from a bounded queue into ``write_batch(entries)`` calls on a worker thread.
+
+    When the queue is full the caller writes its own entries synchronously,
+    so a slow database slows requests down instead of dropping history.
+    """
+
+    def __init__(self, write_batch, maxsize=10000, batch_size=500, interval=0.5):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        atexit.register(self.drain)
+
+    def submit(self, entries):
+        self._ensure_started()
+        overflow = []
+        for entry in entries:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                overflow.append(entry)
+        if overflow:
+            logger.warning("Audit queue full; writing %d entries synchronously", len(overflow))
+            self.write_batch(overflow)
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def drain(self):
+        """Block until every queued entry has been written."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def _ensure_started(self):
+        # Restart after fork: threads do not survive into gunicorn worker processes
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def _run(self):
+        pending = self._queue
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.interval
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(pending.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                pass
+            try:
+                self.write_batch(batch)
+            except Exception:
+                logger.exception("Failed to write %d audit entries", len(batch))
+            finally:
+                for _ in batch:
+                    pending.task_done()
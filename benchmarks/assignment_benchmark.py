@@ -0,0 +1,115 @@
+# Auto-assignment benchmark: least-loaded pick and bulk rebalance at thousands of users
+#
+# Usage: python benchmarks/assignment_benchmark.py [--users 1000,10000,100000] [--picks 100000]
+#                                                  [--tickets-per-user 20] [--seed 1]
+#
+# Exercises assignment.WorkloadBalancer and plan_rebalance() directly with
+# synthetic, skewed loads (a long tail of users with several times the mean
+# queue), so it needs no database. For each user count it reports:
+#
+#   assign     p50/p99 latency of one pick-and-reserve on the heap, with commit
+#              deltas applied between picks as the app does
+#   scan       the same pick done as a linear min() over every user, for scale
+#   rebalance  time to plan evening out the whole population, the moves it
+#              needs and the spread (busiest minus least busy) before and after;
+#              only a third of each queue is movable, so the busiest stay ahead
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assignment import WorkloadBalancer, plan_rebalance
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def synthetic_loads(users, tickets_per_user, rng):
+    # Log-normal queues: most users near the mean, a long tail of a few carrying many times it
+    mu = math.log(tickets_per_user) - 0.5
+    return {user_id: (int(rng.lognormvariate(mu, 1.0)), rng.uniform(0, 40)) for user_id in range(1, users + 1)}
+
+
+def bench_assign(loads, picks, rng):
+    balancer = WorkloadBalancer(lambda: loads, max_age=float('inf'))
+    balancer.reload()
+    latencies = []
+    for _ in range(picks):
+        started = time.perf_counter()
+        user_id, reservation = balancer.assign()
+        latencies.append(time.perf_counter() - started)
+        # The commit settles the reservation; now and then someone else closes a ticket or logs time
+        balancer.apply({user_id: (1, 0.0)}, [reservation])
+        if rng.random() < 0.3:
+            balancer.apply({rng.randrange(1, len(loads) + 1): (-1, rng.uniform(0, 2))})
+    return latencies
+
+
+def bench_scan(loads, picks):
+    scores = {user_id: open_tickets + hours / 4 for user_id, (open_tickets, hours) in loads.items()}
+    latencies = []
+    for _ in range(picks):
+        started = time.perf_counter()
+        user_id = min(scores, key=scores.__getitem__)
+        scores[user_id] += 1
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def bench_rebalance(loads, rng):
+    balancer = WorkloadBalancer(lambda: loads)
+    scores = {user_id: score for user_id, (_, _, score) in balancer.loads().items()}
+    movable, next_id = {}, 1
+    for user_id, (open_tickets, _) in loads.items():
+        # Roughly a third of each queue has not been started yet
+        count = open_tickets // 3
+        movable[user_id] = list(range(next_id, next_id + count))
+        next_id += count
+    started = time.perf_counter()
+    moves = plan_rebalance(scores, movable)
+    elapsed = time.perf_counter() - started
+    after = dict(scores)
+    for _, donor, receiver in moves:
+        after[donor] -= 1
+        after[receiver] += 1
+    return {'seconds': elapsed, 'moves': len(moves),
+            'spread_before': max(scores.values()) - min(scores.values()),
+            'spread_after': max(after.values()) - min(after.values())}
+
+
+def micros(seconds):
+    return f"{seconds * 1e6:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', default='1000,10000,100000', help="comma-separated user counts")
+    parser.add_argument('--picks', type=int, default=100_000)
+    parser.add_argument('--tickets-per-user', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'users':>8}{'assign p50':>12}{'p99 us':>8}{'scan p50':>10}{'p99 us':>8}"
+          f"{'plan s':>9}{'moves':>10}{'spread':>16}")
+    for users in (int(value) for value in args.users.split(',')):
+        rng = random.Random(args.seed)
+        loads = synthetic_loads(users, args.tickets_per_user, rng)
+        assign = bench_assign(loads, args.picks, rng)
+        # A linear scan is O(users) per pick; fewer picks keep big populations quick
+        scan = bench_scan(loads, max(100, min(args.picks, 10 ** 8 // users // 100)))
+        rebalance = bench_rebalance(loads, rng)
+        spread = f"{rebalance['spread_before']:.0f} -> {rebalance['spread_after']:.1f}"
+        print(f"{users:>8}{micros(percentile(assign, 50)):>12}{micros(percentile(assign, 99)):>8}"
+              f"{micros(percentile(scan, 50)):>10}{micros(percentile(scan, 99)):>8}"
+              f"{rebalance['seconds']:>9.3f}{rebalance['moves']:>10}{spread:>16}")
+
+
+if __name__ == '__main__':
+    main()
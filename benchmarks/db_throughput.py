@@ -0,0 +1,111 @@
+# Benchmark: concurrent read/write throughput, default SQLite settings vs the production profile
+#
+# Usage: python benchmarks/db_throughput.py [--seconds 5] [--writers 4] [--readers 8]
+#
+# Each thread holds its own pooled connection, like a threaded gunicorn
+# worker. Writers insert and update tickets in short transactions while
+# readers page through open tickets. Lock errors are counted, not retried.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+
+from database import apply_sqlite_pragmas, engine_options
+
+SCHEMA = [
+    "CREATE TABLE ticket (id INTEGER PRIMARY KEY, title TEXT, status TEXT, assigned_to INTEGER, created_at REAL)",
+    "CREATE INDEX ix_ticket_open ON ticket (created_at, id) WHERE status != 'Closed'",
+]
+
+
+def make_engine(path, tuned, pool_size):
+    uri = f'sqlite:///{path}'
+    if not tuned:
+        # What the app used before: library defaults, no pragmas
+        return create_engine(uri, connect_args={'check_same_thread': False}, pool_size=pool_size)
+    options = engine_options(uri)
+    options['pool_size'] = pool_size
+    engine = create_engine(uri, **options)
+    event.listen(engine, 'connect', apply_sqlite_pragmas)
+    return engine
+
+
+def run(tuned, seconds, writers, readers):
+    path = os.path.join(tempfile.mkdtemp(), 'throughput.db')
+    engine = make_engine(path, tuned, writers + readers)
+    with engine.begin() as conn:
+        for statement in SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO ticket (title, status, assigned_to, created_at) VALUES ('seed', 'New', 1, :t)"),
+                     [{'t': time.time() + i} for i in range(20000)])
+
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def writer():
+        done = errors = 0
+        while time.monotonic() < stop:
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text("INSERT INTO ticket (title, status, assigned_to, created_at) "
+                                      "VALUES ('new', 'New', :a, :t)"), {'a': random.randint(1, 50), 't': time.time()})
+                    conn.execute(text("UPDATE ticket SET status = 'Closed' WHERE id = :id"),
+                                 {'id': random.randint(1, 20000)})
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts['writes'] += done
+            counts['errors'] += errors
+
+    def reader():
+        done = errors = 0
+        while time.monotonic() < stop:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT id, title FROM ticket WHERE status != 'Closed' "
+                                      "ORDER BY created_at DESC, id DESC LIMIT 50")).fetchall()
+                done += 1
+            except OperationalError:
+                errors += 1
+        with lock:
+            counts['reads'] += done
+            counts['errors'] += errors
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)] + \
+              [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    label = 'production profile' if tuned else 'default settings'
+    print(f"{label:<20} writes/s {counts['writes'] / seconds:9.1f}   reads/s {counts['reads'] / seconds:9.1f}"
+          f"   lock errors {counts['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5, help="how long each profile runs")
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writer / {args.readers} reader threads, {args.seconds:g}s each")
+    run(False, args.seconds, args.writers, args.readers)
+    run(True, args.seconds, args.writers, args.readers)
+
+
+if __name__ == '__main__':
+    main()
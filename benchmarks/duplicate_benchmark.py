@@ -0,0 +1,206 @@
+# Duplicate suggestion benchmark: precision, recall and latency of the MinHash/LSH index
+#
+# Usage: python benchmarks/duplicate_benchmark.py [--tickets 50000] [--queries 1000] [--exact 200]
+#                                                 [--bands 16,32,64] [--vocabulary 5000] [--seed 1]
+#
+# Exercises duplicates.DuplicateIndex directly, so it needs no database. The
+# synthetic corpus is made of incidents. Each has a title and an error message;
+# every report of it keeps most of the title words, swapping the rest for words
+# of its own, usually pastes the error message with a word or two changed, and
+# adds a narrative drawn from a Zipf-weighted vocabulary that every ticket
+# shares. Most incidents are reported once; a few are reported many times, as
+# during an outage. One report of each query incident is held out as the draft,
+# signed (p50/p99 reported), and looked up in an index built with each --bands
+# count:
+#
+#   lookup     p50/p99 latency of one query, against a linear scan computing
+#              exact Jaccard over every indexed ticket
+#   lsh        share of the linear scan's matches at the default threshold that
+#              share a band with the draft, over --exact queries
+#   precision  share of suggestions that are reports of the same incident
+#   recall     share of queries with a duplicate to find that got at least one
+#   false      share of queries with nothing to find that still got a suggestion
+#   shown      suggestions per query (at most 5)
+#
+# It also reports how long each index takes to build and its memory per ticket.
+
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from duplicates import BANDS, STOP_WORDS, DuplicateIndex, shingles, signature
+
+THRESHOLDS = (0.15, 0.2, 0.25, 0.3, 0.4)
+DUPLICATE_THRESHOLD = 0.3  # app.DUPLICATE_THRESHOLD's default
+LIMIT = 5
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def pseudo_words(count, rng):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(3, 9))))
+    return sorted(words)
+
+
+class Corpus:
+    def __init__(self, tickets, vocabulary, rng):
+        self.rng = rng
+        # Real text is mostly stop words at the top of the frequency table; shingles() drops them
+        self.words = sorted(STOP_WORDS) + pseudo_words(vocabulary, rng)
+        self.cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(self.words) + 1)))
+        self.content_words = self.words[len(STOP_WORDS):]
+        offset = self.cum_weights[len(STOP_WORDS) - 1]
+        self.content_weights = [total - offset for total in self.cum_weights[len(STOP_WORDS):]]
+        self.incidents = []
+        self.texts = {}
+        self.incident_of = {}
+        while len(self.texts) < tickets:
+            title, message = self.content(rng.randint(4, 7)), self.content(rng.randint(6, 12))
+            reports = 1 if rng.random() < 0.9 else min(int(rng.paretovariate(1.2)) + 1, 50)
+            incident = len(self.incidents)
+            self.incidents.append([])
+            for _ in range(reports):
+                ticket_id = len(self.texts) + 1
+                self.texts[ticket_id] = self.report(title, message)
+                self.incident_of[ticket_id] = incident
+                self.incidents[incident].append(ticket_id)
+
+    def background(self, count):
+        return self.rng.choices(self.words, cum_weights=self.cum_weights, k=count)
+
+    def content(self, count):
+        return self.rng.choices(self.content_words, cum_weights=self.content_weights, k=count)
+
+    def reword(self, words, keep):
+        return [word if self.rng.random() < keep else self.content(1)[0] for word in words]
+
+    def report(self, title, message):
+        rng = self.rng
+        description = self.background(rng.randint(3, 20))
+        if rng.random() < 0.7:
+            position = rng.randint(0, len(description))
+            description[position:position] = self.reword(message, 0.9)
+        return ' '.join(self.reword(title, 0.8)), ' '.join(description)
+
+
+def build(signatures, bands):
+    index = DuplicateIndex(lambda after: list(signatures.items()) if after == 0 else [], float('inf'), bands)
+    tracemalloc.start()
+    started = time.perf_counter()
+    index.query(signatures[1])
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, elapsed, size
+
+
+def pick_queries(corpus, count, rng):
+    with_duplicates = [ids for ids in corpus.incidents if len(ids) > 1]
+    singles = [ids for ids in corpus.incidents if len(ids) == 1]
+    chosen = rng.sample(with_duplicates, min(count, len(with_duplicates)))
+    chosen += rng.sample(singles, min(count, len(singles)))
+    return [rng.choice(ids) for ids in chosen]
+
+
+def linear_scan(draft, indexed, threshold):
+    matches = []
+    for ticket_id, features in indexed.items():
+        union = len(draft | features)
+        if union and len(draft & features) / union >= threshold:
+            matches.append(ticket_id)
+    return matches
+
+
+def quality(corpus, queries, results, threshold):
+    """(precision, recall, false alarm rate, suggestions per query) at ``threshold``."""
+    held_out = set(queries)
+    suggested = correct = found = expected = false = 0
+    for ticket_id in queries:
+        incident = corpus.incident_of[ticket_id]
+        hits = [key for key, score in results[ticket_id] if score >= threshold]
+        suggested += len(hits)
+        correct += sum(1 for key in hits if corpus.incident_of[key] == incident)
+        if any(key not in held_out for key in corpus.incidents[incident] if key != ticket_id):
+            expected += 1
+            found += any(corpus.incident_of[key] == incident for key in hits)
+        else:
+            false += bool(hits)
+    return (correct / max(suggested, 1), found / max(expected, 1), false / max(len(queries) - expected, 1),
+            suggested / len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickets', type=int, default=50_000)
+    parser.add_argument('--queries', type=int, default=1000, help="query incidents with and without duplicates")
+    parser.add_argument('--exact', type=int, default=200, help="queries also run as a linear exact scan")
+    parser.add_argument('--bands', default=f'16,{BANDS},64', help="comma-separated band counts to compare")
+    parser.add_argument('--vocabulary', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = Corpus(args.tickets, args.vocabulary, rng)
+    queries = pick_queries(corpus, args.queries, rng)
+    held_out = set(queries)
+    sign_times, drafts = [], {}
+    for ticket_id in queries:
+        started = time.perf_counter()
+        drafts[ticket_id] = signature(*corpus.texts[ticket_id])
+        sign_times.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    # The query reports play the drafts being typed, so they are not indexed
+    signatures = {ticket_id: signature(*text) for ticket_id, text in corpus.texts.items() if ticket_id not in held_out}
+    print(f"{len(signatures)} tickets in {len(corpus.incidents)} incidents, signed in "
+          f"{time.perf_counter() - started:.1f}s; {len(queries)} queries")
+    print(f"sign p50 {percentile(sign_times, 50) * 1000:.2f} ms, p99 {percentile(sign_times, 99) * 1000:.2f} ms")
+
+    indexed = {ticket_id: shingles(*text) for ticket_id, text in corpus.texts.items() if ticket_id not in held_out}
+    scanned = queries[:args.exact // 2] + queries[-(args.exact // 2):]
+    scan_times, exact = [], {}
+    for ticket_id in scanned:
+        draft = shingles(*corpus.texts[ticket_id])
+        started = time.perf_counter()
+        exact[ticket_id] = linear_scan(draft, indexed, DUPLICATE_THRESHOLD)
+        scan_times.append(time.perf_counter() - started)
+    print(f"linear exact scan p50 {percentile(scan_times, 50) * 1000:.1f} ms, "
+          f"p99 {percentile(scan_times, 99) * 1000:.1f} ms")
+
+    print(f"\n{'bands':>5}{'build s':>9}{'B/ticket':>10}{'lookup p50':>12}{'p99 ms':>8}{'lsh':>7}"
+          f"{'threshold':>11}{'precision':>11}{'recall':>8}{'false':>8}{'shown':>7}")
+    for bands in (int(value) for value in args.bands.split(',')):
+        index, build_seconds, size = build(signatures, bands)
+        lookup_times, results = [], {}
+        for ticket_id in queries:
+            started = time.perf_counter()
+            results[ticket_id] = index.query(drafts[ticket_id], min(THRESHOLDS), LIMIT)
+            lookup_times.append(time.perf_counter() - started)
+        total = sum(len(matches) for matches in exact.values())
+        agreed = 0
+        for ticket_id in scanned:
+            candidates = {key for key, _ in index.query(drafts[ticket_id], 0, len(signatures))}
+            agreed += sum(1 for key in exact[ticket_id] if key in candidates)
+        prefix = (f"{bands:>5}{build_seconds:>9.2f}{size / len(index):>10.0f}"
+                  f"{percentile(lookup_times, 50) * 1000:>12.2f}{percentile(lookup_times, 99) * 1000:>8.2f}"
+                  f"{agreed / max(total, 1):>7.2f}")
+        for threshold in THRESHOLDS:
+            precision, recall, false, shown = quality(corpus, queries, results, threshold)
+            print(f"{prefix}{threshold:>11.2f}{precision:>11.3f}{recall:>8.3f}{false:>8.3f}{shown:>7.2f}")
+            prefix = ' ' * len(prefix)
+
+
+if __name__ == '__main__':
+    main()
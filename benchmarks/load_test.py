@@ -0,0 +1,281 @@
+# Benchmark harness: page latency, throughput and query counts against a seeded database
+#
+# Usage: python benchmarks/load_test.py [--scale 10k] [--db PATH] [--requests 200]
+#                                       [--concurrency 8] [--duration 10]
+#                                       [--save-baseline] [--tolerance 0.25]
+#
+# Works on a scratch copy of a database from seed_data.py (generated on first
+# use), so every run starts from the same rows. Two phases:
+#
+#   sequential  each scenario through Flask's test client, one request at a
+#               time, with the SQL statements each request executes counted
+#   concurrent  a mixed workload from --concurrency threads over real HTTP
+#               against a threaded local server, for --duration seconds
+#
+# Results are compared with benchmarks/baselines/<scale>.json when it exists.
+# The run exits non-zero if a scenario's p95 or throughput moves more than
+# --tolerance the wrong way, or if a request now runs more SQL statements.
+# --save-baseline writes the current results as the new baseline instead.
+# Baselines are machine-specific; record them on the machine that compares.
+
+import argparse
+import http.cookiejar
+import json
+import logging
+import math
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import closing
+
+from sqlalchemy import event
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+USERNAME, PASSWORD = 'admin', 'password'
+# Weights for the concurrent phase: mostly reads, like a real helpdesk
+SCENARIOS = (('tickets', 35), ('ticket_detail', 35), ('tasks', 10), ('create_ticket', 10), ('create_task', 10))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, elapsed, queries=None):
+    summary = {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'throughput': round(len(latencies) / elapsed, 1),
+    }
+    if queries is not None:
+        summary['queries'] = round(sum(queries) / len(queries), 1)
+    return summary
+
+
+class Workload:
+    """Builds the request for each scenario from the seeded ids."""
+
+    def __init__(self, tracker, seed):
+        self.rng = random.Random(seed)
+        with tracker.app.app_context():
+            self.ticket_ids = [row[0] for row in tracker.db.session.execute(tracker.db.select(tracker.Ticket.id))]
+            self.open_ticket_ids = [row[0] for row in tracker.db.session.execute(
+                tracker.db.select(tracker.Ticket.id).where(tracker.Ticket.status != 'Closed'))]
+            self.user_ids = [row[0] for row in tracker.db.session.execute(tracker.db.select(tracker.User.id))]
+        self.lock = threading.Lock()
+
+    def request(self, scenario):
+        """Return (method, path, form data) for one request."""
+        with self.lock:
+            rng = self.rng
+            if scenario == 'tickets':
+                return 'GET', '/tickets', None
+            if scenario == 'tasks':
+                return 'GET', '/tasks', None
+            if scenario == 'ticket_detail':
+                return 'GET', f'/ticket/{rng.choice(self.ticket_ids)}', None
+            if scenario == 'create_ticket':
+                return 'POST', '/create_ticket', {
+                    'title': f'load test ticket {rng.randrange(10 ** 6)}', 'description': 'created by load_test.py',
+                    'status': 'New', 'severity': rng.choice(('Low', 'Medium', 'High')),
+                    'assigned_to': str(rng.choice(self.user_ids)),
+                }
+            return 'POST', '/tasks/create', {
+                'description': 'load test task', 'ticket_id': str(rng.choice(self.open_ticket_ids)),
+                'time_spent': str(rng.randint(1, 8)), 'tool_used': 'load_test',
+            }
+
+
+def run_sequential(tracker, workload, count):
+    statements = threading.local()
+
+    def count_statement(*args):
+        statements.count = getattr(statements, 'count', 0) + 1
+
+    with tracker.app.app_context():
+        event.listen(tracker.db.engine, 'after_cursor_execute', count_statement)
+
+    client = tracker.app.test_client()
+    client.post('/login', data={'username': USERNAME, 'password': PASSWORD})
+    results = {}
+    for scenario, _ in SCENARIOS:
+        for _ in range(min(5, count)):  # warm caches and the connection pool
+            method, path, data = workload.request(scenario)
+            client.open(path, method=method, data=data)
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for _ in range(count):
+            method, path, data = workload.request(scenario)
+            statements.count = 0
+            begin = time.perf_counter()
+            response = client.open(path, method=method, data=data)
+            latencies.append(time.perf_counter() - begin)
+            queries.append(statements.count)
+            if response.status_code >= 400:
+                raise SystemExit(f"{scenario}: {method} {path} returned {response.status_code}")
+        results[scenario] = summarize(latencies, time.perf_counter() - started, queries)
+    return results
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Time the request itself, not the page it redirects to
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def run_concurrent(tracker, workload, threads, duration):
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, tracker.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    names, weights = zip(*SCENARIOS)
+    latencies = {name: [] for name in names}
+    errors = []
+    lock = threading.Lock()
+    stop = time.monotonic() + duration
+
+    def send(opener, method, path, data):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        try:
+            with opener.open(urllib.request.Request(base + path, data=body, method=method), timeout=60) as response:
+                response.read()
+        except urllib.error.HTTPError as exc:
+            if exc.code >= 400:
+                raise
+
+    def user(seed):
+        rng = random.Random(seed)
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+                                             NoRedirect())
+        send(opener, 'POST', '/login', {'username': USERNAME, 'password': PASSWORD})
+        while time.monotonic() < stop:
+            scenario = rng.choices(names, weights)[0]
+            method, path, data = workload.request(scenario)
+            begin = time.perf_counter()
+            try:
+                send(opener, method, path, data)
+            except Exception as exc:
+                with lock:
+                    errors.append(f"{scenario}: {exc}")
+                continue
+            with lock:
+                latencies[scenario].append(time.perf_counter() - begin)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=user, args=(seed,)) for seed in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    results = {name: summarize(samples, elapsed) for name, samples in latencies.items() if samples}
+    results['total'] = {'requests': sum(len(samples) for samples in latencies.values()),
+                        'throughput': round(sum(len(samples) for samples in latencies.values()) / elapsed, 1),
+                        'errors': len(errors)}
+    for error in errors[:5]:
+        print(f"  error: {error}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a description of every regression against ``baseline``."""
+    regressions = []
+    for phase, scenarios in baseline.items():
+        if phase not in results:
+            continue
+        for scenario, old in scenarios.items():
+            new = results[phase].get(scenario)
+            if new is None:
+                continue
+            label = f"{phase}/{scenario}"
+            if 'p95_ms' in old and new['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{label}: p95 {old['p95_ms']} -> {new['p95_ms']} ms")
+            if 'throughput' in old and new['throughput'] < old['throughput'] * (1 - tolerance):
+                regressions.append(f"{label}: throughput {old['throughput']} -> {new['throughput']} req/s")
+            if 'queries' in old and new['queries'] > old['queries'] + 0.5:
+                regressions.append(f"{label}: queries per request {old['queries']} -> {new['queries']}")
+            if new.get('errors'):
+                regressions.append(f"{label}: {new['errors']} failed requests")
+    return regressions
+
+
+def print_table(phase, results):
+    print(f"\n{phase}")
+    print(f"  {'scenario':<15}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}")
+    for scenario, row in results.items():
+        print(f"  {scenario:<15}{row['requests']:>9}{row.get('p50_ms', ''):>9}{row.get('p95_ms', ''):>9}"
+              f"{row.get('p99_ms', ''):>9}{row['throughput']:>9}{row.get('queries', ''):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', default='10k', help="seed_data.py scale to benchmark against")
+    parser.add_argument('--db', help="seeded database (default: benchmarks/data/<scale>.db, generated if missing)")
+    parser.add_argument('--requests', type=int, default=200, help="requests per scenario in the sequential phase")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10, help="seconds for the concurrent phase; 0 skips it")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--baseline', help="baseline file (default: benchmarks/baselines/<scale>.json)")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    source = args.db or os.path.join(HERE, 'data', f'{args.scale}.db')
+    if not os.path.exists(source):
+        subprocess.run([sys.executable, os.path.join(HERE, 'seed_data.py'), args.scale, '--db', source], check=True)
+    path = os.path.join(tempfile.mkdtemp(), 'load_test.db')
+    # The backup API copies a consistent snapshot, including anything still in the source's WAL
+    with closing(sqlite3.connect(source)) as original, closing(sqlite3.connect(path)) as copy:
+        original.backup(copy)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    import app as tracker
+
+    # Request and N+1 log lines would drown the report
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    tracker.app.logger.setLevel(logging.ERROR)
+    workload = Workload(tracker, args.seed)
+    results = {'sequential': run_sequential(tracker, workload, args.requests)}
+    print_table('sequential (test client)', results['sequential'])
+    if args.duration > 0:
+        results['concurrent'] = run_concurrent(tracker, workload, args.concurrency, args.duration)
+        total = results['concurrent'].pop('total')
+        print_table(f'concurrent ({args.concurrency} threads over HTTP, {total["errors"]} errors)',
+                    results['concurrent'])
+        print(f"  total: {total['requests']} requests, {total['throughput']} req/s")
+        results['concurrent']['total'] = total
+
+    baseline_path = args.baseline or os.path.join(HERE, 'baselines', f'{args.scale}.json')
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w') as fh:
+            json.dump(results, fh, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {baseline_path}")
+    elif os.path.exists(baseline_path):
+        with open(baseline_path) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        if regressions:
+            print(f"\nRegressions against {baseline_path}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions against {baseline_path}")
+
+
+if __name__ == '__main__':
+    main()
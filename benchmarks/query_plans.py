@@ -0,0 +1,110 @@
+# Benchmark: query plans and timings for the list endpoints, with and without indexes
+#
+# Usage: python benchmarks/query_plans.py [--rows 200000] [--seed 42]
+#
+# Builds a throwaway SQLite database from the app models, fills it with
+# synthetic rows, then prints EXPLAIN QUERY PLAN and timings for each hot
+# query before and after the indexes are created.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import random
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+from app import db
+
+USERS = 50
+STATUSES = ['New', 'In Progress', 'On Hold', 'Closed', 'Closed', 'Closed']
+
+QUERIES = {
+    'open tickets for assignee': (
+        "SELECT id FROM ticket WHERE assigned_to = :user AND status != 'Closed' "
+        "ORDER BY created_at DESC, id DESC LIMIT 50"
+    ),
+    'open tickets (admin / task picker)': (
+        "SELECT id, ticket_no, title FROM ticket WHERE status != 'Closed' "
+        "ORDER BY created_at DESC, id DESC LIMIT 50"
+    ),
+    'closed tickets': (
+        "SELECT id FROM ticket WHERE status = 'Closed' "
+        "ORDER BY created_at DESC, id DESC LIMIT 50"
+    ),
+    'tickets requested by user': (
+        "SELECT id FROM ticket WHERE requested_by = :username "
+        "ORDER BY created_at DESC, id DESC LIMIT 50"
+    ),
+    'tasks by user': "SELECT id FROM task WHERE created_by_id = :user",
+    'comments for ticket': "SELECT id FROM comment WHERE ticket_id = :ticket ORDER BY timestamp",
+}
+
+
+def seed(conn, rows):
+    now = datetime(2025, 1, 1)
+    conn.execute(text("INSERT INTO user (id, username, password, role) VALUES (:id, :username, 'x', 'user')"),
+                 [{'id': i, 'username': f'user{i}'} for i in range(1, USERS + 1)])
+    conn.execute(text(
+        "INSERT INTO ticket (id, ticket_no, title, status, assigned_to, requested_by, created_at) "
+        "VALUES (:id, :no, 'title', :status, :assignee, :requester, :created_at)"
+    ), [{
+        'id': i, 'no': f'SR{i:08d}', 'status': random.choice(STATUSES),
+        'assignee': random.randint(1, USERS), 'requester': f'user{random.randint(1, USERS)}',
+        'created_at': now + timedelta(seconds=i),
+    } for i in range(1, rows + 1)])
+    conn.execute(text(
+        "INSERT INTO task (description, ticket_id, time_spent, created_by_id, created_at) "
+        "VALUES ('work', :ticket, 1, :user, :created_at)"
+    ), [{'ticket': random.randint(1, rows), 'user': random.randint(1, USERS),
+         'created_at': now + timedelta(seconds=i)} for i in range(rows)])
+    conn.execute(text(
+        "INSERT INTO comment (ticket_id, content, timestamp) VALUES (:ticket, 'note', :ts)"
+    ), [{'ticket': random.randint(1, rows), 'ts': now + timedelta(seconds=i)} for i in range(rows)])
+
+
+def report(conn, label, params):
+    print(f"\n=== {label} ===")
+    for name, sql in QUERIES.items():
+        plan = conn.execute(text('EXPLAIN QUERY PLAN ' + sql), params).fetchall()
+        start = time.perf_counter()
+        for _ in range(20):
+            conn.execute(text(sql), params).fetchall()
+        elapsed = (time.perf_counter() - start) / 20 * 1000
+        print(f"{name:<38} {elapsed:8.2f} ms")
+        for row in plan:
+            print(f"    {row[-1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000, help="tickets, tasks and comments to generate")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    params = {'user': 7, 'username': 'user7', 'ticket': args.rows // 2}
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    engine = create_engine(f'sqlite:///{path}')
+    db.metadata.create_all(engine)
+    indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+
+    with engine.begin() as conn:
+        for index in indexes:
+            index.drop(conn)
+        seed(conn, args.rows)
+        conn.execute(text('ANALYZE'))
+        report(conn, f'without indexes ({args.rows} tickets)', params)
+
+        for index in indexes:
+            index.create(conn)
+        conn.execute(text('ANALYZE'))
+        report(conn, f'with indexes ({args.rows} tickets)', params)
+
+
+if __name__ == '__main__':
+    main()
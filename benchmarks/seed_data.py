@@ -0,0 +1,189 @@
+# Synthetic data generator: users, tickets, tasks, comments and change log at 10k/100k/1M scale
+#
+# Usage: python benchmarks/seed_data.py [10k|100k|1M|<tickets>] [--db PATH] [--seed N]
+#
+# Builds a fresh SQLite database through the app's own models and writes rows
+# with Core bulk inserts (the ORM hooks are bypassed, so the search triggers
+# fill the FTS index and the dashboard rollups are rebuilt at the end).
+# Distributions are skewed the way a real helpdesk is: a few agents carry most
+# of the queue, a few requesters file most tickets, recent tickets dominate,
+# old tickets are mostly closed and comment threads have a long tail.
+#
+# Every generated user has the password "password"; the first one is "admin".
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from duplicates import signature
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1M': 1_000_000}
+CHUNK = 10_000
+HISTORY_DAYS = 365
+
+SEVERITIES = (('Low', 45), ('Medium', 35), ('High', 15), (None, 5))
+OPEN_STATUSES = (('New', 40), ('In Progress', 45), ('On Hold', 15))
+TOOLS = (('ServiceNow', 30), ('Remote Desktop', 25), ('PowerShell', 15), ('Ansible', 10),
+         ('Splunk', 10), ('Jira', 5), ('Email', 5))
+SUBJECTS = ('printer', 'vpn', 'laptop', 'email', 'password', 'disk', 'network', 'monitor', 'badge',
+            'database', 'backup', 'license', 'phone', 'wifi', 'certificate', 'server', 'build', 'deploy')
+PROBLEMS = ('not working', 'slow', 'keeps crashing', 'access denied', 'needs replacement', 'timeout',
+            'error on startup', 'missing', 'full', 'expired', 'locked out', 'intermittent failure')
+WORDS = ('please', 'check', 'urgent', 'since', 'yesterday', 'after', 'update', 'restart', 'again', 'user',
+         'reports', 'cannot', 'connect', 'login', 'office', 'remote', 'logs', 'attached', 'still', 'seeing')
+
+
+def parse_scale(value):
+    if value in SCALES:
+        return SCALES[value]
+    return int(value)
+
+
+def zipf_weights(count, exponent=1.1):
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def weighted(rng, pairs, k):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights, k=k)
+
+
+def sentence(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def sla_replay(tracker):
+    """(sla_due_at, sla_level) for a ticket as if the SLA scheduler had been running all along.
+
+    Every deadline already past has escalated once, so starting the app on
+    seeded data does not set off a year of escalations at once. Severity bumps
+    along the way are ignored.
+    """
+    def state(status, severity, created_at, now):
+        if status not in tracker.SLA_STATUSES:
+            return None, 0
+        due, level = tracker.sla_deadline(severity, created_at), 0
+        while due is not None and due <= now:
+            level += 1
+            due = tracker.sla_deadline(severity, due) if level < len(tracker.SLA_ESCALATION_STEPS) else None
+        return due, level
+    return state
+
+
+def generate(ticket_total, rng, ticket_number, sla_state):
+    """Yield row dicts keyed by model name, one block of CHUNK tickets at a time."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    user_total = max(20, ticket_total // 200)
+    users = [dict(id=1, username='admin', full_name='Administrator', password='password', role='admin')]
+    for user_id in range(2, user_total + 1):
+        users.append(dict(id=user_id, username=f'user{user_id}', full_name=f'User {user_id}', password='password',
+                          role='admin' if rng.random() < 0.05 else 'user'))
+    user_ids = [user['id'] for user in users]
+    names = {user['id']: user['username'] for user in users}
+    assignee_weights = zipf_weights(len(user_ids))
+    requesters = [f'requester{n}' for n in range(max(50, ticket_total // 50))]
+    requester_weights = zipf_weights(len(requesters), 1.3)
+    yield {'User': users}
+
+    tickets, tasks, comments, changes = [], [], [], []
+    assignees = rng.choices(user_ids, assignee_weights, k=ticket_total)
+    requested = rng.choices(requesters, requester_weights, k=ticket_total)
+    severities = weighted(rng, SEVERITIES, ticket_total)
+    for ticket_id in range(1, ticket_total + 1):
+        # Squaring a uniform draw puts most tickets in the last few weeks
+        age = timedelta(days=HISTORY_DAYS * rng.random() ** 2)
+        created_at = now - age
+        closed = rng.random() < min(0.95, age.days / 30)
+        status = 'Closed' if closed else weighted(rng, OPEN_STATUSES, 1)[0]
+        assigned_to = assignees[ticket_id - 1] if rng.random() > 0.05 else None
+        sla_due_at, sla_level = sla_state(status, severities[ticket_id - 1], created_at, now)
+        title, description = f'{rng.choice(SUBJECTS)} {rng.choice(PROBLEMS)}', sentence(rng, 8, 40)
+        tickets.append(dict(
+            id=ticket_id, ticket_no=ticket_number(ticket_id), status=status,
+            title=title, description=description, minhash=signature(title, description),
+            severity=severities[ticket_id - 1], assigned_to=assigned_to,
+            requested_by=requested[ticket_id - 1], created_at=created_at, version=1,
+            # Most tickets close within a few days, so old closed tickets are there for archiving
+            closed_at=created_at + min(now - created_at, timedelta(days=rng.expovariate(1 / 3))) if closed else None,
+            sla_due_at=sla_due_at, sla_level=sla_level,
+        ))
+
+        # Busy tickets attract long threads; most have none or one
+        comment_count = min(int(rng.paretovariate(1.5)) - 1 if rng.random() < 0.6 else 0, 200)
+        tickets[-1]['comment_count'] = comment_count
+        for _ in range(comment_count):
+            comments.append(dict(ticket_id=ticket_id, content=sentence(rng, 4, 30), version=1,
+                                 author=names[rng.choices(user_ids, assignee_weights)[0]],
+                                 timestamp=created_at + (now - created_at) * rng.random()))
+
+        worker = assigned_to or rng.choice(user_ids)
+        for _ in range(int(rng.expovariate(1 / 1.5))):
+            tasks.append(dict(ticket_id=ticket_id, description=sentence(rng, 3, 15), version=1,
+                              time_spent=max(1, int(rng.lognormvariate(0.5, 0.8))),
+                              tool_used=weighted(rng, TOOLS, 1)[0], created_by_id=worker,
+                              created_at=created_at + (now - created_at) * rng.random()))
+
+        if status != 'New':
+            changed_at = created_at + (now - created_at) * rng.random()
+            changes.append(dict(ticket_id=ticket_id, changed_by=names[worker], changed_at=changed_at,
+                                change_description=f"Status changed from 'New' to '{status}'"))
+        if assigned_to and rng.random() < 0.2:
+            previous = rng.choice(user_ids)
+            changes.append(dict(ticket_id=ticket_id, changed_by='admin',
+                                changed_at=created_at + (now - created_at) * rng.random(),
+                                change_description=f"Assigned to changed from '{names[previous]}' "
+                                                   f"to '{names[assigned_to]}'"))
+
+        if len(tickets) == CHUNK or ticket_id == ticket_total:
+            yield {'Ticket': tickets, 'Task': tasks, 'Comment': comments, 'TicketChangeLog': changes}
+            tickets, tasks, comments, changes = [], [], [], []
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('scale', nargs='?', default='10k', help="10k, 100k, 1M or a ticket count")
+    parser.add_argument('--db', help="SQLite file to create (default: benchmarks/data/<scale>.db)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    ticket_total = parse_scale(args.scale)
+    path = os.path.abspath(args.db or os.path.join(os.path.dirname(__file__), 'data', f'{args.scale}.db'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    import app as tracker
+
+    started = time.perf_counter()
+    counts = dict.fromkeys(('User', 'Ticket', 'Task', 'Comment', 'TicketChangeLog'), 0)
+    with tracker.app.app_context():
+        tracker.db.create_all()
+        with tracker.db.engine.begin() as connection:
+            for block in generate(ticket_total, random.Random(args.seed), tracker.format_ticket_number,
+                                  sla_replay(tracker)):
+                for model_name, model_rows in block.items():
+                    if model_rows:
+                        connection.execute(getattr(tracker, model_name).__table__.insert(), model_rows)
+                        counts[model_name] += len(model_rows)
+            connection.execute(tracker.TicketSequence.__table__.insert(),
+                               {'name': 'ticket', 'next_value': ticket_total + 1})
+            tracker.rebuild_dashboard_stats(connection)
+        with tracker.db.engine.connect() as connection:
+            connection.exec_driver_sql('ANALYZE')
+            # Fold the WAL back into the main file, so copying that file alone copies everything
+            connection.exec_driver_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+        tracker.db.engine.dispose()
+
+    print(f"{path}: " + ', '.join(f"{count} {name}" for name, count in counts.items()))
+    print(f"generated and loaded in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+# SLA scheduler simulation: days of ticket activity and escalations against a simulated clock
+#
+# Usage: python benchmarks/sla_simulation.py [--tickets 2000] [--days 7] [--step 300] [--seed 1]
+#                                            [--heap-size 1000000]
+#
+# Builds a scratch database through the app's models, swaps the scheduler's
+# clock for a simulated one and starts it without its thread, then advances the
+# clock --step seconds at a time and calls run_pending(). Between steps agents
+# open tickets, put them on hold, close and reopen them and change severities,
+# all through the ORM, so the scheduler only learns about them from the commit
+# hooks. The run fails (exit 1) unless:
+#
+#   on time     every escalation fires in the step its deadline falls in
+#   no polling  steps with nothing due run no SQL at all
+#   stopped     tickets on hold or closed never come due
+#   restart     a scheduler rebuilt from the database holds the same deadlines,
+#               and after simulated downtime it escalates every overdue ticket
+#
+# Finally it times schedule, reschedule and pop on a --heap-size heap.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+SEVERITIES = ('Low', 'Medium', 'High', None)
+
+
+class SimClock:
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+class Checks:
+    def __init__(self):
+        self.failures = []
+
+    def expect(self, condition, message):
+        if not condition and len(self.failures) < 20:
+            self.failures.append(message)
+
+
+def create_tickets(tracker, rng, count):
+    db = tracker.db
+    for _ in range(count):
+        db.session.add(tracker.Ticket(title=f'simulated {rng.randrange(10 ** 6)}', requested_by='sim',
+                                      status=rng.choice(('New', 'New', 'In Progress', 'On Hold')),
+                                      severity=rng.choice(SEVERITIES)))
+    db.session.commit()
+
+
+def agent_activity(tracker, rng, open_ids):
+    """Change a few tickets the way agents do; returns the ids whose SLA clock is now stopped."""
+    db, Ticket = tracker.db, tracker.Ticket
+    stopped = set()
+    for ticket in db.session.scalars(db.select(Ticket).where(Ticket.id.in_(rng.sample(open_ids, 5)))):
+        roll = rng.random()
+        if roll < 0.3:
+            ticket.status = rng.choice(('On Hold', 'Closed'))
+        elif roll < 0.6:
+            ticket.status = rng.choice(tracker.SLA_STATUSES)
+        else:
+            ticket.severity = rng.choice(SEVERITIES)
+        if ticket.status not in tracker.SLA_STATUSES:
+            stopped.add(ticket.id)
+    db.session.commit()
+    return stopped
+
+
+def simulate(tracker, scheduler, clock, args, checks):
+    rng = random.Random(args.seed)
+    db, Ticket = tracker.db, tracker.Ticket
+    main_thread = threading.get_ident()
+    statements = [0]
+
+    def count_statement(*_):
+        # The audit writer's thread writes in the background; only our own SQL counts
+        if threading.get_ident() == main_thread:
+            statements[0] += 1
+
+    event.listen(db.engine, 'after_cursor_execute', count_statement)
+    fired = idle_steps = 0
+    previous = clock.now
+    settled = scheduler.snapshot()
+    end = clock.now + args.days * 86400
+    while clock.now < end:
+        clock.now += args.step
+        if rng.random() < 0.5:
+            create_tickets(tracker, rng, rng.randint(1, 3))
+        open_ids = db.session.scalars(db.select(Ticket.id).where(Ticket.status != 'Closed')).all()
+        stopped = agent_activity(tracker, rng, open_ids) if len(open_ids) > 5 else set()
+
+        deadlines = scheduler.snapshot()
+        for ticket_id in stopped:
+            checks.expect(ticket_id not in deadlines, f"stopped ticket {ticket_id} still scheduled")
+        statements[0] = 0
+        due = scheduler.run_pending()
+        if not due:
+            idle_steps += 1
+            checks.expect(statements[0] == 0, f"{statements[0]} statements in an idle step at {clock.now}")
+        for ticket_id in due:
+            # A change may move a deadline into the past, and then it fires at once;
+            # a deadline the scheduler already held at the last step must not be late
+            deadline = deadlines[ticket_id]
+            checks.expect(deadline <= clock.now and not (deadline <= previous and settled.get(ticket_id) == deadline),
+                          f"ticket {ticket_id} due at {deadline} fired at {clock.now}")
+        checks.expect((scheduler.next_deadline() or end + 1) > clock.now, f"overdue deadline left at {clock.now}")
+        fired += len(due)
+        previous = clock.now
+        settled = scheduler.snapshot()
+    event.remove(db.engine, 'after_cursor_execute', count_statement)
+
+    db.session.expire_all()
+    escalations = db.session.scalar(db.select(db.func.sum(Ticket.sla_level)))
+    return {'fired': fired, 'escalations': escalations or 0, 'idle_steps': idle_steps}
+
+
+def check_restart(tracker, scheduler, clock, checks):
+    db, Ticket = tracker.db, tracker.Ticket
+    restarted = tracker.DeadlineScheduler(tracker.escalate_tickets, seed=tracker.load_sla_deadlines, clock=clock)
+    restarted.start(thread=False)
+    checks.expect(restarted.snapshot() == scheduler.snapshot(), "restarted scheduler disagrees with the live one")
+    reloaded = len(restarted)
+
+    # Two days of downtime: everything that came due meanwhile escalates on the first run
+    clock.now += 2 * 86400
+    overdue = sum(1 for deadline in restarted.snapshot().values() if deadline <= clock.now)
+    started = time.perf_counter()
+    fired = restarted.run_pending()
+    elapsed = time.perf_counter() - started
+    checks.expect(len(fired) == overdue, f"{len(fired)} of {overdue} overdue tickets fired after restart")
+    db.session.expire_all()
+    left = db.session.scalar(db.select(db.func.count()).select_from(Ticket).where(
+        Ticket.sla_due_at <= tracker.sla_now(), Ticket.status.in_(tracker.SLA_STATUSES)))
+    checks.expect(left == 0, f"{left} running tickets still overdue after the restart run")
+    return {'deadlines': reloaded, 'overdue': overdue, 'seconds': round(elapsed, 3)}
+
+
+def heap_benchmark(tracker, size, seed):
+    rng = random.Random(seed)
+    scheduler = tracker.DeadlineScheduler(lambda keys, now: None)
+    deadlines = [rng.uniform(0, 86400) for _ in range(size)]
+    results = {}
+
+    started = time.perf_counter()
+    scheduler.schedule_many(enumerate(deadlines))
+    results['schedule'] = size / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    scheduler.schedule_many((key, deadlines[key] + 3600) for key in range(0, size, 2))
+    results['reschedule'] = (size // 2) / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    popped = sum(len(scheduler.pop_due(now)) for now in range(0, 90000, 60))
+    results['pop'] = popped / (time.perf_counter() - started)
+    return {name: f"{rate:,.0f}/s" for name, rate in results.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tickets', type=int, default=2000, help="tickets open when the simulation starts")
+    parser.add_argument('--days', type=float, default=7)
+    parser.add_argument('--step', type=int, default=300, help="simulated seconds per step")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--heap-size', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'sla.db')}"
+    os.environ['ARCHIVE_DATABASE_URL'] = f"sqlite:///{os.path.join(scratch, 'archive.db')}"
+    os.environ['SLA_SCHEDULER'] = '0'
+
+    import app as tracker
+
+    checks = Checks()
+    clock = SimClock(time.time())
+    scheduler = tracker.sla_scheduler
+    scheduler.clock = clock
+    tracker.SLA_ESCALATION_USER = 'oncall'
+    with tracker.app.app_context():
+        tracker.db.create_all()
+        tracker.db.session.add(tracker.User(username='oncall', password='password', role='admin'))
+        tracker.db.session.commit()
+        create_tickets(tracker, random.Random(args.seed), args.tickets)
+
+        started = time.perf_counter()
+        scheduler.start(thread=False)
+        print(f"seeded {len(scheduler)} deadlines in {time.perf_counter() - started:.3f}s")
+
+        started = time.perf_counter()
+        result = simulate(tracker, scheduler, clock, args, checks)
+        print(f"simulated {args.days} days in {time.perf_counter() - started:.1f}s: {result['fired']} deadlines fired, "
+              f"{result['escalations']} escalation steps, {result['idle_steps']} idle steps")
+
+        result = check_restart(tracker, scheduler, clock, checks)
+        print(f"restart: {result['deadlines']} deadlines reloaded, {result['overdue']} overdue after downtime "
+              f"escalated in {result['seconds']}s")
+        tracker.audit_writer.drain()
+
+    print(f"heap of {args.heap_size}: " + ', '.join(
+        f"{name} {rate}" for name, rate in heap_benchmark(tracker, args.heap_size, args.seed).items()))
+
+    if checks.failures:
+        print("\nFAILED:")
+        for failure in checks.failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nall checks passed")
+
+
+if __name__ == '__main__':
+    main()
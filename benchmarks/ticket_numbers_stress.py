@@ -0,0 +1,85 @@
+# Stress test: concurrent ticket number allocation across processes and threads
+#
+# Usage: python benchmarks/ticket_numbers_stress.py [--processes 4] [--threads 4] [--per-thread 5000]
+#                                                   [--block-size 50]
+#
+# Every thread of every process draws numbers from its process's allocator
+# against one shared SQLite file. The run fails if any number is handed out
+# twice, and reports allocations per second.
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+
+from database import apply_sqlite_pragmas, engine_options
+from sequences import SequenceAllocator
+
+
+def make_engine(path):
+    uri = f'sqlite:///{path}'
+    engine = create_engine(uri, **engine_options(uri))
+    event.listen(engine, 'connect', apply_sqlite_pragmas)
+    return engine
+
+
+def worker(path, threads, per_thread, block_size):
+    engine = make_engine(path)
+    allocator = SequenceAllocator(lambda: engine, 'ticket', block_size=block_size)
+    drawn = []
+    lock = threading.Lock()
+
+    def draw():
+        numbers = [allocator.next() for _ in range(per_thread)]
+        with lock:
+            drawn.extend(numbers)
+
+    workers = [threading.Thread(target=draw) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    engine.dispose()
+    return drawn
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4, help="threads per process")
+    parser.add_argument('--per-thread', type=int, default=5000, help="numbers each thread draws")
+    parser.add_argument('--block-size', type=int, default=50, help="numbers each allocator reserves at a time")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'sequence.db')
+    engine = make_engine(path)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE ticket_sequence (name VARCHAR(50) PRIMARY KEY, next_value BIGINT NOT NULL)"))
+    engine.dispose()
+
+    started = time.perf_counter()
+    with Pool(args.processes) as pool:
+        results = pool.starmap(worker, [(path, args.threads, args.per_thread, args.block_size)] * args.processes)
+    elapsed = time.perf_counter() - started
+
+    numbers = [number for result in results for number in result]
+    expected = args.processes * args.threads * args.per_thread
+    duplicates = len(numbers) - len(set(numbers))
+    print(f"{args.processes} processes x {args.threads} threads x {args.per_thread} numbers, "
+          f"block size {args.block_size}")
+    print(f"allocated {len(numbers)} numbers in {elapsed:.2f}s ({len(numbers) / elapsed:,.0f}/s), "
+          f"duplicates {duplicates}, highest {max(numbers)}")
+    if duplicates or len(numbers) != expected:
+        sys.exit("FAIL: ticket numbers were not unique")
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
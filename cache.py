@@ -0,0 +1,196 @@
+# Small caches shared by the app
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=128, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LocalFragmentStore(TTLCache):
+    """Rendered fragments and region version counters for a single process."""
+
+    def __init__(self, maxsize=512, ttl=300):
+        super().__init__(maxsize, ttl)
+        self._versions = {}
+
+    def version(self, region):
+        return self._versions.get(region, 0)
+
+    def bump(self, region):
+        with self._lock:
+            self._versions[region] = self._versions.get(region, 0) + 1
+
+
+class NullFragmentStore:
+    """A store that keeps nothing, so every fragment is rendered afresh."""
+
+    def get(self, key, default=None):
+        return default
+
+    def set(self, key, value):
+        pass
+
+    def version(self, region):
+        return 0
+
+    def bump(self, region):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class DiskFragmentStore:
+    """Fragments and version tokens kept as files, so every worker on the host shares them.
+
+    Point ``directory`` at a tmpfs such as /dev/shm to keep it in memory.
+    Writes go through a temporary file and ``os.replace`` so readers never
+    see a partial fragment.
+    """
+
+    PRUNE_EVERY = 64
+
+    def __init__(self, directory, maxsize=4096, ttl=300):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._writes = 0
+        os.makedirs(os.path.join(directory, 'versions'), exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode()).hexdigest() + '.html')
+
+    def _write(self, path, value):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            fh.write(value)
+        os.replace(temp_path, path)
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < time.time():
+                return default
+            with open(path, encoding='utf-8') as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return default
+
+    def set(self, key, value):
+        self._write(self._path(key), value)
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self):
+        """Drop expired fragments, then the oldest ones beyond ``maxsize``."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.html'):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+        entries.sort(reverse=True)
+        cutoff = time.time() - self.ttl
+        for index, (mtime, path) in enumerate(entries):
+            if index >= self.maxsize or mtime < cutoff:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def version(self, region):
+        try:
+            with open(os.path.join(self.directory, 'versions', region), encoding='utf-8') as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return '0'
+
+    def bump(self, region):
+        # A fresh token rather than a counter: concurrent bumps from several
+        # workers each still produce a value nobody has cached under
+        self._write(os.path.join(self.directory, 'versions', region), f'{time.time_ns()}-{os.getpid()}')
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.html'):
+                os.remove(entry.path)
+
+    def __len__(self):
+        return sum(1 for entry in os.scandir(self.directory) if entry.name.endswith('.html'))
+
+
+class FragmentCache:
+    """Rendered template fragments keyed by name, parameters and the versions of the data they show.
+
+    Writes bump a region's version instead of deleting entries, so stale
+    fragments simply stop being looked up and age out of the store.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def key(self, name, regions, params):
+        versions = tuple(self.store.version(region) for region in regions)
+        return (name, versions, tuple(sorted(params.items())))
+
+    def get_or_render(self, name, regions, params, render):
+        key = self.key(name, regions, params)
+        html = self.store.get(key)
+        if html is None:
+            html = render()
+            self.store.set(key, html)
+        return html
+
+    def bump(self, regions):
+        for region in regions:
+            self.store.bump(region)
@@ -0,0 +1,81 @@
+# Database engine profile: connection URI, pool sizing and SQLite pragmas
+#
+# Everything is read from the environment so the same code runs against a
+# local SQLite file in development and Postgres in production:
+#
+#   DATABASE_URL            SQLAlchemy URI (default sqlite:///dashboard.db)
+#   ARCHIVE_DATABASE_URL    where archived tickets go (default sqlite:///archive.db)
+#   DB_POOL_SIZE            pooled connections per process (default 5)
+#   DB_MAX_OVERFLOW         extra connections allowed under burst (default 10)
+#   DB_POOL_TIMEOUT         seconds to wait for a pooled connection (default 30)
+#   SQLITE_WAL              use write-ahead logging (default 1)
+#   SQLITE_BUSY_TIMEOUT_MS  how long a writer waits for the lock (default 5000)
+#   SQLITE_CACHE_SIZE_KB    page cache per connection (default 65536)
+#   SQLITE_MMAP_SIZE_MB     memory-mapped I/O window (default 256)
+
+import os
+import sqlite3
+
+DEFAULT_DATABASE_URI = 'sqlite:///dashboard.db'
+DEFAULT_ARCHIVE_URI = 'sqlite:///archive.db'
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def env_flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+def normalize_uri(uri):
+    # Heroku-style URLs use a scheme SQLAlchemy no longer accepts
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def database_uri():
+    return normalize_uri(os.environ.get('DATABASE_URL', DEFAULT_DATABASE_URI))
+
+
+def archive_database_uri():
+    return normalize_uri(os.environ.get('ARCHIVE_DATABASE_URL', DEFAULT_ARCHIVE_URI))
+
+
+def engine_options(uri):
+    if uri.startswith('sqlite'):
+        if uri in ('sqlite://', 'sqlite:///:memory:'):
+            return {}
+        return {
+            'connect_args': {
+                'timeout': env_int('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000,
+                'check_same_thread': False,
+            },
+            'pool_size': env_int('DB_POOL_SIZE', 5),
+            'max_overflow': env_int('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': env_int('DB_POOL_TIMEOUT', 30),
+        }
+    return {
+        'pool_size': env_int('DB_POOL_SIZE', 5),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': 1800,
+        'pool_pre_ping': True,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tune every new SQLite connection for concurrent readers and writers."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    if env_flag('SQLITE_WAL', '1'):
+        # Readers no longer block behind a writer, and commits only append to the log
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f"PRAGMA busy_timeout={env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+    cursor.execute(f"PRAGMA cache_size=-{env_int('SQLITE_CACHE_SIZE_KB', 65536)}")
+    cursor.execute(f"PRAGMA mmap_size={env_int('SQLITE_MMAP_SIZE_MB', 256) * 1024 * 1024}")
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
@@ -0,0 +1,179 @@
+# Near-duplicate detection with MinHash signatures and locality-sensitive hashing
+#
+# signature() reduces a title and body to NUM_PERM minimum hash values over
+# their words. The share of positions where two signatures agree estimates the
+# Jaccard similarity of the two word sets. Signatures are plain bytes, so they
+# can be stored next to the row they describe and reloaded without re-reading
+# any text.
+#
+# DuplicateIndex splits each signature into bands and files the key under
+# every band. A query only scores keys that share at least one band with it,
+# which costs one dictionary lookup per band however many keys are indexed.
+# With 32 bands of 2 rows, texts 0.3 similar share a band 95% of the time and
+# texts 0.05 similar 8% of the time; benchmarks/duplicate_benchmark.py measures
+# what that means for precision, recall and latency.
+
+from array import array
+import operator
+import random
+import re
+import threading
+import time
+import zlib
+
+NUM_PERM = 64
+BANDS = 32
+# The title says what is wrong; the body is mostly how the reporter ran into it
+TITLE_WEIGHT = 3
+
+_PRIME = (1 << 31) - 1
+# Fixed seed: every process must draw the same permutations for stored signatures to compare
+_rng = random.Random(20261018)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_WORD = re.compile(r'\w+')
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has', 'have', 'i', 'in', 'is', 'it',
+    'its', 'me', 'my', 'of', 'on', 'or', 'our', 'so', 'that', 'the', 'this', 'to', 'was', 'we', 'with',
+))
+
+
+def words(text):
+    return {word for word in _WORD.findall((text or '').lower()) if word not in STOP_WORDS}
+
+
+def shingles(title, body=''):
+    """Lower-cased words without stop words; title words count TITLE_WEIGHT times over."""
+    features = words(body)
+    for word in words(title):
+        features.add(word)
+        features.update(f'{word}#{copy}' for copy in range(1, TITLE_WEIGHT))
+    return features
+
+
+def signature(title, body=''):
+    """MinHash signature as NUM_PERM unsigned 32-bit values in bytes, or None when there are no words."""
+    hashes = [zlib.crc32(shingle.encode()) % _PRIME for shingle in shingles(title, body)]
+    if not hashes:
+        return None
+    return array('I', [min([(a * value + b) % _PRIME for value in hashes]) for a, b in _PERMUTATIONS]).tobytes()
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of the texts behind two signatures."""
+    return sum(map(operator.eq, array('I', first), array('I', second))) / NUM_PERM
+
+
+class DuplicateIndex:
+    """LSH index over {key: signature}, filled by ``load(after_key)``.
+
+    ``load`` returns (key, signature) pairs with keys above ``after_key``; the
+    first call passes 0. Keys are assumed to grow, as row ids do, so every
+    ``refresh`` seconds the index asks only for keys above the highest it has
+    seen, which picks up rows other processes inserted. Changes made in this
+    process go through add() and remove() as they commit.
+    """
+
+    def __init__(self, load, refresh=30, bands=BANDS):
+        self.load = load
+        self.refresh = refresh
+        self.bands = bands
+        self._row_bytes = NUM_PERM // bands * 4
+        self._signatures = None
+        self._buckets = [{} for _ in range(bands)]
+        self._high_water = 0
+        self._loaded_at = 0
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._signatures is not None
+
+    def invalidate(self):
+        with self._lock:
+            self._signatures = None
+
+    def add_many(self, pairs):
+        """Index (key, signature) pairs; a signature of None removes the key."""
+        with self._lock:
+            if self._signatures is None:
+                return
+            for key, sig in pairs:
+                self._remove(key)
+                if sig is not None:
+                    self._add(key, sig)
+
+    def add(self, key, sig):
+        self.add_many([(key, sig)])
+
+    def remove(self, key):
+        self.add_many([(key, None)])
+
+    def query(self, sig, threshold=0.5, limit=10, exclude=()):
+        """Up to ``limit`` (key, similarity) pairs at or above ``threshold``, most similar first."""
+        with self._lock:
+            self._ensure_loaded()
+            candidates = set()
+            for band, bucket in self._band_keys(sig):
+                found = self._buckets[band].get(bucket)
+                if found is None:
+                    continue
+                if isinstance(found, set):
+                    candidates.update(found)
+                else:
+                    candidates.add(found)
+            signatures = self._signatures
+        scored = [(key, similarity(sig, signatures[key])) for key in candidates
+                  if key not in exclude and key in signatures]
+        scored = [(key, score) for key, score in scored if score >= threshold]
+        scored.sort(key=lambda pair: (-pair[1], -pair[0]))
+        return scored[:limit]
+
+    def __len__(self):
+        return len(self._signatures or ())
+
+    def _ensure_loaded(self):
+        if self._signatures is None:
+            self._signatures = {}
+            self._buckets = [{} for _ in range(self.bands)]
+            self._high_water = 0
+        elif time.monotonic() - self._loaded_at < self.refresh:
+            return
+        for key, sig in self.load(self._high_water):
+            self._remove(key)
+            if sig is not None:
+                self._add(key, sig)
+            self._high_water = max(self._high_water, key)
+        self._loaded_at = time.monotonic()
+
+    def _band_keys(self, sig):
+        width = self._row_bytes
+        for band in range(self.bands):
+            yield band, sig[band * width:(band + 1) * width]
+
+    def _add(self, key, sig):
+        self._signatures[key] = sig
+        for band, bucket in self._band_keys(sig):
+            # Most buckets hold a single key; a set only once they are shared
+            buckets = self._buckets[band]
+            found = buckets.get(bucket)
+            if found is None:
+                buckets[bucket] = key
+            elif isinstance(found, set):
+                found.add(key)
+            elif found != key:
+                buckets[bucket] = {found, key}
+
+    def _remove(self, key):
+        sig = self._signatures.pop(key, None)
+        if sig is None:
+            return
+        for band, bucket in self._band_keys(sig):
+            buckets = self._buckets[band]
+            found = buckets.get(bucket)
+            if isinstance(found, set):
+                found.discard(key)
+                if len(found) == 1:
+                    buckets[bucket] = next(iter(found))
+            elif found == key:
+                del buckets[bucket]
@@ -0,0 +1,88 @@
+# Publish/subscribe for live ticket and comment updates
+#
+# LocalBroker fans events out to subscribers in this process only. A
+# multi-worker deployment can swap in another Broker (for example one backed
+# by Redis pub/sub or Postgres LISTEN/NOTIFY) that implements the same two
+# methods; the SSE endpoint only talks to the Broker interface.
+
+import itertools
+import queue
+import threading
+
+
+class Subscription:
+    """One client's view of the event stream, optionally narrowed to a ticket or an assignee."""
+
+    def __init__(self, broker, ticket_id=None, assignee_id=None, maxsize=1000):
+        self.broker = broker
+        self.ticket_id = ticket_id
+        self.assignee_id = assignee_id
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def wants(self, event):
+        if self.ticket_id is not None and event.get('ticket_id') != self.ticket_id:
+            return False
+        if self.assignee_id is not None and self.assignee_id not in (
+                event.get('assigned_to'), event.get('previous_assigned_to')):
+            return False
+        return True
+
+    def deliver(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A stalled client loses its oldest events rather than holding memory
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(event)
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def publish(self, events):
+        raise NotImplementedError
+
+    def subscribe(self, ticket_id=None, assignee_id=None):
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    def __init__(self):
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, events):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            stamped = [dict(event, id=next(self._ids)) for event in events]
+        for event in stamped:
+            for subscription in subscriptions:
+                if subscription.wants(event):
+                    subscription.deliver(event)
+
+    def subscribe(self, ticket_id=None, assignee_id=None):
+        subscription = Subscription(self, ticket_id=ticket_id, assignee_id=assignee_id)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def __len__(self):
+        return len(self._subscriptions)
@@ -0,0 +1,51 @@
+# Row serializers for the streaming CSV / NDJSON exports
+
+import csv
+import io
+import json
+from datetime import date, datetime
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_CHUNK_ROWS = 500  # rows buffered before a chunk is handed to the WSGI server
+
+
+def _plain(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def stream_rows(columns, rows, fmt='csv', chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield ``rows`` (tuples in ``columns`` order) as CSV or NDJSON text chunks.
+
+    The header goes out before the first row is fetched so the client sees
+    bytes immediately; after that at most ``chunk_rows`` rows are held in memory.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+
+    if writer:
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    pending = 0
+    for row in rows:
+        if writer:
+            writer.writerow([_plain(value) for value in row])
+        else:
+            buffer.write(json.dumps({column: _plain(value) for column, value in zip(columns, row)}))
+            buffer.write('\n')
+        pending += 1
+        if pending == chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if pending:
+        yield buffer.getvalue()
@@ -0,0 +1,108 @@
+# Worker pool for durable background jobs
+#
+# JobPool runs ``workers`` daemon threads. Each one claims a due job through
+# ``claim()`` and hands it to ``run(job)``. Storage belongs to the caller:
+# app.py keeps jobs in a database table, so they survive restarts and any
+# process can work them. An idle worker sleeps up to ``poll_interval`` seconds
+# between claims, and notify() wakes it at once when this process has just
+# committed new work.
+
+import logging
+import os
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempt, base=10, cap=3600, rng=random):
+    """Seconds before retrying after failed ``attempt`` (1-based): exponential, capped, half of it jittered.
+
+    The jitter keeps jobs that failed together, e.g. during a database outage,
+    from all coming back at the same moment.
+    """
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + rng.uniform(0, delay / 2)
+
+
+class JobPool:
+    """Runs ``run(job)`` for every job ``claim()`` returns, on ``workers`` threads.
+
+    ``claim()`` returns one due job, or None when there is nothing to do. It
+    must be safe to call from several threads and processes at once. ``run``
+    records the outcome itself; an exception escaping it is logged and the
+    worker carries on.
+    """
+
+    def __init__(self, claim, run, workers=2, poll_interval=2.0):
+        self.claim = claim
+        self.run = run
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        return self._pid == os.getpid() and any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Start the worker threads, once per process."""
+        if self.started or self.workers <= 0:
+            return
+        with self._lock:
+            if self.started:
+                return
+            # After a fork the parent's threads are gone; start a fresh set
+            self._stopping.clear()
+            self._threads = [threading.Thread(target=self._run, name=f'job-worker-{number}', daemon=True)
+                             for number in range(1, self.workers + 1)]
+            self._pid = os.getpid()
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout=None):
+        """Let each worker finish its current job, then end the threads."""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def notify(self):
+        self._wake.set()
+
+    def run_pending(self, limit=None):
+        """Claim and run due jobs in the calling thread until none are left; returns how many ran."""
+        count = 0
+        while limit is None or count < limit:
+            job = self.claim()
+            if job is None:
+                break
+            self._run_one(job)
+            count += 1
+        return count
+
+    def _run_one(self, job):
+        try:
+            self.run(job)
+        except Exception:
+            logger.exception("Job runner failed")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            # Cleared before claiming, so a notify() that races the claim is not lost
+            self._wake.clear()
+            try:
+                job = self.claim()
+            except Exception:
+                logger.exception("Failed to claim a job; retrying in %ss", self.poll_interval)
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                continue
+            self._run_one(job)
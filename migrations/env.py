@@ -45,6 +45,19 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# The search index migration creates these FTS5 virtual tables, and SQLite
+# their shadow tables (ticket_fts_data, ticket_fts_idx, ...), with raw SQL.
+# They are not in the models' metadata, so without this autogenerate would
+# emit drop_table for them.
+SEARCH_INDEX_TABLES = ('ticket_fts', 'comment_fts')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == 'table' and any(name == table or name.startswith(table + '_') for table in SEARCH_INDEX_TABLES):
+        return False
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +78,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +107,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
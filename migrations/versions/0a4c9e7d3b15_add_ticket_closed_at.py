@@ -0,0 +1,39 @@
+"""Add closed_at to ticket for archiving, backfilled from the change log
+
+Revision ID: 0a4c9e7d3b15
+Revises: f7b2d8e46a1c
+Create Date: 2026-10-18 16:20:44.918270
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a4c9e7d3b15'
+down_revision = 'f7b2d8e46a1c'
+branch_labels = None
+depends_on = None
+
+CLOSED_TICKETS = sa.text("status = 'Closed'")
+
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('closed_at', sa.DateTime(), nullable=True))
+
+    # The last recorded change to a closed ticket is the best guess at when it was closed
+    op.execute(
+        "UPDATE ticket SET closed_at = COALESCE("
+        "(SELECT MAX(changed_at) FROM ticket_change_log WHERE ticket_change_log.ticket_id = ticket.id), "
+        "created_at) WHERE status = 'Closed'"
+    )
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_closed', ['closed_at', 'id'], unique=False,
+                              sqlite_where=CLOSED_TICKETS, postgresql_where=CLOSED_TICKETS)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_closed')
+        batch_op.drop_column('closed_at')
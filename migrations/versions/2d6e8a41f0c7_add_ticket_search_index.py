@@ -0,0 +1,66 @@
+"""Add FTS5 search index over tickets and comments
+
+Revision ID: 2d6e8a41f0c7
+Revises: 9b1f3c2a7d4e
+Create Date: 2026-10-18 10:02:15.447310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2d6e8a41f0c7'
+down_revision = '9b1f3c2a7d4e'
+branch_labels = None
+depends_on = None
+
+TRIGGERS = ('ticket_fts_ai', 'ticket_fts_ad', 'ticket_fts_au',
+            'comment_fts_ai', 'comment_fts_ad', 'comment_fts_au')
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("CREATE VIRTUAL TABLE ticket_fts USING fts5("
+               "title, description, content='ticket', content_rowid='id', tokenize='porter unicode61')")
+    op.execute("CREATE VIRTUAL TABLE comment_fts USING fts5("
+               "content, content='comment', content_rowid='id', tokenize='porter unicode61')")
+
+    op.execute("CREATE TRIGGER ticket_fts_ai AFTER INSERT ON ticket BEGIN "
+               "INSERT INTO ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+               "END")
+    op.execute("CREATE TRIGGER ticket_fts_ad AFTER DELETE ON ticket BEGIN "
+               "INSERT INTO ticket_fts(ticket_fts, rowid, title, description) "
+               "VALUES ('delete', old.id, old.title, old.description); "
+               "END")
+    op.execute("CREATE TRIGGER ticket_fts_au AFTER UPDATE OF title, description ON ticket BEGIN "
+               "INSERT INTO ticket_fts(ticket_fts, rowid, title, description) "
+               "VALUES ('delete', old.id, old.title, old.description); "
+               "INSERT INTO ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+               "END")
+    op.execute("CREATE TRIGGER comment_fts_ai AFTER INSERT ON comment BEGIN "
+               "INSERT INTO comment_fts(rowid, content) VALUES (new.id, new.content); "
+               "END")
+    op.execute("CREATE TRIGGER comment_fts_ad AFTER DELETE ON comment BEGIN "
+               "INSERT INTO comment_fts(comment_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+               "END")
+    op.execute("CREATE TRIGGER comment_fts_au AFTER UPDATE OF content ON comment BEGIN "
+               "INSERT INTO comment_fts(comment_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+               "INSERT INTO comment_fts(rowid, content) VALUES (new.id, new.content); "
+               "END")
+
+    # Index the rows that already exist
+    op.execute("INSERT INTO ticket_fts(ticket_fts) VALUES ('rebuild')")
+    op.execute("INSERT INTO comment_fts(comment_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    for trigger in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS comment_fts")
+    op.execute("DROP TABLE IF EXISTS ticket_fts")
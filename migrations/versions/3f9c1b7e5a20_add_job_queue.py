@@ -0,0 +1,59 @@
+"""Add job table for the background job queue
+
+Revision ID: 3f9c1b7e5a20
+Revises: 8e4a2c6f1d93
+Create Date: 2026-10-18 23:06:51.740392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c1b7e5a20'
+down_revision = '8e4a2c6f1d93'
+branch_labels = None
+depends_on = None
+
+QUEUED = sa.text("status = 'queued'")
+RUNNING = sa.text("status = 'running'")
+DONE = sa.text("status = 'done'")
+
+
+def upgrade():
+    op.create_table('job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('idempotency_key', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.create_index('ix_job_due', ['run_at', 'id'], unique=False,
+                              sqlite_where=QUEUED, postgresql_where=QUEUED)
+        batch_op.create_index('ix_job_running', ['locked_at'], unique=False,
+                              sqlite_where=RUNNING, postgresql_where=RUNNING)
+        batch_op.create_index('ix_job_finished', ['finished_at'], unique=False,
+                              sqlite_where=DONE, postgresql_where=DONE)
+        batch_op.create_index('ix_job_status_kind', ['status', 'kind'], unique=False)
+        batch_op.create_index('ix_job_idempotency_key', ['idempotency_key'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_idempotency_key')
+        batch_op.drop_index('ix_job_status_kind')
+        batch_op.drop_index('ix_job_finished')
+        batch_op.drop_index('ix_job_running')
+        batch_op.drop_index('ix_job_due')
+
+    op.drop_table('job')
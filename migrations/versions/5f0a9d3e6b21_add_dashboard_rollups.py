@@ -0,0 +1,54 @@
+"""Add dashboard rollup tables
+
+Revision ID: 5f0a9d3e6b21
+Revises: 2d6e8a41f0c7
+Create Date: 2026-10-18 11:20:03.581926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f0a9d3e6b21'
+down_revision = '2d6e8a41f0c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_stats',
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('severity', sa.String(length=10), nullable=False),
+    sa.Column('assigned_to', sa.Integer(), nullable=False),
+    sa.Column('ticket_count', sa.Integer(), nullable=False),
+    sa.Column('created_at_total', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('status', 'severity', 'assigned_to')
+    )
+    op.create_table('task_hours_daily',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('hours', sa.Float(), nullable=False),
+    sa.Column('task_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+
+    # Seed from existing rows; afterwards the app keeps them current
+    epoch = "CAST(strftime('%s', created_at) AS INTEGER)"
+    if op.get_bind().dialect.name == 'postgresql':
+        epoch = "EXTRACT(EPOCH FROM created_at)"
+    op.execute(
+        "INSERT INTO ticket_stats (status, severity, assigned_to, ticket_count, created_at_total) "
+        f"SELECT COALESCE(status, ''), COALESCE(severity, ''), COALESCE(assigned_to, 0), COUNT(*), SUM({epoch}) "
+        "FROM ticket GROUP BY COALESCE(status, ''), COALESCE(severity, ''), COALESCE(assigned_to, 0)"
+    )
+    op.execute(
+        "INSERT INTO task_hours_daily (user_id, day, hours, task_count) "
+        "SELECT COALESCE(created_by_id, 0), date(created_at), COALESCE(SUM(time_spent), 0), COUNT(*) "
+        "FROM task GROUP BY COALESCE(created_by_id, 0), date(created_at)"
+    )
+
+
+def downgrade():
+    op.drop_table('task_hours_daily')
+    op.drop_table('ticket_stats')
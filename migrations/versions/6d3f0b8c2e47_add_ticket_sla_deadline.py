@@ -0,0 +1,36 @@
+"""Add sla_due_at and sla_level to ticket for SLA escalation
+
+Revision ID: 6d3f0b8c2e47
+Revises: 0a4c9e7d3b15
+Create Date: 2026-10-18 18:05:12.406531
+
+Deadlines start out empty; `flask sla-recompute` sets them for running
+tickets from created_at and the configured targets.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6d3f0b8c2e47'
+down_revision = '0a4c9e7d3b15'
+branch_labels = None
+depends_on = None
+
+SCHEDULED_TICKETS = sa.text('sla_due_at IS NOT NULL')
+
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sla_due_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('sla_level', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index('ix_ticket_sla_due', ['sla_due_at'], unique=False,
+                              sqlite_where=SCHEDULED_TICKETS, postgresql_where=SCHEDULED_TICKETS)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_sla_due')
+        batch_op.drop_column('sla_level')
+        batch_op.drop_column('sla_due_at')
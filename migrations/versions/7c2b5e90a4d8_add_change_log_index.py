@@ -0,0 +1,26 @@
+"""Add (ticket_id, changed_at) index to ticket_change_log
+
+Revision ID: 7c2b5e90a4d8
+Revises: 5f0a9d3e6b21
+Create Date: 2026-10-18 12:05:51.230417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2b5e90a4d8'
+down_revision = '5f0a9d3e6b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ticket_change_log', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_change_log_ticket_changed', ['ticket_id', 'changed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket_change_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_change_log_ticket_changed')
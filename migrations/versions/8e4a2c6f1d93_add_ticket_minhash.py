@@ -0,0 +1,29 @@
+"""Add minhash to ticket for duplicate suggestions
+
+Revision ID: 8e4a2c6f1d93
+Revises: 6d3f0b8c2e47
+Create Date: 2026-10-18 21:42:37.118254
+
+Signatures start out empty; `flask duplicates-reindex` computes them for
+existing tickets.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4a2c6f1d93'
+down_revision = '6d3f0b8c2e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('minhash', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_column('minhash')
@@ -0,0 +1,52 @@
+"""Add indexes for ticket, task and comment list filters
+
+Revision ID: 9b1f3c2a7d4e
+Revises: c4538bc46b1e
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b1f3c2a7d4e'
+down_revision = 'c4538bc46b1e'
+branch_labels = None
+depends_on = None
+
+OPEN_TICKETS = sa.text("status != 'Closed'")
+
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_status_created', ['status', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_ticket_assignee_created', ['assigned_to', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_ticket_requester_created', ['requested_by', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_ticket_open_created', ['created_at', 'id'], unique=False,
+                              sqlite_where=OPEN_TICKETS, postgresql_where=OPEN_TICKETS)
+        batch_op.create_index('ix_ticket_open_assignee_created', ['assigned_to', 'created_at', 'id'], unique=False,
+                              sqlite_where=OPEN_TICKETS, postgresql_where=OPEN_TICKETS)
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_created_by_created', ['created_by_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_task_ticket', ['ticket_id'], unique=False)
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.create_index('ix_comment_ticket_timestamp', ['ticket_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_ticket_timestamp')
+
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_ticket')
+        batch_op.drop_index('ix_task_created_by_created')
+
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_open_assignee_created')
+        batch_op.drop_index('ix_ticket_open_created')
+        batch_op.drop_index('ix_ticket_requester_created')
+        batch_op.drop_index('ix_ticket_assignee_created')
+        batch_op.drop_index('ix_ticket_status_created')
@@ -0,0 +1,49 @@
+"""Add content-addressed attachment tables
+
+Revision ID: a3e7c1d95f60
+Revises: 7c2b5e90a4d8
+Create Date: 2026-10-18 13:14:27.905163
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e7c1d95f60'
+down_revision = '7c2b5e90a4d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('attachment_blob',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_table('attachment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ticket_id', sa.Integer(), nullable=False),
+    sa.Column('blob_sha256', sa.String(length=64), nullable=False),
+    sa.Column('filename', sa.String(length=200), nullable=False),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('uploaded_by', sa.String(length=80), nullable=True),
+    sa.Column('uploaded_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['blob_sha256'], ['attachment_blob.sha256'], ),
+    sa.ForeignKeyConstraint(['ticket_id'], ['ticket.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('attachment', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_attachment_ticket_id'), ['ticket_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('attachment', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_attachment_ticket_id'))
+
+    op.drop_table('attachment')
+    op.drop_table('attachment_blob')
@@ -0,0 +1,30 @@
+"""Add ticket number sequence table
+
+Revision ID: b81d4f27c9e3
+Revises: a3e7c1d95f60
+Create Date: 2026-10-18 14:31:09.662087
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b81d4f27c9e3'
+down_revision = 'a3e7c1d95f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ticket_sequence',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('next_value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Continue counting from the number of tickets already filed
+    op.execute("INSERT INTO ticket_sequence (name, next_value) SELECT 'ticket', COUNT(*) + 1 FROM ticket")
+
+
+def downgrade():
+    op.drop_table('ticket_sequence')
@@ -0,0 +1,28 @@
+"""Add row version columns to ticket, task and comment
+
+Revision ID: c5f2a8e13b7d
+Revises: b81d4f27c9e3
+Create Date: 2026-10-18 15:48:33.120574
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f2a8e13b7d'
+down_revision = 'b81d4f27c9e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('ticket', 'task', 'comment'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in ('comment', 'task', 'ticket'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
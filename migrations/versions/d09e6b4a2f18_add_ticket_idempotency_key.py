@@ -0,0 +1,28 @@
+"""Add idempotency key to ticket for batch ingestion
+
+Revision ID: d09e6b4a2f18
+Revises: c5f2a8e13b7d
+Create Date: 2026-10-18 16:40:58.019346
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd09e6b4a2f18'
+down_revision = 'c5f2a8e13b7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=200), nullable=True))
+        batch_op.create_index('ix_ticket_idempotency_key', ['idempotency_key'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_idempotency_key')
+        batch_op.drop_column('idempotency_key')
@@ -0,0 +1,26 @@
+"""Add (created_at, id) index to task for the paginated task list
+
+Revision ID: e3a1c7b52d94
+Revises: d09e6b4a2f18
+Create Date: 2026-10-18 14:10:37.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a1c7b52d94'
+down_revision = 'd09e6b4a2f18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.create_index('ix_task_created', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_created')
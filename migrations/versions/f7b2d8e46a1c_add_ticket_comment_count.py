@@ -0,0 +1,31 @@
+"""Add comment_count to ticket and backfill it
+
+Revision ID: f7b2d8e46a1c
+Revises: e3a1c7b52d94
+Create Date: 2026-10-18 15:02:19.664027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b2d8e46a1c'
+down_revision = 'e3a1c7b52d94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        "UPDATE ticket SET comment_count = "
+        "(SELECT COUNT(*) FROM comment WHERE comment.ticket_id = ticket.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('ticket', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
@@ -0,0 +1,81 @@
+# SQLite FTS5 index over ticket titles, descriptions and comments
+#
+# Both FTS tables are external-content tables: they store only the inverted
+# index and read the text back from ``ticket`` / ``comment``. Triggers keep
+# them in step with every insert, update and delete, including writes that
+# bypass the ORM.
+
+import re
+
+SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS ticket_fts USING fts5("
+    "title, description, content='ticket', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS comment_fts USING fts5("
+    "content, content='comment', content_rowid='id', tokenize='porter unicode61')",
+
+    "CREATE TRIGGER IF NOT EXISTS ticket_fts_ai AFTER INSERT ON ticket BEGIN "
+    "INSERT INTO ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS ticket_fts_ad AFTER DELETE ON ticket BEGIN "
+    "INSERT INTO ticket_fts(ticket_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS ticket_fts_au AFTER UPDATE OF title, description ON ticket BEGIN "
+    "INSERT INTO ticket_fts(ticket_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO ticket_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+    "END",
+
+    "CREATE TRIGGER IF NOT EXISTS comment_fts_ai AFTER INSERT ON comment BEGIN "
+    "INSERT INTO comment_fts(rowid, content) VALUES (new.id, new.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS comment_fts_ad AFTER DELETE ON comment BEGIN "
+    "INSERT INTO comment_fts(comment_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS comment_fts_au AFTER UPDATE OF content ON comment BEGIN "
+    "INSERT INTO comment_fts(comment_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO comment_fts(rowid, content) VALUES (new.id, new.content); "
+    "END",
+]
+
+SEARCH_REBUILD = [
+    "INSERT INTO ticket_fts(ticket_fts) VALUES ('rebuild')",
+    "INSERT INTO comment_fts(comment_fts) VALUES ('rebuild')",
+    "INSERT INTO ticket_fts(ticket_fts) VALUES ('optimize')",
+    "INSERT INTO comment_fts(comment_fts) VALUES ('optimize')",
+]
+
+# One row per matching ticket with its best (lowest) bm25 score. Title hits
+# weigh ten times a description hit; comment hits count half.
+SEARCH_HITS_SQL = """
+    SELECT ticket_id, MIN(score) AS score FROM (
+        SELECT rowid AS ticket_id, bm25(ticket_fts, 10.0, 1.0) AS score
+        FROM ticket_fts WHERE ticket_fts MATCH :match
+        UNION ALL
+        SELECT comment.ticket_id AS ticket_id, bm25(comment_fts) * 0.5 AS score
+        FROM comment_fts JOIN comment ON comment.id = comment_fts.rowid
+        WHERE comment_fts MATCH :match
+    ) GROUP BY ticket_id
+"""
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def match_expression(term):
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix."""
+    words = _TOKEN.findall(term)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def install(connection):
+    for statement in SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+
+
+def rebuild(connection):
+    for statement in SEARCH_REBUILD:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,149 @@
+# In-process deadline scheduler for SLA escalations
+#
+# DeadlineScheduler keeps one deadline per key in a binary heap and a worker
+# thread sleeps until the earliest one is due, so nothing polls the database.
+# Rescheduling or cancelling a key leaves its old heap entry behind; entries
+# that no longer match the key's current deadline are dropped when they reach
+# the top, and the heap is rebuilt once stale entries outnumber live ones.
+#
+# The clock is injectable: benchmarks/sla_simulation.py swaps in a simulated
+# clock, starts the scheduler without its thread and calls run_pending().
+
+import heapq
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """Calls ``on_due(keys, now)`` once the deadline (epoch seconds) of each key has passed.
+
+    ``seed()`` returns the (key, deadline) pairs to start from. It runs once per
+    process, when the scheduler starts, so a restarted or forked worker picks up
+    every deadline the database still holds. Keys whose callback raised are
+    retried ``retry_delay`` seconds later.
+    """
+
+    def __init__(self, on_due, seed=None, clock=time.time, retry_delay=60):
+        self.on_due = on_due
+        self.seed = seed
+        self.clock = clock
+        self.retry_delay = retry_delay
+        self._deadlines = {}
+        self._heap = []
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def started(self):
+        return self._pid == os.getpid() and (self._thread is None or self._thread.is_alive())
+
+    def start(self, thread=True):
+        """Seed from ``seed()`` and start the worker thread, once per process."""
+        if self.started:
+            return
+        with self._lock:
+            if self.started:
+                return
+            # After a fork the copied heap belongs to the parent and its thread is gone
+            pairs = []
+            if self.seed is not None:
+                try:
+                    pairs = self.seed()
+                except Exception:
+                    logger.exception("Failed to load SLA deadlines; starting empty")
+            self.load(pairs)
+            self._thread = threading.Thread(target=self._run, name='sla-scheduler', daemon=True) if thread else None
+            self._pid = os.getpid()
+            if self._thread is not None:
+                self._thread.start()
+
+    def load(self, pairs):
+        """Replace every deadline with ``pairs``."""
+        with self._cond:
+            self._deadlines = {key: deadline for key, deadline in pairs if deadline is not None}
+            self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify()
+
+    def schedule(self, key, deadline):
+        self.schedule_many([(key, deadline)])
+
+    def cancel(self, key):
+        self.schedule_many([(key, None)])
+
+    def schedule_many(self, pairs):
+        """Set (key, deadline) pairs; a deadline of None cancels the key."""
+        with self._cond:
+            wake = False
+            for key, deadline in pairs:
+                if deadline is None:
+                    self._deadlines.pop(key, None)
+                    continue
+                self._deadlines[key] = deadline
+                heapq.heappush(self._heap, (deadline, key))
+                wake = wake or self._heap[0] == (deadline, key)
+            if len(self._heap) > 2 * len(self._deadlines) + 1024:
+                self._heap = [(deadline, key) for key, deadline in self._deadlines.items()]
+                heapq.heapify(self._heap)
+            if wake:
+                self._cond.notify()
+
+    def deadline(self, key):
+        return self._deadlines.get(key)
+
+    def next_deadline(self):
+        with self._cond:
+            return self._peek()
+
+    def pop_due(self, now):
+        """Remove and return every key whose deadline is at or before ``now``, earliest first."""
+        due = []
+        with self._cond:
+            while True:
+                deadline = self._peek()
+                if deadline is None or deadline > now:
+                    return due
+                _, key = heapq.heappop(self._heap)
+                del self._deadlines[key]
+                due.append(key)
+
+    def run_pending(self, now=None):
+        now = self.clock() if now is None else now
+        due = self.pop_due(now)
+        if due:
+            try:
+                self.on_due(due, now)
+            except Exception:
+                logger.exception("SLA escalation failed for %d keys; retrying in %ss", len(due), self.retry_delay)
+                self.schedule_many([(key, now + self.retry_delay) for key in due])
+        return due
+
+    def snapshot(self):
+        with self._cond:
+            return dict(self._deadlines)
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def _peek(self):
+        heap = self._heap
+        while heap and self._deadlines.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = self._peek()
+                timeout = None if deadline is None else deadline - self.clock()
+                if timeout is None or timeout > 0:
+                    # Woken early by schedule_many() when a new earliest deadline arrives
+                    self._cond.wait(timeout)
+                    continue
+            self.run_pending()
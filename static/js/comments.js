@@ -0,0 +1,27 @@
+// Loads older pages of a comment thread in place instead of navigating
+(function () {
+  const thread = document.getElementById('commentThread');
+  if (!thread || !window.fetch) return;
+
+  thread.addEventListener('click', function (event) {
+    const link = event.target.closest('a[data-fragment-url]');
+    if (!link) return;
+    event.preventDefault();
+    link.classList.add('disabled');
+
+    fetch(link.dataset.fragmentUrl, { credentials: 'same-origin' })
+      .then(function (response) {
+        if (!response.ok) throw new Error(response.statusText);
+        return response.text();
+      })
+      .then(function (html) {
+        const more = link.closest('.comment-more');
+        more.insertAdjacentHTML('beforebegin', html);
+        more.remove();
+      })
+      .catch(function () {
+        // Fall back to the plain paginated page
+        window.location = link.href;
+      });
+  });
+})();
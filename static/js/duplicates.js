@@ -0,0 +1,51 @@
+// Suggests open tickets that look like the one being written on the new-ticket form
+(function () {
+  const panel = document.getElementById('duplicateSuggestions');
+  if (!panel || !window.fetch) return;
+
+  const form = panel.closest('form');
+  const title = form.elements.title;
+  const description = form.elements.description;
+  const list = panel.querySelector('ul');
+  let timer = null;
+  let latest = 0;
+
+  function render(tickets) {
+    list.innerHTML = '';
+    tickets.forEach(function (ticket) {
+      const item = document.createElement('li');
+      const link = document.createElement('a');
+      link.href = ticket.url;
+      link.target = '_blank';
+      link.textContent = ticket.ticket_no + ' - ' + ticket.title;
+      item.appendChild(link);
+      item.appendChild(document.createTextNode(' (' + ticket.status + ', ' +
+        Math.round(ticket.similarity * 100) + '% similar)'));
+      list.appendChild(item);
+    });
+    panel.hidden = tickets.length === 0;
+  }
+
+  function lookup() {
+    if (!title.value.trim() && !description.value.trim()) {
+      render([]);
+      return;
+    }
+    const request = ++latest;
+    const url = panel.dataset.lookupUrl + '?title=' + encodeURIComponent(title.value) +
+      '&description=' + encodeURIComponent(description.value.slice(0, 2000));
+    fetch(url, { credentials: 'same-origin' })
+      .then(function (response) { return response.json(); })
+      .then(function (tickets) {
+        // Typing continues while a lookup is in flight; only the newest answer counts
+        if (request === latest) render(tickets);
+      });
+  }
+
+  [title, description].forEach(function (field) {
+    field.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(lookup, 300);
+    });
+  });
+})();
@@ -0,0 +1,26 @@
+// Shows a refresh banner when the server pushes ticket or comment changes
+(function () {
+  const banner = document.getElementById('liveUpdates');
+  if (!banner || !window.EventSource) return;
+
+  const source = new EventSource(banner.dataset.streamUrl);
+  let pending = 0;
+
+  function notify(event) {
+    const data = JSON.parse(event.data);
+    pending += 1;
+    const what = {
+      'ticket.created': 'New ticket ' + data.ticket_no,
+      'ticket.status_changed': data.ticket_no + ' is now ' + data.status,
+      'ticket.reassigned': data.ticket_no + ' was reassigned',
+      'comment.added': 'New comment on ' + data.ticket_no
+    }[event.type];
+    banner.querySelector('.live-message').textContent =
+      pending === 1 ? what : what + ' (+' + (pending - 1) + ' more)';
+    banner.classList.remove('d-none');
+  }
+
+  ['ticket.created', 'ticket.status_changed', 'ticket.reassigned', 'comment.added'].forEach(function (type) {
+    source.addEventListener(type, notify);
+  });
+})();
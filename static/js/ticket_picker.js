@@ -0,0 +1,48 @@
+// Type-ahead for the open-ticket picker on the task forms
+(function () {
+  const search = document.getElementById('ticketSearch');
+  const hidden = document.getElementById('ticketId');
+  const options = document.getElementById('ticketOptions');
+  if (!search || !hidden || !options) return;
+
+  const labels = new Map();
+  let timer = null;
+
+  function render(tickets) {
+    options.innerHTML = '';
+    labels.clear();
+    tickets.forEach(function (ticket) {
+      const label = ticket.ticket_no + ' - ' + ticket.title;
+      labels.set(label, ticket.id);
+      const option = document.createElement('option');
+      option.value = label;
+      options.appendChild(option);
+    });
+  }
+
+  function lookup() {
+    const url = search.dataset.lookupUrl + '?q=' + encodeURIComponent(search.value);
+    fetch(url, { credentials: 'same-origin' })
+      .then(function (response) { return response.json(); })
+      .then(render);
+  }
+
+  search.addEventListener('input', function () {
+    if (labels.has(search.value)) {
+      hidden.value = labels.get(search.value);
+      return;
+    }
+    hidden.value = '';
+    clearTimeout(timer);
+    timer = setTimeout(lookup, 200);
+  });
+
+  search.form.addEventListener('submit', function (event) {
+    if (!hidden.value) {
+      event.preventDefault();
+      search.setCustomValidity('Pick a ticket from the list.');
+      search.reportValidity();
+    }
+  });
+  search.addEventListener('focus', function () { search.setCustomValidity(''); });
+})();
@@ -0,0 +1,87 @@
+# Content-addressed blob store for ticket attachments
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """Stores each distinct file once under ``root/ab/cd/<sha256>``."""
+
+    def __init__(self, root):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        # Uploads waiting for a background job to hash them into the store. It
+        # sits under ``root`` so any worker that can read the blobs can claim
+        # the job, and os.link() into the store never crosses a filesystem.
+        self.spool_dir = os.path.join(root, 'spool')
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def spool_path(self, name):
+        return os.path.join(self.spool_dir, os.path.basename(name))
+
+    def spool(self, stream, chunk_size=CHUNK_SIZE):
+        """Copy ``stream`` into the spool without hashing it; return the spool file's name."""
+        fd, path = tempfile.mkstemp(dir=self.spool_dir)
+        try:
+            with os.fdopen(fd, 'wb') as spooled:
+                shutil.copyfileobj(stream, spooled, chunk_size)
+        except BaseException:
+            os.remove(path)
+            raise
+        return os.path.basename(path)
+
+    def save_file(self, path, chunk_size=CHUNK_SIZE):
+        """Hash the file at ``path`` and link it into the store; return (sha256, size).
+
+        The file itself is left in place, so a caller whose transaction fails
+        can try again; remove it once the attachment row is committed.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as source:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        target = self.path_for(sha256)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                # A hard link costs no copy and never replaces an existing blob
+                os.link(path, target)
+            except FileExistsError:
+                pass
+            except OSError:
+                fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+                os.close(fd)
+                try:
+                    shutil.copyfile(path, tmp_path)
+                    os.replace(tmp_path, target)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+        return sha256, size
+
+    def delete(self, digest):
+        try:
+            os.remove(self.path_for(digest))
+        except FileNotFoundError:
+            pass
+
+    def discard_spool(self, name):
+        try:
+            os.remove(self.spool_path(name))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,84 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py reads its configuration at import time; keep the tests' database,
+# uploads and caches out of the working tree and leave background threads off
+_scratch = tempfile.mkdtemp(prefix='taskmanager-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(_scratch, 'dashboard.db')}",
+    'ARCHIVE_DATABASE_URL': f"sqlite:///{os.path.join(_scratch, 'archive.db')}",
+    'UPLOAD_FOLDER': os.path.join(_scratch, 'uploads'),
+    'FRAGMENT_CACHE': 'off',
+    'JOB_WORKERS': '0',
+    'SLA_SCHEDULER': '0',
+})
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app as app_module
+    app_module.app.config['TESTING'] = True
+    db = app_module.db
+    with app_module.app.app_context():
+        db.create_all()
+        db.session.add_all([
+            app_module.User(username='admin', password='admin', role='admin'),
+            app_module.User(username='bob', password='bob', role='user'),
+        ])
+        db.session.commit()
+    return app_module
+
+
+@pytest.fixture
+def admin_client(app_module):
+    client = app_module.app.test_client()
+    client.post('/login', data={'username': 'admin', 'password': 'admin'})
+    return client
+
+
+@pytest.fixture
+def make_ticket(app_module):
+    """Create a ticket through the ORM, so its session events run; returns its id."""
+    def make(**fields):
+        fields.setdefault('title', 'Printer jams')
+        fields.setdefault('status', 'New')
+        fields.setdefault('requested_by', 'admin')
+        with app_module.app.app_context():
+            ticket = app_module.Ticket(**fields)
+            app_module.db.session.add(ticket)
+            app_module.db.session.commit()
+            return ticket.id
+    return make
+
+
+@pytest.fixture
+def check_rollups(app_module):
+    """Assert the maintained rollups equal a fresh rebuild, done in a transaction that is rolled back."""
+    db = app_module.db
+
+    def read(connection):
+        tickets = connection.execute(db.select(app_module.TicketStats.__table__)
+                                     .where(app_module.TicketStats.ticket_count != 0)).all()
+        tasks = connection.execute(db.select(app_module.TaskHoursDaily.__table__)
+                                   .where(app_module.TaskHoursDaily.task_count != 0)).all()
+        return sorted(map(tuple, tickets)), sorted(map(tuple, tasks))
+
+    def check():
+        with app_module.app.app_context():
+            with db.engine.connect() as connection, connection.begin() as transaction:
+                tickets, tasks = read(connection)
+                app_module.rebuild_dashboard_stats(connection)
+                rebuilt_tickets, rebuilt_tasks = read(connection)
+                transaction.rollback()
+        assert [row[:4] for row in tickets] == [row[:4] for row in rebuilt_tickets]
+        for row, rebuilt in zip(tickets, rebuilt_tickets):
+            # created_at_total sums epoch seconds; the rebuild keeps fractions the live deltas round off
+            assert row[4] == pytest.approx(rebuilt[4], abs=row[3])
+        assert tasks == rebuilt_tasks
+    return check
@@ -0,0 +1,47 @@
+def test_comment_pages_link_to_the_next_page(admin_client, make_ticket):
+    ticket_id = make_ticket(title='Chatty ticket')
+    for number in range(3):
+        response = admin_client.post(f'/api/v1/tickets/{ticket_id}/comments', json={'content': f'note {number}'})
+        assert response.status_code == 201
+
+    first = admin_client.get(f'/api/v1/tickets/{ticket_id}/comments?page_size=2')
+    assert first.status_code == 200
+    page = first.get_json()
+    assert [comment['content'] for comment in page['data']] == ['note 2', 'note 1']
+
+    second = admin_client.get(page['next'])
+    assert second.status_code == 200
+    page = second.get_json()
+    assert [comment['content'] for comment in page['data']] == ['note 0']
+    assert page['next_cursor'] is None and 'next' not in page
+
+
+def test_posting_a_comment_rejects_bodies_that_are_not_objects_or_text(admin_client, make_ticket):
+    ticket_id = make_ticket()
+    url = f'/api/v1/tickets/{ticket_id}/comments'
+    for body, error in (([1, 2], 'Body must be a JSON object.'),
+                        ({'content': 5}, "'content' must be a string."),
+                        ({'content': '   '}, "'content' is required.")):
+        response = admin_client.post(url, json=body)
+        assert response.status_code == 400
+        assert response.get_json() == {'error': error}
+
+
+def test_etags_answer_304_until_the_ticket_changes(admin_client, make_ticket):
+    ticket_id = make_ticket(title='Cached ticket', status='New', description='as filed')
+    urls = (f'/api/v1/tickets/{ticket_id}', '/api/v1/tickets?status=all')
+    etags = {}
+    for url in urls:
+        first = admin_client.get(url)
+        assert first.status_code == 200 and first.headers['ETag'].startswith('W/')
+        etags[url] = first.headers['ETag']
+        unchanged = admin_client.get(url, headers={'If-None-Match': etags[url]})
+        assert unchanged.status_code == 304 and unchanged.data == b''
+        assert unchanged.headers['ETag'] == etags[url]
+
+    admin_client.post(f'/ticket/{ticket_id}', data={'status': 'In Progress', 'description': 'as filed'})
+    for url in urls:
+        changed = admin_client.get(url, headers={'If-None-Match': etags[url]})
+        assert changed.status_code == 200
+        assert changed.headers['ETag'] != etags[url]
+    assert admin_client.get(urls[0]).get_json()['status'] == 'In Progress'
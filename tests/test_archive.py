@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+
+def search_hits(app_module, table, word):
+    return app_module.db.session.execute(
+        app_module.db.text(f"SELECT rowid FROM {table} WHERE {table} MATCH :word"), {'word': word}).scalars().all()
+
+
+def test_archive_then_restore_round_trip(app_module, make_ticket, check_rollups):
+    db = app_module.db
+    runner = app_module.app.test_cli_runner()
+    ticket_id = make_ticket(title='Quokkaprinter melted', description='toner everywhere', status='Closed',
+                            severity='High', assigned_to=1)
+    with app_module.app.app_context():
+        db.session.add(app_module.Task(ticket_id=ticket_id, description='swept up', time_spent=2, created_by_id=1,
+                                       tool_used='Email'))
+        db.session.add(app_module.Comment(ticket_id=ticket_id, content='wombatnote from the floor', author='admin'))
+        db.session.commit()
+        long_ago = datetime.now(timezone.utc) - timedelta(days=400)
+        db.session.execute(db.update(app_module.Ticket).where(app_module.Ticket.id == ticket_id)
+                           .values(closed_at=long_ago))
+        db.session.commit()
+        ticket_no = db.session.get(app_module.Ticket, ticket_id).ticket_no
+    # A newer ticket takes the next id, so the restore cannot get the old one back
+    make_ticket(title='Newer ticket')
+    app_module.audit_writer.drain()
+    check_rollups()
+
+    result = runner.invoke(args=['tickets-archive', '--older-than-days', '300'])
+    assert result.exit_code == 0, result.output
+    assert '1 tickets archived.' in result.output
+    with app_module.app.app_context():
+        assert db.session.get(app_module.Ticket, ticket_id) is None
+        assert db.session.get(app_module.ArchivedTicket, ticket_no).title == 'Quokkaprinter melted'
+        for model in (app_module.Task, app_module.Comment, app_module.TicketChangeLog):
+            assert db.session.query(model).filter(model.ticket_id == ticket_id).count() == 0
+        assert search_hits(app_module, 'ticket_fts', 'quokkaprinter') == []
+        assert search_hits(app_module, 'comment_fts', 'wombatnote') == []
+    check_rollups()
+
+    result = runner.invoke(args=['tickets-restore', ticket_no])
+    assert result.exit_code == 0, result.output
+    with app_module.app.app_context():
+        restored = db.session.scalar(db.select(app_module.Ticket).where(app_module.Ticket.ticket_no == ticket_no))
+        assert restored.id > ticket_id
+        assert f'{ticket_no} restored as ticket {restored.id}.' in result.output
+        assert restored.closed_at > long_ago.replace(tzinfo=None)
+        assert [task.description for task in restored.tasks] == ['swept up']
+        assert [comment.content for comment in restored.comments] == ['wombatnote from the floor']
+        history = [entry.change_description for entry in db.session.query(app_module.TicketChangeLog)
+                   .filter(app_module.TicketChangeLog.ticket_id == restored.id)]
+        assert 'restored from archive' in history and len(history) > 1
+        assert db.session.get(app_module.ArchivedTicket, ticket_no) is None
+        assert search_hits(app_module, 'ticket_fts', 'quokkaprinter') == [restored.id]
+        comment_id = restored.comments[0].id
+        assert search_hits(app_module, 'comment_fts', 'wombatnote') == [comment_id]
+    check_rollups()
+
+    result = runner.invoke(args=['tickets-restore', ticket_no])
+    assert result.exit_code != 0 and 'is not in the archive' in result.output
@@ -0,0 +1,70 @@
+from assignment import WorkloadBalancer, plan_rebalance
+
+
+def balancer_for(loads, **kwargs):
+    return WorkloadBalancer(lambda: loads, **kwargs)
+
+
+def test_assign_picks_the_least_loaded_user_and_counts_the_pick():
+    balancer = balancer_for({1: (5, 0.0), 2: (1, 0.0), 3: (3, 0.0)})
+    assert balancer.assign()[0] == 2
+    assert balancer.assign()[0] == 2
+    # user 2 now has 3 open tickets, tied with user 3; the lower id wins
+    assert balancer.assign()[0] == 2
+    assert balancer.assign()[0] == 3
+
+
+def test_hours_count_towards_load():
+    balancer = balancer_for({1: (2, 0.0), 2: (1, 8.0)}, hours_per_ticket=4.0)
+    assert balancer.loads()[2] == (1, 8.0, 3.0)
+    assert balancer.assign()[0] == 1
+
+
+def test_assign_honours_exclude_and_empty_population():
+    balancer = balancer_for({1: (0, 0.0), 2: (4, 0.0)})
+    assert balancer.assign(exclude={1})[0] == 2
+    assert balancer_for({}).assign() == (None, None)
+
+
+def test_committed_pick_is_not_counted_twice():
+    balancer = balancer_for({1: (0, 0.0), 2: (0, 0.0)})
+    user_id, reservation = balancer.assign()
+    balancer.apply({user_id: (1, 0.0)}, [reservation])
+    assert balancer.loads()[user_id][0] == 1
+
+
+def test_released_pick_is_handed_back():
+    balancer = balancer_for({1: (0, 0.0), 2: (2, 0.0)})
+    user_id, reservation = balancer.assign()
+    balancer.release([reservation])
+    assert balancer.loads()[user_id][0] == 0
+
+
+def test_reservations_from_before_a_reload_are_ignored():
+    loads = {1: (0, 0.0)}
+    balancer = balancer_for(loads)
+    _, reservation = balancer.assign()
+    loads[1] = (1, 0.0)
+    balancer.reload()
+    balancer.release([reservation])
+    assert balancer.loads()[1][0] == 1
+
+
+def test_plan_rebalance_moves_tickets_until_loads_are_within_one():
+    scores = {1: 10, 2: 0, 3: 2}
+    moves = plan_rebalance(scores, {1: list(range(100, 110))})
+    after = dict(scores)
+    for ticket_id, donor, receiver in moves:
+        assert donor == 1
+        after[donor] -= 1
+        after[receiver] += 1
+    assert max(after.values()) - min(after.values()) <= 1
+    # the most expendable tickets go first
+    assert [ticket_id for ticket_id, _, _ in moves] == list(range(100, 100 + len(moves)))
+
+
+def test_plan_rebalance_hands_out_unassigned_tickets_first_and_stops_at_max_moves():
+    moves = plan_rebalance({1: 3, 2: 0}, {1: [10, 11, 12]}, unassigned=[99], max_moves=2)
+    assert moves[0] == (99, None, 2)
+    assert len(moves) == 2
+    assert plan_rebalance({}, {1: [10]}) == []
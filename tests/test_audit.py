@@ -0,0 +1,40 @@
+from audit import AuditWriter
+
+
+def change_log(app_module, ticket_id):
+    app_module.audit_writer.drain()
+    with app_module.app.app_context():
+        log = app_module.TicketChangeLog
+        return [(entry.changed_by, entry.change_description)
+                for entry in log.query.filter_by(ticket_id=ticket_id).order_by(log.id)]
+
+
+def test_ticket_edits_are_written_to_the_change_log(app_module, admin_client, make_ticket):
+    ticket_id = make_ticket(title='Audited', status='New', description='before')
+    response = admin_client.post(f'/ticket/{ticket_id}', data={'status': 'Closed', 'description': 'after',
+                                                                'assigned_to': '2'})
+    assert response.status_code == 302
+    assert change_log(app_module, ticket_id) == [
+        ('system', 'ticket created with status New'),
+        ('admin', 'status: New -> Closed'),
+        ('admin', 'assigned_to: (none) -> 2'),
+        ('admin', 'description updated'),
+    ]
+
+
+def test_rolled_back_edits_are_not_logged(app_module, make_ticket):
+    ticket_id = make_ticket(title='Never changed')
+    with app_module.app.app_context():
+        ticket = app_module.db.session.get(app_module.Ticket, ticket_id)
+        ticket.status = 'Closed'
+        app_module.db.session.flush()
+        app_module.db.session.rollback()
+    assert change_log(app_module, ticket_id) == [('system', 'ticket created with status New')]
+
+
+def test_writer_loses_nothing_when_the_queue_overflows():
+    written = []
+    writer = AuditWriter(written.extend, maxsize=2, batch_size=3, interval=0.01)
+    writer.submit([{'n': n} for n in range(50)])
+    writer.drain()
+    assert sorted(entry['n'] for entry in written) == list(range(50))
@@ -0,0 +1,31 @@
+import json
+
+import pytest
+
+
+@pytest.mark.parametrize('body', [
+    {'set': {'status': 'Closed'}, 'ids': 5},
+    {'set': {'status': 'Closed'}, 'ids': ['a']},
+    {'set': {'status': 'Closed'}, 'ids': [True]},
+    {'set': {'status': 'Closed'}, 'filter': [1]},
+    {'set': {'status': 'Closed'}, 'filter': {'status': 7}},
+    {'set': {'status': 'Closed'}, 'filter': {'requested_by': ['ops']}},
+    {'set': {'status': 'Closed'}, 'ids': [1], 'batch_size': 'x'},
+    {'set': {'status': 'Closed'}, 'ids': [1], 'batch_size': -5},
+    {'set': {'assigned_to': True}, 'ids': [1]},
+    {'set': {'status': 'Lost'}, 'ids': [1]},
+    [1],
+])
+def test_bulk_update_rejects_bad_bodies_before_streaming(admin_client, body):
+    response = admin_client.post('/tickets/bulk', json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_bulk_update_streams_progress_for_a_valid_body(admin_client, make_ticket):
+    created = make_ticket(title='Bulk target')
+    response = admin_client.post('/tickets/bulk', json={'set': {'status': 'On Hold'}, 'ids': [created, created],
+                                                         'batch_size': '1'})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1]['done'] and lines[-1]['updated'] == 1
@@ -0,0 +1,47 @@
+def test_rollups_follow_ticket_and_task_edits(app_module, make_ticket, check_rollups):
+    db = app_module.db
+    Ticket, Task = app_module.Ticket, app_module.Task
+    first = make_ticket(title='Rollup one', severity='Low', assigned_to=1)
+    second = make_ticket(title='Rollup two', severity='High')
+    with app_module.app.app_context():
+        db.session.add_all([Task(ticket_id=first, description='look', time_spent=3, created_by_id=1),
+                            Task(ticket_id=second, description='fix', time_spent=1, created_by_id=2)])
+        db.session.commit()
+    check_rollups()
+
+    with app_module.app.app_context():
+        ticket = db.session.get(Ticket, first)
+        ticket.status = 'In Progress'
+        ticket.assigned_to = 2
+        db.session.get(Ticket, second).severity = 'Medium'
+        task = db.session.scalar(db.select(Task).where(Task.ticket_id == first))
+        task.time_spent = 5
+        task.created_by_id = 2
+        db.session.commit()
+    check_rollups()
+
+    with app_module.app.app_context():
+        db.session.get(Ticket, second).status = 'Closed'
+        db.session.get(Ticket, first).assigned_to = None
+        db.session.delete(db.session.scalar(db.select(Task).where(Task.ticket_id == second)))
+        db.session.commit()
+    check_rollups()
+
+
+def test_rolled_back_edits_leave_rollups_alone(app_module, make_ticket, check_rollups):
+    db = app_module.db
+    ticket_id = make_ticket(title='Rollback me', assigned_to=1)
+    with app_module.app.app_context():
+        ticket = db.session.get(app_module.Ticket, ticket_id)
+        ticket.status = 'Closed'
+        db.session.flush()
+        db.session.rollback()
+    check_rollups()
+
+
+def test_bulk_update_keeps_rollups_in_step(app_module, admin_client, make_ticket, check_rollups):
+    ids = [make_ticket(title=f'Bulk rollup {number}', assigned_to=1) for number in range(3)]
+    response = admin_client.post('/tickets/bulk', json={'ids': ids, 'set': {'status': 'On Hold', 'assigned_to': 2}})
+    assert response.status_code == 200
+    response.get_data()
+    check_rollups()
@@ -0,0 +1,69 @@
+from duplicates import NUM_PERM, DuplicateIndex, shingles, signature, similarity
+
+
+def test_signature_is_deterministic_and_skips_empty_text():
+    first = signature('Printer on floor 3 jams', 'Paper jams every morning')
+    assert first == signature('Printer on floor 3 jams', 'Paper jams every morning')
+    assert len(first) == NUM_PERM * 4
+    assert signature('', '') is None
+    assert signature('the and of', None) is None
+
+
+def test_title_words_outweigh_body_words():
+    features = shingles('VPN down', 'since lunch')
+    assert {'vpn', 'vpn#1', 'vpn#2', 'since', 'lunch'} <= features
+    assert 'lunch#1' not in features
+
+
+def test_similarity_tracks_word_overlap():
+    base = signature('Outlook crashes on start', 'Outlook crashes when opening the calendar')
+    assert similarity(base, base) == 1.0
+    close = signature('Outlook crashes at start', 'Outlook crashes when opening calendar')
+    unrelated = signature('Badge reader broken', 'Front door badge reader is dead')
+    assert similarity(base, close) > 0.5
+    assert similarity(base, unrelated) < 0.2
+
+
+def make_index(rows):
+    rows = dict(rows)
+    return DuplicateIndex(lambda after: [(key, sig) for key, sig in sorted(rows.items()) if key > after]), rows
+
+
+def test_query_finds_near_duplicates_most_similar_first():
+    index, _ = make_index({
+        1: signature('Outlook crashes on start', 'crashes when opening the calendar'),
+        2: signature('Badge reader broken', 'front door badge reader is dead'),
+        3: signature('Outlook crashes on start up', 'crashes when opening the calendar view'),
+    })
+    draft = signature('Outlook crashes on start', 'crashes when opening the calendar')
+    matches = index.query(draft, threshold=0.3)
+    assert [key for key, _ in matches] == [1, 3]
+    assert matches[0][1] == 1.0
+    assert index.query(draft, threshold=0.3, exclude={1}) == matches[1:]
+    assert len(index.query(draft, threshold=0.3, limit=1)) == 1
+
+
+def test_add_and_remove_update_a_loaded_index():
+    index, _ = make_index({})
+    sig = signature('Laptop battery swelling')
+    assert index.query(sig) == []
+    index.add(7, sig)
+    assert index.query(sig) == [(7, 1.0)]
+    index.remove(7)
+    assert index.query(sig) == []
+    assert len(index) == 0
+
+
+def test_refresh_loads_only_rows_above_the_high_water_mark():
+    calls = []
+    rows = {1: signature('Wifi drops in meeting room')}
+
+    def load(after):
+        calls.append(after)
+        return [(key, sig) for key, sig in rows.items() if key > after]
+
+    index = DuplicateIndex(load, refresh=0)
+    index.query(rows[1])
+    rows[2] = signature('Wifi drops in meeting room again')
+    assert [key for key, _ in index.query(rows[1], threshold=0.3)] == [1, 2]
+    assert calls == [0, 1]
@@ -0,0 +1,31 @@
+import pytest
+
+from cache import DiskFragmentStore, LocalFragmentStore
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def fragment_store(request, app_module, tmp_path, monkeypatch):
+    store = LocalFragmentStore() if request.param == 'memory' else DiskFragmentStore(str(tmp_path / 'fragments'))
+    monkeypatch.setattr(app_module.fragment_cache, 'store', store)
+    return store
+
+
+def test_ticket_table_is_served_from_cache_until_a_ticket_changes(app_module, admin_client, make_ticket,
+                                                                  fragment_store):
+    db = app_module.db
+    ticket_id = make_ticket(title='Original heading')
+    assert 'Original heading' in admin_client.get('/tickets?status=all').get_data(as_text=True)
+
+    # A write that skips the session leaves the region version alone, so the cached table is reused
+    with app_module.app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(db.text("UPDATE ticket SET title = 'Behind the cache' WHERE id = :id"),
+                               {'id': ticket_id})
+    page = admin_client.get('/tickets?status=all').get_data(as_text=True)
+    assert 'Original heading' in page and 'Behind the cache' not in page
+
+    with app_module.app.app_context():
+        db.session.get(app_module.Ticket, ticket_id).title = 'Edited heading'
+        db.session.commit()
+    page = admin_client.get('/tickets?status=all').get_data(as_text=True)
+    assert 'Edited heading' in page and 'Original heading' not in page
@@ -0,0 +1,26 @@
+import json
+
+
+def ingest(client, *lines):
+    body = '\n'.join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+    return client.post('/api/v1/tickets/ingest', data=body, content_type='application/x-ndjson')
+
+
+def test_ingest_reports_each_bad_line_and_creates_the_rest(admin_client):
+    response = ingest(admin_client,
+                      {'title': 5},
+                      {'title': 'Scanner offline', 'description': 123},
+                      {'title': 'Scanner offline', 'assigned_to': True},
+                      {'title': 'Scanner offline', 'requested_by': ['ops']},
+                      {'title': 'Scanner offline', 'status': 'Lost'},
+                      [1, 2],
+                      '{not json',
+                      {'title': 'Scanner offline', 'description': 'Since the update'})
+    assert response.status_code == 207
+    data = response.get_json()
+    assert (data['created'], data['error']) == (1, 7)
+    results = {item['line']: item for item in data['results']}
+    assert results[1]['error'] == "'title' must be a string."
+    assert results[2]['error'] == "'description' must be a string."
+    assert results[3]['error'] == 'Unknown user True.'
+    assert results[8]['status'] == 'created'
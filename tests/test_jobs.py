@@ -0,0 +1,83 @@
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+
+from jobs import JobPool, retry_delay
+
+
+def test_retry_delay_doubles_with_jitter_and_is_capped():
+    rng = random.Random(1)
+    for attempt, full in ((1, 10), (2, 20), (3, 40)):
+        delay = retry_delay(attempt, base=10, cap=3600, rng=rng)
+        assert full / 2 <= delay <= full
+    assert 1800 <= retry_delay(30, base=10, cap=3600, rng=rng) <= 3600
+
+
+def queue_pool(jobs, run, **kwargs):
+    pending = list(jobs)
+    lock = threading.Lock()
+
+    def claim():
+        with lock:
+            return pending.pop(0) if pending else None
+
+    return JobPool(claim, run, **kwargs), pending
+
+
+def test_run_pending_runs_every_due_job_and_survives_a_crashing_runner():
+    ran = []
+
+    def run(job):
+        ran.append(job)
+        if job == 'b':
+            raise RuntimeError('handler bug')
+
+    pool, pending = queue_pool(['a', 'b', 'c'], run)
+    assert pool.run_pending() == 3
+    assert ran == ['a', 'b', 'c']
+    assert pending == []
+
+
+def test_run_pending_respects_limit():
+    pool, pending = queue_pool(['a', 'b', 'c'], lambda job: None)
+    assert pool.run_pending(limit=2) == 2
+    assert pending == ['c']
+
+
+def test_start_is_a_no_op_without_workers():
+    pool, _ = queue_pool([], lambda job: None, workers=0)
+    pool.start()
+    assert not pool.started
+
+
+def test_worker_threads_run_jobs_and_stop():
+    done = threading.Event()
+    pool, _ = queue_pool(['a'], lambda job: done.set(), workers=2, poll_interval=0.05)
+    pool.start()
+    try:
+        assert pool.started
+        assert done.wait(5)
+    finally:
+        pool.stop(timeout=5)
+    assert not pool.started
+
+
+def test_stale_jobs_are_requeued_until_their_attempts_run_out(app_module):
+    db, Job = app_module.db, app_module.Job
+    now = datetime.now(timezone.utc)
+    lost = now - timedelta(seconds=app_module.JOB_LEASE_SECONDS + 60)
+    with app_module.app.app_context():
+        jobs = [Job(kind='attachments.store', payload='{}', status='running', attempts=attempts, max_attempts=3,
+                    run_at=lost, locked_by='gone:1:1', locked_at=locked_at)
+                for attempts, locked_at in ((1, lost), (3, lost), (1, now))]
+        db.session.add_all(jobs)
+        db.session.commit()
+        ids = [job.id for job in jobs]
+
+        assert app_module.requeue_stale_jobs() == 1
+        db.session.expire_all()
+        retried, exhausted, healthy = (db.session.get(Job, job_id) for job_id in ids)
+        assert (retried.status, retried.locked_by, retried.finished_at) == ('queued', None, None)
+        assert exhausted.status == 'failed' and exhausted.finished_at is not None
+        assert exhausted.locked_by is None and 'last attempt' in exhausted.last_error
+        assert healthy.status == 'running' and healthy.locked_by == 'gone:1:1'
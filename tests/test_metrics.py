@@ -0,0 +1,25 @@
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+
+def test_metrics_refuse_forwarded_requests_unless_proxies_are_trusted(app_module, monkeypatch):
+    client = app_module.app.test_client()
+    assert client.get('/metrics').status_code == 200
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.9'}).status_code == 403
+    # Through an undeclared proxy on the same host: the peer is localhost but the client is not
+    for header in ({'X-Forwarded-For': '203.0.113.9'}, {'Forwarded': 'for=203.0.113.9'}):
+        assert client.get('/metrics', headers=header).status_code == 403
+
+    monkeypatch.setattr(app_module, 'METRICS_TOKEN', 'scrape-me')
+    response = client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.9',
+                                               'Authorization': 'Bearer scrape-me'})
+    assert response.status_code == 200
+
+
+def test_metrics_allowlist_sees_the_client_behind_trusted_proxies(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, 'TRUSTED_PROXIES', 1)
+    monkeypatch.setattr(app_module.app, 'wsgi_app', ProxyFix(app_module.app.wsgi_app, x_for=1))
+    client = app_module.app.test_client()
+    assert client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.9'}).status_code == 403
+    # Only the hop the proxy appended counts, not addresses the client sent ahead of it
+    assert client.get('/metrics', headers={'X-Forwarded-For': '127.0.0.1, 203.0.113.9'}).status_code == 403
+    assert client.get('/metrics', headers={'X-Forwarded-For': '203.0.113.9, 127.0.0.1'}).status_code == 200
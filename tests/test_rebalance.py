@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.mark.parametrize('max_moves', ['x', -1, 1.5, True])
+def test_rebalance_rejects_bad_max_moves(admin_client, max_moves):
+    response = admin_client.post('/tickets/rebalance', json={'max_moves': max_moves, 'dry_run': True})
+    assert response.status_code == 400
+
+
+def test_rebalance_dry_run_accepts_max_moves(admin_client):
+    response = admin_client.post('/tickets/rebalance', json={'max_moves': 2, 'dry_run': True})
+    assert response.status_code == 200
+    assert len(response.get_json()['moves']) <= 2
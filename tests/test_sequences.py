@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from sequences import SequenceAllocator
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sequences.db'}", connect_args={'timeout': 30})
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE ticket_sequence (name VARCHAR(50) PRIMARY KEY, "
+                                "next_value INTEGER NOT NULL)"))
+    yield engine
+    engine.dispose()
+
+
+def test_one_allocator_counts_up_across_blocks(engine):
+    allocator = SequenceAllocator(lambda: engine, 'ticket', block_size=3, start=10)
+    numbers = [allocator.next() for _ in range(5)] + allocator.allocate(7) + [allocator.next()]
+    assert numbers == list(range(10, 23))
+
+
+def test_concurrent_allocators_never_hand_out_a_number_twice(engine):
+    allocators = [SequenceAllocator(lambda: engine, 'ticket', block_size=4) for _ in range(3)]
+
+    def draw(index):
+        allocator = allocators[index % len(allocators)]
+        return [allocator.next() for _ in range(25)]
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        runs = list(pool.map(draw, range(6)))
+
+    for run in runs:
+        assert run == sorted(run)
+    numbers = [number for run in runs for number in run]
+    assert len(set(numbers)) == len(numbers) == 150
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT next_value FROM ticket_sequence")).scalar() > max(numbers)
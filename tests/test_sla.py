@@ -0,0 +1,73 @@
+from sla import DeadlineScheduler
+
+
+def make_scheduler(on_due=None, retry_delay=60):
+    calls = []
+
+    def record(keys, now):
+        calls.append((list(keys), now))
+        if on_due is not None:
+            on_due(keys, now)
+
+    return DeadlineScheduler(record, retry_delay=retry_delay), calls
+
+
+def test_pop_due_returns_due_keys_earliest_first():
+    scheduler, _ = make_scheduler()
+    scheduler.schedule_many([(1, 300), (2, 100), (3, 200)])
+    assert scheduler.pop_due(250) == [2, 3]
+    assert scheduler.pop_due(250) == []
+    assert scheduler.next_deadline() == 300
+    assert len(scheduler) == 1
+
+
+def test_reschedule_replaces_the_old_deadline():
+    scheduler, _ = make_scheduler()
+    scheduler.schedule(1, 100)
+    scheduler.schedule(1, 500)
+    assert scheduler.pop_due(200) == []
+    assert scheduler.deadline(1) == 500
+    assert scheduler.pop_due(500) == [1]
+
+
+def test_cancel_drops_the_key():
+    scheduler, _ = make_scheduler()
+    scheduler.schedule_many([(1, 100), (2, 200)])
+    scheduler.cancel(1)
+    assert scheduler.next_deadline() == 200
+    assert scheduler.snapshot() == {2: 200}
+
+
+def test_load_replaces_every_deadline_and_skips_none():
+    scheduler, _ = make_scheduler()
+    scheduler.schedule(1, 100)
+    scheduler.load([(2, 50), (3, None)])
+    assert scheduler.snapshot() == {2: 50}
+
+
+def test_run_pending_calls_on_due_with_the_due_keys():
+    scheduler, calls = make_scheduler()
+    scheduler.schedule_many([(1, 100), (2, 200)])
+    assert scheduler.run_pending(now=150) == [1]
+    assert calls == [([1], 150)]
+    assert scheduler.run_pending(now=150) == []
+    assert len(calls) == 1
+
+
+def test_failed_callback_is_retried_after_retry_delay():
+    def fail(keys, now):
+        raise RuntimeError('database down')
+
+    scheduler, calls = make_scheduler(on_due=fail, retry_delay=30)
+    scheduler.schedule(1, 100)
+    assert scheduler.run_pending(now=100) == [1]
+    assert scheduler.deadline(1) == 130
+
+
+def test_heap_is_compacted_when_stale_entries_pile_up():
+    scheduler, _ = make_scheduler()
+    for deadline in range(3000):
+        scheduler.schedule(1, deadline)
+    assert len(scheduler._heap) <= 2 * len(scheduler) + 1024
+    assert scheduler.pop_due(2998) == []
+    assert scheduler.pop_due(2999) == [1]